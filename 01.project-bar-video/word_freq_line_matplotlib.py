@@ -4,13 +4,18 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.dates import DateFormatter
 import os
-import json
-import re
+import sys
 from datetime import datetime
 from collections import defaultdict
-import glob
-from tqdm import tqdm
 from scipy.interpolate import interp1d
+
+# 共享的语料加载器位于 05.project-word-swarm/0.phocuswire-news-analyse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "05.project-word-swarm", "0.phocuswire-news-analyse"))
+from phocuswire_corpus import load_articles
+from phocuswire_freq import month_term_counts
+from phocuswire_phrases import PhraseMatcher
+from phocuswire_tokens import TokenCache
 import matplotlib.font_manager as fm
 
 # 设置Monda字体
@@ -118,115 +123,26 @@ FILTERED_BIGRAMS = {
     'full story', 'full article', 'more information',
 }
 
-def parse_date(date_str):
-    """解析日期字符串为日期对象"""
-    try:
-        date_formats = [
-            "%B %d, %Y",
-            "%d %B %Y",
-            "%B %Y",
-            "%Y-%m-%d",
-        ]
-        
-        for date_format in date_formats:
-            try:
-                return datetime.strptime(date_str.strip(), date_format)
-            except ValueError:
-                continue
-                
-        return None
-    except:
-        return None
+# 编译后的短语匹配器：单遍扫描同时提取重要双词短语和单词
+PHRASE_MATCHER = PhraseMatcher(IMPORTANT_BIGRAMS, blocked=FILTERED_BIGRAMS,
+                               stop_words=ENGLISH_STOP_WORDS | FILTERED_WORDS)
 
 def preprocess_text(text):
     """预处理文本，支持单词和双词短语"""
-    if not text:
-        return []
-        
-    # 移除非字母字符，但保留空格
-    text = re.sub(r'[^a-zA-Z\s]', ' ', text.lower())
-    
-    # 分词
-    words = [word.strip() for word in text.split() if word.strip()]
-    
-    # 提取单词和双词短语
-    processed_terms = []
-    
-    # 处理双词短语
-    for i in range(len(words) - 1):
-        bigram = f"{words[i]} {words[i+1]}"
-        # 如果是重要的双词短语，添加到结果中
-        if bigram in IMPORTANT_BIGRAMS and bigram not in FILTERED_BIGRAMS:
-            processed_terms.append(bigram)
-    
-    # 处理单个词
-    # 只处理那些不是双词短语一部分的单词
-    for i, word in enumerate(words):
-        # 检查这个词是否是任何重要双词短语的一部分
-        is_part_of_bigram = False
-        if i < len(words) - 1:
-            current_bigram = f"{word} {words[i+1]}"
-            if current_bigram in IMPORTANT_BIGRAMS:
-                is_part_of_bigram = True
-        if i > 0:
-            previous_bigram = f"{words[i-1]} {word}"
-            if previous_bigram in IMPORTANT_BIGRAMS:
-                is_part_of_bigram = True
-        
-        # 如果不是双词短语的一部分，且符合其他条件，则添加这个单词
-        if not is_part_of_bigram and word not in ENGLISH_STOP_WORDS and word not in FILTERED_WORDS and len(word) > 2:
-            processed_terms.append(word)
-    
-    return processed_terms
+    return PHRASE_MATCHER.preprocess(text)
 
 def load_and_process_data(data_dir):
     """加载并处理文章数据，返回词频数据"""
-    json_files = glob.glob(os.path.join(data_dir, "phocuswire_page_*.json"))
-    all_articles = []
-    
-    print(f"找到 {len(json_files)} 个JSON文件")
-    
-    for json_file in tqdm(json_files, desc="加载文章数据"):
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-                all_articles.extend(articles)
-        except Exception as e:
-            print(f"读取文件 {json_file} 时出错: {e}")
-    
-    print(f"总共加载了 {len(all_articles)} 篇文章")
+    # 经由共享的语料缓存加载，只需要月份、URL 和正文
+    all_articles = load_articles(data_dir, columns=["month", "url", "content"])
+    token_cache = TokenCache.for_data_dir(
+        data_dir, preprocess_text,
+        phrase_matcher=PHRASE_MATCHER.fingerprint
+    )
     
-    # 处理文章数据，提取关键词频率
-    word_freq_by_date = {}
-    dates = set()
-    
-    for article in tqdm(all_articles, desc="处理文章"):
-        try:
-            date_str = article.get('date')
-            if not date_str:
-                continue
-                
-            date_obj = parse_date(date_str)
-            if not date_obj:
-                continue
-            
-            # 将日期转换为年月格式
-            year_month = date_obj.strftime("%Y-%m")
-            dates.add(year_month)
-            
-            # 预处理文章内容
-            content = article.get('content', '')
-            words = preprocess_text(content)
-            
-            # 更新词频
-            if year_month not in word_freq_by_date:
-                word_freq_by_date[year_month] = {}
-            
-            for word in words:
-                word_freq_by_date[year_month][word] = word_freq_by_date[year_month].get(word, 0) + 1
-                
-        except Exception as e:
-            print(f"处理文章时出错: {e}")
+    # 处理文章数据，提取关键词频率（语料未变化时直接读取缓存的 月份 × 词 词频矩阵）
+    frequencies = month_term_counts(all_articles, preprocess_text, token_cache)
+    dates = frequencies.months
     
     # 将每个月的前15个关键词保存到txt文件
     output_file = "output/monthly_top_keywords.txt"
@@ -235,9 +151,8 @@ def load_and_process_data(data_dir):
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write("每个月的前15个关键词:\n")
         f.write("-" * 50 + "\n")
-        for date in sorted(dates):
-            words = sorted(word_freq_by_date[date].items(), key=lambda x: x[1], reverse=True)
-            top15 = words[:15]
+        for date in dates:
+            top15 = frequencies.top_k(date, 15)
             f.write(f"\n{date}:\n")
             for word, freq in top15:
                 f.write(f"  {word}: {freq}\n")
@@ -245,7 +160,7 @@ def load_and_process_data(data_dir):
     
     print(f"\n每月关键词统计已保存至: {output_file}")
     
-    return word_freq_by_date, sorted(list(dates))
+    return frequencies.to_dict(), dates
 
 def create_word_freq_visualization(data_dir="../05.project-word-swarm/output"):
     """创建词频可视化"""
@@ -1,17 +1,16 @@
-import json
 import os
-import glob
-from collections import Counter
 import matplotlib.pyplot as plt
 import pandas as pd
 import re
-from datetime import datetime
 import seaborn as sns
-from tqdm import tqdm
 from wordcloud import WordCloud
 import numpy as np
 from pathlib import Path
 
+from phocuswire_corpus import load_articles
+from phocuswire_freq import month_term_counts
+from phocuswire_tokens import TokenCache
+
 # 英文停用词列表(内置)
 ENGLISH_STOP_WORDS = {
     'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', "you're", 
@@ -51,18 +50,21 @@ def simple_tokenize(text):
     return [word.strip() for word in text.split() if word.strip()]
 
 class KeywordAnalyzer:
-    def __init__(self, data_dir="output", top_n=30):
+    def __init__(self, data_dir="output", top_n=30, workers=1):
         """
         初始化关键词分析器
         
         Args:
             data_dir: 包含JSON文件的目录
             top_n: 要分析的前N个关键词
+            workers: 提取关键词时的预处理进程数
         """
         self.data_dir = data_dir
         self.top_n = top_n
+        self.workers = workers
         self.articles = []
         self.keywords_by_time = {}
+        self.frequencies = None  # 月份 × 词 的稀疏词频矩阵（MonthTermMatrix）
         
         # 使用内置停用词列表
         self.stop_words = ENGLISH_STOP_WORDS.copy()
@@ -83,53 +85,9 @@ class KeywordAnalyzer:
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
     
     def load_data(self):
-        """从JSON文件加载文章数据"""
-        json_files = glob.glob(os.path.join(self.data_dir, "phocuswire_page_*.json"))
-        all_articles = []
-        
-        print(f"找到 {len(json_files)} 个JSON文件")
-        
-        for json_file in tqdm(json_files, desc="加载文章数据"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    articles = json.load(f)
-                    all_articles.extend(articles)
-            except Exception as e:
-                print(f"读取文件 {json_file} 时出错: {e}")
-        
-        print(f"总共加载了 {len(all_articles)} 篇文章")
-        self.articles = all_articles
-        return all_articles
-    
-    def parse_date(self, date_str):
-        """解析日期字符串为日期对象"""
-        try:
-            # 尝试各种可能的日期格式
-            date_formats = [
-                "%B %d, %Y",       # August 22, 2018
-                "%d %B %Y",        # 22 August 2018
-                "%B %Y",           # August 2018
-                "%b %d, %Y",       # Aug 22, 2018
-                "%d %b %Y",        # 22 Aug 2018
-                "%d-%m-%Y",        # 22-08-2018
-                "%Y-%m-%d",        # 2018-08-22
-                "%m/%d/%Y",        # 08/22/2018
-                "%d/%m/%Y"         # 22/08/2018
-            ]
-            
-            for date_format in date_formats:
-                try:
-                    return datetime.strptime(date_str.strip(), date_format)
-                except ValueError:
-                    continue
-                    
-            # 如果只有年份
-            if re.match(r"^\d{4}$", date_str.strip()):
-                return datetime.strptime(date_str.strip(), "%Y")
-                
-            return None
-        except:
-            return None
+        """从JSON文件加载文章数据（经由共享的语料缓存，源文件未变化时直接内存映射读取）"""
+        self.articles = load_articles(self.data_dir)
+        return self.articles
     
     def preprocess_text(self, text):
         """预处理文本"""
@@ -149,55 +107,29 @@ class KeywordAnalyzer:
 
     def extract_keywords(self):
         """从所有文章中提取关键词"""
-        all_words = []
-        time_periods = {}
-        
-        for article in tqdm(self.articles, desc="提取关键词"):
-            try:
-                # 解析日期
-                date_str = article.get('date')
-                if not date_str:
-                    continue
-                    
-                date_obj = self.parse_date(date_str)
-                if not date_obj:
-                    continue
-                
-                # 将日期转换为年月格式
-                year_month = date_obj.strftime("%Y-%m")
-                
-                # 预处理文章内容
-                content = article.get('content', '')
-                words = self.preprocess_text(content)
-                
-                # 添加到所有词列表
-                all_words.extend(words)
-                
-                # 按时间段组织关键词
-                if year_month not in time_periods:
-                    time_periods[year_month] = []
-                time_periods[year_month].extend(words)
-            except Exception as e:
-                print(f"处理文章时出错: {e}")
+        token_cache = TokenCache.for_data_dir(self.data_dir, self.preprocess_text, stop_words=self.stop_words)
         
-        # 统计全局词频
-        word_counts = Counter(all_words)
+        # 月份 × 词 的词频矩阵（语料未变化时直接读取缓存，否则按源页面文件分片并行统计）
+        frequencies = month_term_counts(self.articles, self.preprocess_text, token_cache,
+                                        workers=self.workers, desc="提取关键词")
+        word_counts = frequencies.totals()
         
         # 获取前N个关键词
-        top_keywords = [word for word, count in word_counts.most_common(self.top_n)]
+        top_keywords = [word for word, count in frequencies.top_total(self.top_n)]
         
         # 统计每个时间段的关键词频率
+        keyword_series = frequencies.series(top_keywords)
         keywords_by_time = {}
-        for period, words in time_periods.items():
-            period_counts = Counter(words)
-            keywords_by_time[period] = {word: period_counts.get(word, 0) for word in top_keywords}
+        for period, counts in zip(frequencies.months, keyword_series.tolist()):
+            keywords_by_time[period] = dict(zip(top_keywords, counts))
         
         self.top_keywords = top_keywords
         self.keywords_by_time = keywords_by_time
         self.all_word_counts = word_counts
+        self.frequencies = frequencies
         
         print(f"提取完成，识别出 {len(word_counts)} 个独特关键词")
-        print(f"最常见的10个关键词: {word_counts.most_common(10)}")
+        print(f"最常见的10个关键词: {frequencies.top_total(10)}")
         
         return top_keywords, keywords_by_time
     
@@ -431,7 +363,7 @@ class KeywordAnalyzer:
 if __name__ == "__main__":
     # 创建分析器实例
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
-    analyzer = KeywordAnalyzer(data_dir=data_dir)
+    analyzer = KeywordAnalyzer(data_dir=data_dir, workers=os.cpu_count() or 1)
     
     # 运行分析
     analyzer.run_analysis() 
\ No newline at end of file
@@ -11,6 +11,10 @@ from datetime import datetime
 from pathlib import Path
 from tqdm import tqdm
 
+from phocuswire_corpus import load_articles
+from phocuswire_freq import month_term_counts
+from phocuswire_tokens import TokenCache
+
 # Define stop words (same as in keyword_analysis.py)
 ENGLISH_STOP_WORDS = {
     'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', "you're", 
@@ -78,92 +82,24 @@ def preprocess_text(text):
     
     return words
 
-def parse_date(date_str):
-    """Parse date string to date object"""
-    try:
-        # Try various possible date formats
-        date_formats = [
-            "%B %d, %Y",       # August 22, 2018
-            "%d %B %Y",        # 22 August 2018
-            "%B %Y",           # August 2018
-            "%b %d, %Y",       # Aug 22, 2018
-            "%d %b %Y",        # 22 Aug 2018
-            "%d-%m-%Y",        # 22-08-2018
-            "%Y-%m-%d",        # 2018-08-22
-            "%m/%d/%Y",        # 08/22/2018
-            "%d/%m/%Y"         # 22/08/2018
-        ]
-        
-        for date_format in date_formats:
-            try:
-                return datetime.strptime(date_str.strip(), date_format)
-            except ValueError:
-                continue
-                
-        # If only year is provided
-        if re.match(r"^\d{4}$", date_str.strip()):
-            return datetime.strptime(date_str.strip(), "%Y")
-            
-        return None
-    except:
-        return None
-
 # Load article data
 def load_article_data(data_dir="output"):
-    """Load article data from JSON files"""
-    json_files = glob.glob(os.path.join(data_dir, "phocuswire_page_*.json"))
-    all_articles = []
-    
-    print(f"Found {len(json_files)} JSON files")
-    
-    for json_file in tqdm(json_files, desc="Loading JSON files"):
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                articles = json.load(f)
-                all_articles.extend(articles)
-        except Exception as e:
-            print(f"Error reading file {json_file}: {e}")
-    
-    print(f"Loaded {len(all_articles)} articles in total")
-    return all_articles
+    """Load article data from JSON files (through the shared corpus cache)"""
+    return load_articles(data_dir, columns=["month", "url", "content"])
 
 # Extract keywords by month
-def extract_keywords_by_month(articles):
+def extract_keywords_by_month(articles, data_dir="output"):
     """Extract keywords grouped by month"""
-    monthly_keywords = {}
+    # Tokens are cached per URL and stop-word configuration
+    token_cache = TokenCache.for_data_dir(data_dir, preprocess_text, stop_words=STOP_WORDS)
     
-    for article in tqdm(articles, desc="Processing articles"):
-        try:
-            # Parse date
-            date_str = article.get('date')
-            if not date_str:
-                continue
-                
-            date_obj = parse_date(date_str)
-            if not date_obj:
-                continue
-            
-            # Convert date to year-month format
-            year_month = date_obj.strftime("%Y-%m")
-            
-            # Preprocess article content
-            content = article.get('content', '')
-            words = preprocess_text(content)
-            
-            # Add to monthly keywords
-            if year_month not in monthly_keywords:
-                monthly_keywords[year_month] = []
-            monthly_keywords[year_month].extend(words)
-        except Exception as e:
-            print(f"Error processing article: {e}")
+    # Month x term counts, read from the cached matrix when the corpus is unchanged
+    frequencies = month_term_counts(articles, preprocess_text, token_cache, desc="Processing articles")
     
-    # Count keywords for each month
+    # Get top keywords for each month
     monthly_counts = {}
-    for month, words in monthly_keywords.items():
-        # Count word frequencies
-        word_counts = Counter(words)
-        # Get top keywords for each month
-        monthly_counts[month] = word_counts.most_common(30)  # Get more keywords as backup
+    for month in frequencies.months:
+        monthly_counts[month] = frequencies.top_k(month, 30)  # Get more keywords as backup
     
     return monthly_counts
 
@@ -173,7 +109,7 @@ data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
 articles = load_article_data(data_dir)
 
 print("Extracting keywords by month...")
-monthly_keyword_counts = extract_keywords_by_month(articles)
+monthly_keyword_counts = extract_keywords_by_month(articles, data_dir)
 
 # Sort months chronologically
 months = sorted(monthly_keyword_counts.keys())
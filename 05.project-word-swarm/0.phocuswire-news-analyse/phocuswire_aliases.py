@@ -0,0 +1,148 @@
+"""
+group_mapping（{日期: {组名: [别名, ...]}}）编译后的别名表
+
+把嵌套字典编译为 词 ID -> 组 ID 的 int32 数组（所有日期的别名展开后合并，后出现的日期
+覆盖先出现的，与原来的 reverse_mapping 相同），再加上 group_mapping 中每个日期与全局映射
+不同的少数几项（该月的别名优先于全局别名，即按日期生效的别名）。
+合并时把词频矩阵乘以由该数组构造的 0/1 矩阵（同一组的列相加），按日期生效的别名只修正所在月份的少数几项。
+
+编译结果按词表缓存在 AliasTable 对象上（词表只会在末尾追加，增量更新后只编译新增的词），
+模块级的 AliasTable 在脚本运行期间只展开一次 group_mapping。
+
+用法:
+    ALIAS_TABLE = AliasTable(group_mapping)
+    frequencies = month_term_counts(articles, preprocess, token_cache, aliases=ALIAS_TABLE)
+    frequencies.top_k("2010-06", 10)               # 已按组合并的词频
+"""
+import hashlib
+import json
+
+import numpy as np
+from scipy import sparse
+
+from phocuswire_freq import MonthTermMatrix, alias_map
+
+
+class AliasTable:
+    """
+    编译后的别名表
+
+    Args:
+        group_mapping: {"YYYY-MM": {组名: [别名, ...]}}
+    """
+
+    def __init__(self, group_mapping):
+        self.default = alias_map(group_mapping)
+        self.scoped = {}
+        for month, date_map in group_mapping.items():
+            self.scoped[month] = {alias: group for group, members in date_map.items() for alias in members}
+        payload = json.dumps(group_mapping, sort_keys=True, ensure_ascii=False)
+        self.fingerprint = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+        # 编译结果：输出列（组名或未分组的词）、全局的 词 ID -> 列 ID 数组，
+        # 以及各日期与全局不同的部分 {日期: (按 ID 排序的词 ID 数组, 列 ID 数组)}
+        self.columns = []
+        self.column_index = {}
+        self.default_ids = np.zeros(0, dtype=np.int32)
+        self.overrides = {}
+        self._term_index = {}
+        self._compiled_terms = []
+
+    def mapping_for(self, month):
+        """某个月生效的 {别名: 组名}"""
+        scoped = self.scoped.get(month)
+        return dict(self.default, **scoped) if scoped else self.default
+
+    def _column(self, name):
+        column = self.column_index.get(name)
+        if column is None:
+            column = self.column_index[name] = len(self.columns)
+            self.columns.append(name)
+        return column
+
+    def compile(self, vocab):
+        """
+        把词表编译为 词 ID -> 输出列 ID 的数组（只编译上次之后新增的词）
+
+        词表必须是上次编译时词表的扩展（MonthTermMatrix 的词表只在末尾追加），否则重新编译。
+        """
+        n_compiled = len(self._compiled_terms)
+        if vocab[:n_compiled] != self._compiled_terms:
+            self.columns, self.column_index, self._term_index = [], {}, {}
+            self.default_ids = np.zeros(0, dtype=np.int32)
+            self._compiled_terms = []
+            n_compiled = 0
+        new_terms = vocab[n_compiled:]
+        if not new_terms and n_compiled:
+            return
+        self._compiled_terms = self._compiled_terms + list(new_terms)
+
+        default = self.default
+        for term_id, term in enumerate(new_terms, n_compiled):
+            self._term_index[term] = term_id
+        new_ids = np.fromiter((self._column(default.get(term, term)) for term in new_terms),
+                              dtype=np.int32, count=len(new_terms))
+        self.default_ids = np.concatenate([self.default_ids, new_ids])
+
+        # 按日期生效的别名只涉及少数词，只记录与全局映射不同的位置
+        self.overrides = {}
+        for month, scoped in self.scoped.items():
+            pairs = sorted((self._term_index[alias], self._column(group)) for alias, group in scoped.items()
+                           if alias in self._term_index and group != default.get(alias, alias))
+            if pairs:
+                term_ids, column_ids = zip(*pairs)
+                self.overrides[month] = (np.array(term_ids, dtype=np.int64), np.array(column_ids, dtype=np.int32))
+
+    def apply(self, frequencies):
+        """
+        按别名合并词频矩阵
+
+        Args:
+            frequencies: 未合并的 MonthTermMatrix
+
+        Returns:
+            MonthTermMatrix，列为组名和未分组的词；每个月使用该月生效的别名
+        """
+        self.compile(frequencies.vocab)
+        counts = frequencies.counts
+        n_terms, n_columns = len(frequencies.vocab), len(self.columns)
+
+        # 全局映射：乘以 词 -> 列 的 0/1 矩阵，同一组的列相加
+        merge = sparse.csr_matrix(
+            (np.ones(n_terms, dtype=counts.dtype), self.default_ids[:n_terms], np.arange(n_terms + 1)),
+            shape=(n_terms, n_columns)
+        )
+        merged = counts @ merge
+
+        # 按日期生效的别名：把命中的次数从全局映射的列移到该月的列
+        rows, columns, deltas = [], [], []
+        for month, (term_ids, column_ids) in self.overrides.items():
+            row = frequencies.month_index.get(month)
+            if row is None:
+                continue
+            start, end = counts.indptr[row], counts.indptr[row + 1]
+            row_terms = counts.indices[start:end]
+            hit = np.flatnonzero(np.isin(row_terms, term_ids))
+            if not len(hit):
+                continue
+            values = counts.data[start + hit]
+            rows.append(np.full(2 * len(hit), row))
+            columns.append(np.concatenate([self.default_ids[row_terms[hit]],
+                                           column_ids[np.searchsorted(term_ids, row_terms[hit])]]))
+            deltas.append(np.concatenate([-values, values]))
+        if rows:
+            merged = merged + sparse.csr_matrix(
+                (np.concatenate(deltas), (np.concatenate(rows), np.concatenate(columns))),
+                shape=merged.shape
+            )
+        merged = merged.tocsr()
+        merged.eliminate_zeros()
+
+        # 只保留实际出现的列，顺序与编译时的输出列一致
+        used = np.flatnonzero(np.bincount(merged.indices, minlength=n_columns))
+        remap = np.full(n_columns, -1, dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        merged = sparse.csr_matrix((merged.data, remap[merged.indices], merged.indptr),
+                                   shape=(len(frequencies.months), len(used)))
+        vocab = [self.columns[column] for column in used.tolist()]
+        return MonthTermMatrix(frequencies.months, vocab, merged, frequencies.files, frequencies.keys)
@@ -0,0 +1,410 @@
+"""
+PhocusWire 文章语料的共享加载器
+
+第一次加载时把 phocuswire_page_*.json 编译为一个 Arrow IPC 文件（保存在数据目录的
+.corpus_cache/ 下），之后只根据源文件的大小和修改时间（变化时再比较内容哈希）判断是否需要重建。
+读取时使用内存映射，只有实际访问到的列才会从磁盘读入，各分析脚本无需再逐个 json.load。
+日期在编译时统一解析一次（见 phocuswire_dates），month 列为 "YYYY-MM"，无法解析时为空。
+
+用法:
+    from phocuswire_corpus import load_articles
+    articles = load_articles("output")                              # 与原来的 list[dict] 用法兼容
+    articles = load_articles("output", columns=["month", "content"]) # 只读取需要的列
+
+未安装 pyarrow 时退回到直接读取 JSON 文件。
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+
+from phocuswire_dates import DateStats, normalize_dates, report_date_stats
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+STORE_VERSION = 2
+CACHE_DIR_NAME = ".corpus_cache"
+DEFAULT_PATTERNS = ("phocuswire_page_*.json",)
+
+# 语料中保存的列；published 为解析后的发布日期，month 为 "YYYY-MM" 月份键，
+# epoch_day 为距 1970-01-01 的天数，source 为文章所在的源文件
+CORPUS_COLUMNS = ("title", "url", "date", "published", "month", "epoch_day", "page", "content", "source")
+
+_PAGE_PATTERN = re.compile(r"phocuswire_page_(\d+)\.json$")
+
+
+def corpus_schema():
+    return pa.schema([
+        ("title", pa.string()),
+        ("url", pa.string()),
+        ("date", pa.string()),
+        ("published", pa.date32()),
+        ("month", pa.string()),
+        ("epoch_day", pa.int32()),
+        ("page", pa.int32()),
+        ("content", pa.large_string()),
+        ("source", pa.string()),
+    ])
+
+
+def read_json_articles(path):
+    """读取一个 JSON 文件中的文章（支持文章列表、{"articles": [...]} 和单篇文章三种格式）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and 'articles' in data:
+        return data['articles']
+    return [data]
+
+
+def _as_text(value):
+    return value if isinstance(value, str) else None
+
+
+def _as_page(value, fallback):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return fallback
+
+
+class ArticleTable:
+    """
+    内存映射的文章表，行为与原来的 list[dict] 一致（len / 迭代 / 下标 / 切片）
+
+    迭代时按批把 Arrow 数据转换为 Python 字典，不会一次性把全部正文复制到内存中。
+    从缓存文件打开的表（以及它的切片）在传给子进程时只序列化文件路径和行范围，
+    子进程重新内存映射同一个文件，不复制文章数据。
+
+    Args:
+        table: pyarrow.Table
+        batch_size: 迭代时每批转换的行数
+        store_path: 表所在的 Arrow 缓存文件（用于跨进程传递）
+        offset: 表的第一行在缓存文件中的行号
+    """
+
+    def __init__(self, table, batch_size=1024, store_path=None, offset=0):
+        self.table = table
+        self.batch_size = batch_size
+        self.store_path = store_path
+        self.offset = offset
+
+    def __reduce__(self):
+        if self.store_path is None:
+            return ArticleTable, (self.table, self.batch_size)
+        return _open_article_slice, (self.store_path, self.table.column_names,
+                                     self.offset, len(self), self.batch_size)
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def __iter__(self):
+        for batch in self.table.to_batches(max_chunksize=self.batch_size):
+            yield from batch.to_pylist()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return ArticleTable(self.table.slice(start, max(0, stop - start)), self.batch_size,
+                                self.store_path, self.offset + start)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("文章下标越界")
+        return self.table.slice(index, 1).to_pylist()[0]
+
+    def column(self, name):
+        """按列读取（返回 pyarrow.ChunkedArray），例如只统计日期时无需触及正文"""
+        return self.table.column(name)
+
+
+def open_store_table(store_path, columns=None):
+    """以内存映射方式打开 Arrow 缓存文件（零拷贝），columns 为 None 时返回全部列"""
+    source = pa.memory_map(store_path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    return table
+
+
+def _open_article_slice(store_path, columns, offset, length, batch_size):
+    table = open_store_table(store_path, columns).slice(offset, length)
+    return ArticleTable(table, batch_size, store_path, offset)
+
+
+class CorpusStore:
+    """
+    数据目录中 JSON 页面文件对应的 Arrow 语料缓存
+
+    Args:
+        data_dir: 包含 JSON 文件的目录
+        patterns: 要收录的文件匹配模式（相对 data_dir，支持 **）
+        cache_dir: 缓存目录，默认为 data_dir/.corpus_cache
+    """
+
+    def __init__(self, data_dir, patterns=DEFAULT_PATTERNS, cache_dir=None):
+        self.data_dir = data_dir
+        self.patterns = tuple(patterns)
+        self.cache_dir = cache_dir or os.path.join(data_dir, CACHE_DIR_NAME)
+        key = hashlib.sha1("\n".join(self.patterns).encode("utf-8")).hexdigest()[:10]
+        self.store_path = os.path.join(self.cache_dir, f"corpus_{key}.arrow")
+        self.manifest_path = os.path.join(self.cache_dir, f"corpus_{key}.json")
+
+    def source_files(self):
+        """按文件名排序的源 JSON 文件列表（去重）"""
+        json_files = set()
+        for pattern in self.patterns:
+            json_files.update(glob.glob(os.path.join(self.data_dir, pattern), recursive=True))
+        return sorted(json_files)
+
+    @staticmethod
+    def file_sha1(path):
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, json_files):
+        """
+        缓存是否与源文件一致
+
+        大小和修改时间都没变的文件直接认为未变化；否则比较内容哈希，
+        只是被 touch 过的文件会更新清单中的修改时间，不触发重建。
+        """
+        manifest = self.read_manifest()
+        if (manifest is None or manifest.get("version") != STORE_VERSION
+                or not os.path.exists(self.store_path)):
+            return False
+        recorded = manifest["files"]
+        names = [os.path.relpath(path, self.data_dir) for path in json_files]
+        if set(names) != set(recorded):
+            return False
+
+        touched = False
+        for path, name in zip(json_files, names):
+            stat = os.stat(path)
+            entry = recorded[name]
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            if entry["size"] != stat.st_size or entry["sha1"] != self.file_sha1(path):
+                return False
+            entry["mtime_ns"] = stat.st_mtime_ns
+            touched = True
+        if touched:
+            self.write_manifest(manifest)
+        return True
+
+    def write_manifest(self, manifest):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def reusable_tables(self, json_files):
+        """
+        旧缓存中仍可复用的部分：{文件名: (清单条目, 该文件的文章表)}
+
+        大小和修改时间（或内容哈希）与上次编译时相同的文件直接复用已解析的行，
+        新抓取的页面文件到达时只需解析新文件。
+        """
+        manifest = self.read_manifest()
+        if (manifest is None or manifest.get("version") != STORE_VERSION
+                or not os.path.exists(self.store_path)):
+            return {}
+        try:
+            table = self.open()
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"读取旧语料缓存失败，全部重新解析: {e}")
+            return {}
+
+        runs = {}
+        sources = table.column("source").to_pylist()
+        start = 0
+        for i in range(1, len(sources) + 1):
+            if i == len(sources) or sources[i] != sources[start]:
+                runs[sources[start]] = (start, i)
+                start = i
+
+        reusable = {}
+        for path in json_files:
+            name = os.path.relpath(path, self.data_dir)
+            entry = manifest["files"].get(name)
+            if entry is None:
+                continue
+            stat = os.stat(path)
+            if entry["size"] != stat.st_size:
+                continue
+            if entry["mtime_ns"] != stat.st_mtime_ns:
+                if entry["sha1"] != self.file_sha1(path):
+                    continue
+                entry = dict(entry, mtime_ns=stat.st_mtime_ns)
+            start, end = runs.get(name, (0, 0))
+            reusable[name] = (entry, table.slice(start, end - start))
+        return reusable
+
+    def build(self, json_files):
+        """
+        把所有源文件编译为一个 Arrow IPC 文件，每个源文件写为一个记录批次
+
+        未变化的源文件直接复用旧缓存中的行，只解析新增或修改过的文件。
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        schema = corpus_schema()
+        reusable = self.reusable_tables(json_files)
+        files = {}
+        total = 0
+        parsed_files = 0
+        date_stats = DateStats()
+        tmp_path = self.store_path + ".tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+            for path in json_files:
+                name = os.path.relpath(path, self.data_dir)
+                if name in reusable:
+                    files[name], table = reusable[name]
+                    for date_str, published in zip(table.column("date").to_pylist(),
+                                                   table.column("published").to_pylist()):
+                        date_stats.add(date_str, published)
+                    for batch in table.to_batches():
+                        writer.write_batch(batch)
+                    total += table.num_rows
+                    continue
+
+                parsed_files += 1
+                stat = os.stat(path)
+                files[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                               "sha1": self.file_sha1(path)}
+                try:
+                    articles = read_json_articles(path)
+                except Exception as e:
+                    print(f"读取文件 {path} 时出错: {e}")
+                    continue
+
+                match = _PAGE_PATTERN.search(os.path.basename(path))
+                file_page = int(match.group(1)) if match else None
+                articles = [article for article in articles if isinstance(article, dict)]
+                published, months, epoch_days = normalize_dates(
+                    [a.get('date') for a in articles], date_stats)
+                columns = {
+                    "title": [_as_text(a.get('title')) for a in articles],
+                    "url": [_as_text(a.get('url')) for a in articles],
+                    "date": [_as_text(a.get('date')) for a in articles],
+                    "published": published,
+                    "month": months,
+                    "epoch_day": epoch_days,
+                    "page": [_as_page(a.get('page'), file_page) for a in articles],
+                    "content": [_as_text(a.get('content')) for a in articles],
+                    "source": [name] * len(articles),
+                }
+                writer.write_batch(pa.record_batch(
+                    [pa.array(columns[field.name], type=field.type) for field in schema],
+                    schema=schema
+                ))
+                total += len(articles)
+        # 释放对旧缓存文件的内存映射，再替换文件
+        reusable = table = None
+        os.replace(tmp_path, self.store_path)
+        print(f"解析了 {parsed_files} 个新增或修改的文件，复用 {len(json_files) - parsed_files} 个")
+        dates = date_stats.as_dict()
+        report_date_stats(dates)
+        self.write_manifest({"version": STORE_VERSION, "patterns": list(self.patterns), "files": files,
+                             "dates": dates})
+        return total
+
+    def date_report(self):
+        """打印上次编译时的日期解析统计"""
+        manifest = self.read_manifest()
+        if manifest and "dates" in manifest:
+            report_date_stats(manifest["dates"])
+
+    def open(self, columns=None):
+        """以内存映射方式打开语料（零拷贝），columns 为 None 时返回全部列"""
+        return open_store_table(self.store_path, columns)
+
+    def load(self, columns=None, rebuild=False):
+        """
+        返回 ArticleTable，必要时先（重新）编译缓存
+
+        Args:
+            columns: 只读取这些列，默认读取全部列
+            rebuild: 忽略已有缓存强制重建
+        """
+        json_files = self.source_files()
+        print(f"找到 {len(json_files)} 个JSON文件")
+        start = time.perf_counter()
+        if rebuild or not self.is_fresh(json_files):
+            print("语料缓存不存在或已过期，正在重新编译...")
+            self.build(json_files)
+        articles = ArticleTable(self.open(columns), store_path=self.store_path)
+        print(f"总共加载了 {len(articles)} 篇文章 ({time.perf_counter() - start:.2f}s)")
+        return articles
+
+
+def load_articles_uncached(data_dir, patterns=DEFAULT_PATTERNS):
+    """不使用缓存，逐个读取 JSON 文件（未安装 pyarrow 时使用）"""
+    json_files = CorpusStore(data_dir, patterns).source_files()
+    all_articles = []
+    print(f"找到 {len(json_files)} 个JSON文件")
+    for json_file in json_files:
+        try:
+            all_articles.extend(read_json_articles(json_file))
+        except Exception as e:
+            print(f"读取文件 {json_file} 时出错: {e}")
+    print(f"总共加载了 {len(all_articles)} 篇文章")
+
+    # 与缓存中的列保持一致，各脚本统一读取 month / epoch_day
+    date_stats = DateStats()
+    published, months, epoch_days = normalize_dates([a.get('date') for a in all_articles], date_stats)
+    for article, day, month, days in zip(all_articles, published, months, epoch_days):
+        article['published'] = day
+        article['month'] = month
+        article['epoch_day'] = days
+    report_date_stats(date_stats.as_dict())
+    return all_articles
+
+
+def load_articles(data_dir, patterns=DEFAULT_PATTERNS, columns=None, rebuild=False):
+    """
+    加载数据目录中的全部文章
+
+    Args:
+        data_dir: 包含 JSON 文件的目录
+        patterns: 文件匹配模式
+        columns: 只读取这些列（仅在使用缓存时生效）
+        rebuild: 强制重建缓存
+
+    Returns:
+        ArticleTable（或未安装 pyarrow 时的 list[dict]），元素为文章字典
+    """
+    if pa is None:
+        print("未安装 pyarrow，直接读取 JSON 文件（pip install pyarrow 可启用语料缓存）")
+        return load_articles_uncached(data_dir, patterns)
+    return CorpusStore(data_dir, patterns).load(columns=columns, rebuild=rebuild)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="编译 / 检查 PhocusWire 语料缓存")
+    parser.add_argument("--data-dir", type=str, default="output", help="包含JSON文件的目录 (默认: output)")
+    parser.add_argument("--rebuild", action="store_true", help="强制重建缓存")
+    args = parser.parse_args()
+
+    store = CorpusStore(args.data_dir)
+    store.load(rebuild=args.rebuild)
+    store.date_report()
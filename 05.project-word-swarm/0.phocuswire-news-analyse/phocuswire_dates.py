@@ -0,0 +1,158 @@
+"""
+PhocusWire 文章日期的统一解析
+
+按字符串形状用正则分派到对应的格式（不再逐个尝试 datetime.strptime），并对原始字符串做
+LRU 记忆化——同一天发布的文章日期字符串完全相同，绝大多数调用直接命中缓存。
+正则未覆盖的写法退回到原来的 strptime 格式列表，因此可解析的范围与原实现相同。
+
+语料编译时（phocuswire_corpus）调用一次，把规范的 "YYYY-MM" 月份键和距 1970-01-01 的天数
+与文章一起保存，各分析脚本直接读取 month 列，不再各自解析日期。
+"""
+import re
+from collections import Counter
+from datetime import date, datetime
+from functools import lru_cache
+
+# 原各脚本 parse_date 使用的日期格式的并集（正则未覆盖时按此顺序尝试）
+DATE_FORMATS = (
+    "%B %d, %Y",       # August 22, 2018
+    "%d %B %Y",        # 22 August 2018
+    "%B %Y",           # August 2018
+    "%b %d, %Y",       # Aug 22, 2018
+    "%d %b %Y",        # 22 Aug 2018
+    "%d-%m-%Y",        # 22-08-2018
+    "%Y-%m-%d",        # 2018-08-22
+    "%m/%d/%Y",        # 08/22/2018
+    "%d/%m/%Y",        # 22/08/2018
+)
+
+_MONTH_NAMES = ("january", "february", "march", "april", "may", "june", "july",
+                "august", "september", "october", "november", "december")
+_FULL_MONTHS = {name: number for number, name in enumerate(_MONTH_NAMES, 1)}
+_MONTHS = dict(_FULL_MONTHS, **{name[:3]: number for name, number in _FULL_MONTHS.items()})
+
+_NAME_DAY_YEAR = re.compile(r"([A-Za-z]+)\s+(\d{1,2}),\s+(\d{4})")   # August 22, 2018 / Aug 22, 2018
+_DAY_NAME_YEAR = re.compile(r"(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})")    # 22 August 2018 / 22 Aug 2018
+_NAME_YEAR = re.compile(r"([A-Za-z]+)\s+(\d{4})")                    # August 2018
+_ISO = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")                    # 2018-08-22
+_DAY_MONTH_YEAR = re.compile(r"(\d{1,2})-(\d{1,2})-(\d{4})")         # 22-08-2018
+_SLASHED = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")                # 08/22/2018 或 22/08/2018
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _make_date(year, month, day):
+    try:
+        return date(int(year), int(month), int(day))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_by_shape(text):
+    match = _NAME_DAY_YEAR.fullmatch(text)
+    if match:
+        return _make_date(match.group(3), _MONTHS.get(match.group(1).lower()), match.group(2))
+    match = _DAY_NAME_YEAR.fullmatch(text)
+    if match:
+        return _make_date(match.group(3), _MONTHS.get(match.group(2).lower()), match.group(1))
+    match = _ISO.fullmatch(text)
+    if match:
+        return _make_date(match.group(1), match.group(2), match.group(3))
+    match = _DAY_MONTH_YEAR.fullmatch(text)
+    if match:
+        return _make_date(match.group(3), match.group(2), match.group(1))
+    match = _SLASHED.fullmatch(text)
+    if match:
+        # 与原格式列表的顺序一致：先按 月/日/年，月份不合法时再按 日/月/年
+        first, second, year = match.groups()
+        return _make_date(year, first, second) or _make_date(year, second, first)
+    match = _NAME_YEAR.fullmatch(text)
+    if match:
+        # 原格式列表只有 "%B %Y"（月份全称），"Aug 2018" 这类写法不解析
+        return _make_date(match.group(2), _FULL_MONTHS.get(match.group(1).lower()), 1)
+    return None
+
+
+@lru_cache(maxsize=1 << 16)
+def _parse_cached(text):
+    parsed = _parse_by_shape(text)
+    if parsed is not None:
+        return parsed
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_article_date(date_str):
+    """把文章的日期字符串解析为 date，缺失或无法解析时返回 None"""
+    if not isinstance(date_str, str):
+        return None
+    return _parse_cached(date_str.strip())
+
+
+def month_key(day):
+    """date -> 规范的 "YYYY-MM" 月份键"""
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def epoch_day(day):
+    """date -> 距 1970-01-01 的天数"""
+    return day.toordinal() - _EPOCH
+
+
+class DateStats:
+    """统计日期解析结果：已解析 / 缺失 / 无法解析（保留最常见的无法解析的写法）"""
+
+    def __init__(self):
+        self.parsed = 0
+        self.missing = 0
+        self.unparseable = Counter()
+
+    def add(self, date_str, parsed):
+        if parsed is not None:
+            self.parsed += 1
+        elif not isinstance(date_str, str) or not date_str.strip():
+            self.missing += 1
+        else:
+            self.unparseable[date_str.strip()] += 1
+
+    def as_dict(self, n_examples=10):
+        return {
+            "parsed": self.parsed,
+            "missing": self.missing,
+            "unparseable": sum(self.unparseable.values()),
+            "examples": self.unparseable.most_common(n_examples),
+        }
+
+
+def report_date_stats(stats):
+    """打印 DateStats.as_dict() 的结果"""
+    print(f"日期解析: {stats['parsed']} 篇成功, {stats['missing']} 篇缺失日期, "
+          f"{stats['unparseable']} 篇无法解析")
+    for text, count in stats["examples"]:
+        print(f"  无法解析: {text!r} ({count} 篇)")
+
+
+def normalize_dates(date_strs, stats=None):
+    """
+    批量规范化日期
+
+    Args:
+        date_strs: 原始日期字符串序列
+        stats: 可选的 DateStats，累计解析结果
+
+    Returns:
+        (published, months, epoch_days) 三个与输入等长的列表，无法解析的位置为 None
+    """
+    published, months, epoch_days = [], [], []
+    for date_str in date_strs:
+        parsed = parse_article_date(date_str)
+        if stats is not None:
+            stats.add(date_str, parsed)
+        published.append(parsed)
+        months.append(month_key(parsed) if parsed is not None else None)
+        epoch_days.append(epoch_day(parsed) if parsed is not None else None)
+    return published, months, epoch_days
@@ -0,0 +1,303 @@
+"""
+PhocusWire 抓取器的异步 HTTP 引擎
+
+所有请求共用一个带连接池的 aiohttp.ClientSession，由全局令牌桶控制总请求速率
+（取代每个线程里 time.sleep(random.uniform(...)) 的做法），并按主机限制同时进行的请求数。
+失败的请求（连接错误、超时、429 / 5xx）按指数退避重试。
+
+FixtureSite 是本地的替身站点：按 PhocusWire 的页面结构生成列表页和文章页 HTML，
+可以模拟网络延迟，用于离线测试抓取器和测量吞吐量。
+
+用法:
+    async with AsyncFetcher(headers, rate=5, per_host=4) as fetcher:
+        html = await fetcher.fetch_text(url)
+
+基准测试（本地替身站点上对比线程引擎和异步引擎）:
+    python phocuswire_fetch.py --pages 5 --articles-per-page 20 --latency 0.05
+"""
+import asyncio
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+# 需要重试的 HTTP 状态码（限流和服务端错误），其余错误状态直接放弃
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    令牌桶限速器：平均每秒 rate 个请求，最多允许 burst 个请求的突发
+
+    Args:
+        rate: 每秒补充的令牌数，<= 0 表示不限速
+        burst: 桶容量
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取一个令牌，桶空时等待（等待者按先来后到排队）"""
+        if not self.rate or self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFetcher:
+    """
+    共享连接池的异步 HTTP 客户端（async with 中使用）
+
+    Args:
+        headers: 每个请求携带的请求头
+        rate: 全局请求速率（次/秒），<= 0 表示不限速
+        burst: 令牌桶容量
+        per_host: 每个主机同时进行的请求数
+        max_connections: 连接池的总连接数
+        timeout: 单个请求的超时（秒）
+        retries: 失败后的重试次数
+        backoff: 第一次重试前的等待时间（秒），之后每次翻倍
+    """
+
+    def __init__(self, headers=None, rate=5.0, burst=5, per_host=4, max_connections=16,
+                 timeout=10, retries=2, backoff=1.0):
+        self.headers = dict(headers or {})
+        self.bucket = TokenBucket(rate, burst)
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = None
+        self.host_slots = {}
+        self.stats = {"requests": 0, "failures": 0, "retries": 0, "bytes": 0}
+        self.started = None
+
+    async def __aenter__(self):
+        if aiohttp is None:
+            raise ImportError("异步抓取引擎需要 aiohttp: pip install aiohttp")
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(headers=self.headers, connector=connector,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self.started = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    def host_slot(self, url):
+        host = urlsplit(url).netloc
+        slot = self.host_slots.get(host)
+        if slot is None:
+            slot = self.host_slots[host] = asyncio.Semaphore(self.per_host)
+        return slot
+
+    async def fetch_text(self, url):
+        """GET 请求并返回响应文本，最终失败时记录日志并返回 None"""
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            async with self.host_slot(url):
+                await self.bucket.acquire()
+                self.stats["requests"] += 1
+                try:
+                    async with self.session.get(url) as response:
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            body = await response.read()
+                            self.stats["bytes"] += len(body)
+                            return await response.text(errors="replace")
+                        error = f"HTTP {response.status}"
+                except aiohttp.ClientResponseError as e:
+                    error = e
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = repr(e)
+        self.stats["failures"] += 1
+        logger.error(f"Error fetching {url}: {error}")
+        return None
+
+    def report(self):
+        """打印请求数、失败数、流量和吞吐量"""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        rate = self.stats["requests"] / elapsed if elapsed > 0 else 0.0
+        logger.info(f"HTTP: {self.stats['requests']} 个请求 ({self.stats['retries']} 次重试, "
+                    f"{self.stats['failures']} 个失败), {self.stats['bytes'] / 1e6:.1f} MB, "
+                    f"用时 {elapsed:.2f}s ({rate:.1f} 请求/秒)")
+
+
+class FixtureSite:
+    """
+    本地的 PhocusWire 替身站点（with 中使用），在后台线程里运行 HTTP 服务
+
+    /Latest-News?pg=N 返回第 N 页的文章列表（超过 pages 的页为空列表），
+    /news/<页>-<序号> 返回文章正文页。结构与抓取器解析的选择器一致：
+    .list-view .item 中的链接、.title、.author（"By 作者 | 日期"），文章页的 div[itemprop=articleBody]。
+
+    Args:
+        pages: 有文章的列表页数
+        articles_per_page: 每页的文章数
+        latency: 每个响应前的延迟（秒），模拟网络往返
+        paragraphs: 每篇文章的段落数
+    """
+
+    MONTHS = ("January", "February", "March", "April", "May", "June", "July",
+              "August", "September", "October", "November", "December")
+
+    def __init__(self, pages=10, articles_per_page=20, latency=0.0, paragraphs=5):
+        self.pages = pages
+        self.articles_per_page = articles_per_page
+        self.latency = latency
+        self.paragraphs = paragraphs
+        self.requests = 0
+        self.server = None
+        self.thread = None
+        self.base_url = None
+
+    def article_date(self, page, index):
+        # 越靠后的页越早，与真实站点按时间倒序分页一致
+        serial = (page - 1) * self.articles_per_page + index
+        month = 11 - (serial // 28) % 12
+        return f"{self.MONTHS[month]} {28 - serial % 28}, {2020 - serial // (28 * 12)}"
+
+    def listing_html(self, page):
+        items = []
+        if 1 <= page <= self.pages:
+            for index in range(self.articles_per_page):
+                items.append(
+                    f'<div class="item"><a href="/news/{page}-{index}">'
+                    f'<div class="title">Fixture article {page}-{index}</div></a>'
+                    f'<div class="author">By Fixture Writer | {self.article_date(page, index)}</div></div>'
+                )
+        return f'<html><body><div class="list-view">{"".join(items)}</div></body></html>'
+
+    def article_html(self, page, index):
+        paragraphs = "".join(
+            f"<p>Paragraph {k} of fixture article {page}-{index}: travel booking hotel airline "
+            f"distribution mobile payments data.</p>"
+            for k in range(self.paragraphs)
+        )
+        return (f'<html><body><h1>Fixture article {page}-{index}</h1>'
+                f'<div itemprop="articleBody">{paragraphs}</div></body></html>')
+
+    def respond(self, path):
+        """路径 -> (状态码, HTML)"""
+        parts = urlsplit(path)
+        if parts.path == "/Latest-News":
+            try:
+                page = int(parse_qs(parts.query).get("pg", ["1"])[0])
+            except ValueError:
+                return 400, "bad page"
+            return 200, self.listing_html(page)
+        if parts.path.startswith("/news/"):
+            try:
+                page, index = (int(value) for value in parts.path[len("/news/"):].split("-"))
+            except ValueError:
+                return 404, "not found"
+            if 1 <= page <= self.pages and 0 <= index < self.articles_per_page:
+                return 200, self.article_html(page, index)
+        return 404, "not found"
+
+    def __enter__(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                status, html = site.respond(self.path)
+                body = html.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+def benchmark(pages=5, articles_per_page=20, latency=0.05, max_workers=8, rate=50.0, engines=("threads", "async")):
+    """在本地替身站点上运行抓取器，比较各引擎的耗时并校验抓到的文章一致"""
+    import json
+    import os
+    import tempfile
+
+    from scrape_phocuswire import PhocusWireScraper
+
+    results = {}
+    with FixtureSite(pages, articles_per_page, latency) as site:
+        print(f"替身站点 {site.base_url}: {pages} 页 x {articles_per_page} 篇, 延迟 {latency * 1000:.0f}ms")
+        for engine in engines:
+            with tempfile.TemporaryDirectory() as output_dir:
+                scraper = PhocusWireScraper(
+                    start_page=1, end_page=pages, output_dir=output_dir, max_workers=max_workers,
+                    delay_min=0.0, delay_max=0.0, page_delay=(0.0, 0.0), base_url=site.base_url,
+                    engine=engine, rate=rate,
+                )
+                site.requests = 0
+                start = time.perf_counter()
+                scraper.run()
+                elapsed = time.perf_counter() - start
+                with open(os.path.join(output_dir, "phocuswire_all_articles.json"), 'r', encoding='utf-8') as f:
+                    articles = json.load(f)
+            results[engine] = sorted((article["url"], article["content"]) for article in articles)
+            print(f"  {engine:<8} {elapsed:7.2f}s  {site.requests} 个请求  "
+                  f"{site.requests / max(elapsed, 1e-9):6.1f} 请求/秒  {len(articles)} 篇文章")
+    same = all(result == results[engines[0]] for result in results.values())
+    print(f"  结果{'一致' if same else '不一致'}")
+    return same
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="在本地替身站点上测量抓取吞吐量")
+    parser.add_argument("--pages", type=int, default=5, help="列表页数 (默认: 5)")
+    parser.add_argument("--articles-per-page", type=int, default=20, help="每页文章数 (默认: 20)")
+    parser.add_argument("--latency", type=float, default=0.05, help="每个响应的模拟延迟，秒 (默认: 0.05)")
+    parser.add_argument("--workers", type=int, default=8, help="线程数 / 每个主机的并发请求数 (默认: 8)")
+    parser.add_argument("--rate", type=float, default=50.0, help="异步引擎的全局请求速率，次/秒 (默认: 50)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    benchmark(args.pages, args.articles_per_page, args.latency, args.workers, args.rate)
@@ -0,0 +1,498 @@
+"""
+月份 × 词 的稀疏词频矩阵：各分析脚本共享的词频结果
+
+按月统计的词频保存为 scipy.sparse CSR 矩阵（行 = 月份，列 = 词表中的词）和词表，
+写入数据目录 .corpus_cache/ 下的 freq_<预处理指纹>.npz。语料源文件和预处理配置都未变化时
+直接读取矩阵，完全跳过分词和计数；各脚本通过 top_k / series / grouped 查询，不再各自重新计数。
+
+矩阵同时记录统计时的源文件和已统计的文章（URL + 正文 sha1 + 月份）。抓取到新的页面文件后，只要已统计的文章
+都还在语料中，就只对未统计过的文章分词，并把增量加到已有的矩阵上；有文章被删除、正文或日期被修改时
+（标识不再出现在语料中）完整重新统计。
+同一篇文章（URL、正文和月份都相同）只统计一次（页面翻动时同一篇文章可能出现在两个页面文件中）。
+
+每一行中各词按该月首次出现的顺序存放（CSR 的列下标不排序），
+因此 month_counts / top_k 的结果（包括并列词的先后顺序）与原来按 dict / Counter 计数时一致。
+
+用法:
+    frequencies = month_term_counts(articles, self.preprocess_text, token_cache)
+    frequencies.top_k("2020-03", 15)               # [(词, 次数), ...]
+    frequencies.top_terms(50, aliases)             # 各月前 50 个词（按别名合并后）的集合
+    frequencies.series(["travel", "hotel"])        # 月份 × 词 的稠密数组
+
+前 k 个词用 np.partition 在稀疏行上选出（O(n)），只对选中的 k 个词排序，不再对整个词表排序。
+基准测试（大词表上与 sorted / heapq.nlargest 对比并校验结果一致）:
+    python phocuswire_freq.py --vocab-size 200000 --months 120 --k 50
+"""
+import json
+import os
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from phocuswire_corpus import open_store_table
+from phocuswire_pipeline import count_by_month
+from phocuswire_tokens import content_digest
+
+FREQ_VERSION = 3
+
+
+def top_indices(values, k):
+    """
+    values 中最大的 k 个元素的下标，按值从大到小、并列时按下标从小到大
+
+    先用 np.partition 找到第 k 大的值，只对大于它的元素和最前面的若干个并列元素排序，
+    结果与对整个数组做稳定排序后取前 k 个完全相同。
+    """
+    n = len(values)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        kth = np.partition(values, n - k)[n - k]
+        greater = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[:k - len(greater)]
+        candidates = np.sort(np.concatenate([greater, ties]))
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+
+def alias_map(group_mapping):
+    """把 {日期: {组名: [别名, ...]}} 展开为 {别名: 组名}（后出现的日期覆盖先出现的）"""
+    aliases = {}
+    for date_map in group_mapping.values():
+        for group, members in date_map.items():
+            for alias in members:
+                aliases[alias] = group
+    return aliases
+
+
+class MonthTermMatrix:
+    """
+    月份 × 词 的词频矩阵
+
+    Args:
+        months: 按时间排序的 "YYYY-MM" 列表（矩阵的行）
+        vocab: 词表（矩阵的列）
+        counts: scipy.sparse.csr_matrix，形状为 (len(months), len(vocab))
+        files: 统计时语料的源文件 {文件名: sha1}，用于判断缓存是否过期
+        keys: 已统计的文章（见 article_keys），用于增量更新
+    """
+
+    def __init__(self, months, vocab, counts, files=None, keys=()):
+        self.months = list(months)
+        self.vocab = list(vocab)
+        self.counts = counts
+        self.files = files
+        self.keys = set(keys)
+        self.month_index = {month: i for i, month in enumerate(self.months)}
+        self.term_index = {term: i for i, term in enumerate(self.vocab)}
+
+    @classmethod
+    def from_month_counters(cls, by_month, total=None, files=None, keys=()):
+        """
+        由 {"YYYY-MM": Counter} 构建矩阵
+
+        Args:
+            by_month: 每个月的词频
+            total: 全部文章的 Counter（可选），词表按其中词的顺序（即首次出现的顺序）排列
+            files: 语料的源文件
+            keys: 已统计的文章
+        """
+        vocab = list(total) if total is not None else []
+        term_index = {term: i for i, term in enumerate(vocab)}
+        months = sorted(by_month)
+
+        indptr = [0]
+        indices = []
+        data = []
+        for month in months:
+            for term, count in by_month[month].items():
+                term_id = term_index.get(term)
+                if term_id is None:
+                    term_id = term_index[term] = len(vocab)
+                    vocab.append(term)
+                indices.append(term_id)
+                data.append(count)
+            indptr.append(len(indices))
+
+        counts = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.int64), np.asarray(indices, dtype=np.int32),
+             np.asarray(indptr, dtype=np.int64)),
+            shape=(len(months), len(vocab))
+        )
+        return cls(months, vocab, counts, files, keys)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(str(archive["meta"]))
+            if meta.get("version") != FREQ_VERSION:
+                raise ValueError(f"词频矩阵版本不匹配: {meta.get('version')}")
+            counts = sparse.csr_matrix(
+                (archive["data"], archive["indices"], archive["indptr"]),
+                shape=tuple(meta["shape"])
+            )
+            return cls(archive["months"].tolist(), archive["vocab"].tolist(), counts,
+                       meta.get("files"), archive["keys"].tolist())
+
+    def save(self, path):
+        """写入 .npz（先写临时文件再原子替换）"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = {"version": FREQ_VERSION, "shape": list(self.counts.shape), "files": self.files}
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            data=self.counts.data, indices=self.counts.indices, indptr=self.counts.indptr,
+            months=np.array(self.months, dtype=str), vocab=np.array(self.vocab, dtype=str),
+            keys=np.array(sorted(self.keys), dtype=str),
+            meta=np.array(json.dumps(meta, ensure_ascii=False)),
+        )
+        os.replace(tmp_path, path)
+
+    def add_counts(self, by_month, total=None):
+        """
+        把新文章的 {"YYYY-MM": Counter} 累加到矩阵中（原地更新）
+
+        没有新文章的月份直接复用原来的行；有新文章的月份中，原有的词保持原来的顺序，
+        新出现的词按首次出现的顺序排在后面，新词追加到词表末尾。
+
+        Args:
+            by_month: 新文章每个月的词频
+            total: 新文章的 Counter（可选），新词按其中的顺序加入词表
+        """
+        vocab, term_index = self.vocab, self.term_index
+        for term in (total or ()):
+            if term not in term_index:
+                term_index[term] = len(vocab)
+                vocab.append(term)
+
+        months = sorted(set(self.months) | set(by_month))
+        indices, data, row_sizes = [], [], []
+        for month in months:
+            term_ids, values = self.month_row(month)
+            delta = by_month.get(month)
+            if delta:
+                merged = dict(zip(term_ids.tolist(), values.tolist()))
+                for term, count in delta.items():
+                    term_id = term_index.get(term)
+                    if term_id is None:
+                        term_id = term_index[term] = len(vocab)
+                        vocab.append(term)
+                    merged[term_id] = merged.get(term_id, 0) + count
+                term_ids = np.fromiter(merged.keys(), dtype=np.int32, count=len(merged))
+                values = np.fromiter(merged.values(), dtype=np.int64, count=len(merged))
+            indices.append(term_ids)
+            data.append(values)
+            row_sizes.append(len(term_ids))
+
+        indptr = np.zeros(len(months) + 1, dtype=np.int64)
+        np.cumsum(row_sizes, out=indptr[1:])
+        self.counts = sparse.csr_matrix(
+            (np.concatenate(data) if data else np.zeros(0, dtype=np.int64),
+             np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32), indptr),
+            shape=(len(months), len(vocab))
+        )
+        self.months = months
+        self.month_index = {month: i for i, month in enumerate(months)}
+
+    def month_row(self, month):
+        """某个月的 (词 ID 数组, 次数数组)，按该月首次出现的顺序；月份不存在时为空"""
+        row = self.month_index.get(month)
+        if row is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+        start, end = self.counts.indptr[row], self.counts.indptr[row + 1]
+        return self.counts.indices[start:end], self.counts.data[start:end]
+
+    def month_counts(self, month):
+        """某个月的 {词: 次数}"""
+        term_ids, values = self.month_row(month)
+        vocab = self.vocab
+        return {vocab[term_id]: count for term_id, count in zip(term_ids.tolist(), values.tolist())}
+
+    def to_dict(self):
+        """{"YYYY-MM": {词: 次数}}，与原来的 word_freq_by_date 结构相同"""
+        return {month: self.month_counts(month) for month in self.months}
+
+    def top_k(self, month, k):
+        """某个月词频最高的 k 个词 [(词, 次数), ...]，并列时按该月首次出现的顺序"""
+        term_ids, values = self.month_row(month)
+        return [(self.vocab[term_ids[i]], int(values[i])) for i in top_indices(values, k)]
+
+    def top_terms(self, k, aliases=None, months=None):
+        """
+        各月前 k 个词的并集
+
+        Args:
+            k: 每个月取前 k 个词
+            aliases: 可选的 {别名: 组名}（见 alias_map），选出的词换成其所属的组名
+            months: 只考虑这些月份，默认全部月份
+
+        Returns:
+            set
+        """
+        aliases = aliases or {}
+        selected = set()
+        for month in (self.months if months is None else months):
+            term_ids, values = self.month_row(month)
+            for i in top_indices(values, k):
+                term = self.vocab[term_ids[i]]
+                selected.add(aliases.get(term, term))
+        return selected
+
+    def top_total(self, k):
+        """全部月份合计的前 k 个词 [(词, 次数), ...]，与 totals().most_common(k) 相同"""
+        sums = np.asarray(self.counts.sum(axis=0)).ravel()
+        return [(self.vocab[i], int(sums[i])) for i in top_indices(sums, k)]
+
+    def series(self, terms):
+        """
+        词的逐月词频
+
+        Args:
+            terms: 单个词或词列表（不在词表中的词全为 0）
+
+        Returns:
+            单个词时为长度 len(months) 的数组，否则为 (len(months), len(terms)) 的数组
+        """
+        single = isinstance(terms, str)
+        term_list = [terms] if single else list(terms)
+        columns = np.array([self.term_index.get(term, -1) for term in term_list], dtype=np.int64)
+        result = np.zeros((len(self.months), len(term_list)), dtype=np.int64)
+        known = columns >= 0
+        if known.any():
+            result[:, known] = self.counts[:, columns[known]].toarray()
+        return result[:, 0] if single else result
+
+    def totals(self):
+        """全部月份合计的 Counter，按词表顺序"""
+        sums = np.asarray(self.counts.sum(axis=0)).ravel()
+        return Counter(dict(zip(self.vocab, sums.tolist())))
+
+    def month_maxima(self, empty=1):
+        """每个月的最高词频（没有任何词的月份为 empty），用于尺寸归一化"""
+        maxima = np.full(len(self.months), empty, dtype=np.float64)
+        indptr = self.counts.indptr
+        nonempty = np.flatnonzero(np.diff(indptr) > 0)
+        if len(nonempty):
+            maxima[nonempty] = np.maximum.reduceat(self.counts.data, indptr[nonempty])
+        return maxima
+
+    def grouped(self, groups):
+        """
+        把别名合并为组，返回新的矩阵
+
+        Args:
+            groups: {组名: [别名, ...]}；不属于任何组的词保持不变
+
+        Returns:
+            MonthTermMatrix，列为组名和其余未分组的词
+        """
+        column_of = {}
+        vocab = []
+        for group, aliases in groups.items():
+            column_of[group] = len(vocab)
+            vocab.append(group)
+            for alias in aliases:
+                column_of.setdefault(alias, column_of[group])
+        mapping = np.empty(len(self.vocab), dtype=np.int64)
+        for term_id, term in enumerate(self.vocab):
+            column = column_of.get(term)
+            if column is None:
+                column = column_of[term] = len(vocab)
+                vocab.append(term)
+            mapping[term_id] = column
+
+        # 行列式的 0/1 矩阵乘法把同组的列相加
+        merge = sparse.csr_matrix(
+            (np.ones(len(self.vocab), dtype=np.int64), mapping, np.arange(len(self.vocab) + 1)),
+            shape=(len(self.vocab), len(vocab))
+        )
+        return MonthTermMatrix(self.months, vocab, (self.counts @ merge).tocsr(), self.files, self.keys)
+
+
+def corpus_files(articles):
+    """
+    语料的源文件及其内容哈希 {文件名: sha1}（来自语料缓存清单）
+
+    未使用语料缓存（list[dict]）时返回 None，此时词频矩阵不落盘。
+    """
+    store_path = getattr(articles, "store_path", None)
+    if store_path is None:
+        return None
+    manifest_path = os.path.splitext(store_path)[0] + ".json"
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            files = json.load(f)["files"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return {name: entry["sha1"] for name, entry in files.items()}
+
+
+def article_keys(articles, files=None):
+    """
+    每篇文章的标识，用于记录哪些文章已经统计过
+
+    有 URL 的文章以 "URL@正文sha1#月份" 为标识，正文或日期修改后标识随之变化；
+    没有 URL 的文章以 "源文件#序号@文件哈希" 为标识，源文件内容变化后标识随之变化。
+    list[dict] 中没有 URL 的文章标识为 None（总是统计）。
+    """
+    if hasattr(articles, "table"):
+        columns = ["url", "source", "content", "month"]
+        table = articles.table
+        if not set(columns) <= set(table.column_names):
+            # 调用方只读取了部分列时，从同一个缓存文件中补读这几列（内存映射）
+            table = open_store_table(articles.store_path, columns).slice(articles.offset, len(articles))
+        rows = (row for batch in table.select(columns).to_batches(max_chunksize=articles.batch_size)
+                for row in zip(*(batch.column(column).to_pylist() for column in columns)))
+    else:
+        rows = ((article.get('url'), article.get('source'), article.get('content'), article.get('month'))
+                for article in articles)
+
+    keys = []
+    position = Counter()
+    for url, source, content, month in rows:
+        if url:
+            keys.append(f"{url}@{content_digest(content)}#{month}")
+        elif source is not None and files is not None:
+            keys.append(f"{source}#{position[source]}@{files.get(source)}")
+        else:
+            keys.append(None)
+        position[source] += 1
+    return keys
+
+
+def unseen_mask(keys, seen=()):
+    """需要统计的文章：标识不在 seen 中、且是该标识第一次出现（None 总是统计）"""
+    seen = set(seen)
+    keep = np.zeros(len(keys), dtype=bool)
+    for i, key in enumerate(keys):
+        if key is None:
+            keep[i] = True
+        elif key not in seen:
+            seen.add(key)
+            keep[i] = True
+    return keep
+
+
+def frequency_path(token_cache):
+    """词频矩阵的路径：与分词缓存同目录、同预处理指纹"""
+    return os.path.join(token_cache.cache_dir, f"freq_{token_cache.fingerprint}.npz")
+
+
+def month_term_counts(articles, preprocess, token_cache, workers=1, rebuild=False, aliases=None,
+                      desc="处理文章"):
+    """
+    读取、增量更新或重新统计月份 × 词 的词频矩阵
+
+    源文件与缓存一致时直接读取 .npz；已统计的文章都还在语料中时只统计新文章并累加；
+    否则调用 count_by_month 完整统计（可多进程）。新分词的文章写回分词缓存。
+
+    Args:
+        articles: ArticleTable 或 list[dict]
+        preprocess: 预处理函数
+        token_cache: TokenCache（决定缓存目录和预处理指纹）
+        workers: 统计时的进程数
+        rebuild: 忽略已有的词频矩阵，完整重新统计
+        aliases: 可选的 AliasTable（见 phocuswire_aliases），返回按别名合并后的矩阵；
+            磁盘上保存的始终是未合并的矩阵，修改 group_mapping 后不需要重新统计
+        desc: 进度条描述
+    """
+    frequencies = _load_or_count(articles, preprocess, token_cache, workers, rebuild, desc)
+    if aliases is not None:
+        frequencies = aliases.apply(frequencies)
+    return frequencies
+
+
+def _load_or_count(articles, preprocess, token_cache, workers, rebuild, desc):
+    path = frequency_path(token_cache)
+    files = corpus_files(articles)
+    frequencies = None
+    if files is not None and not rebuild and os.path.exists(path):
+        try:
+            frequencies = MonthTermMatrix.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"读取词频矩阵失败，重新统计: {e}")
+        else:
+            if frequencies.files == files:
+                print(f"使用已缓存的词频矩阵: {len(frequencies.months)} 个月, {len(frequencies.vocab)} 个词")
+                return frequencies
+
+    keys = article_keys(articles, files)
+    if frequencies is not None:
+        current = set(keys)
+        if all(key in current for key in frequencies.keys):
+            keep = unseen_mask(keys, frequencies.keys)
+            n_new = int(keep.sum())
+            print(f"增量更新词频矩阵: {n_new} 篇新文章, 跳过 {len(keys) - n_new} 篇已统计的文章")
+            if n_new:
+                by_month, total = count_by_month(articles, preprocess, token_cache=token_cache,
+                                                 workers=workers, keep=keep, desc=desc)
+                token_cache.save()
+                token_cache.report()
+                frequencies.add_counts(by_month, total)
+                frequencies.keys.update(key for key, selected in zip(keys, keep) if selected and key is not None)
+            frequencies.files = files
+            frequencies.save(path)
+            return frequencies
+        print("有已统计的文章被删除或修改，重新统计词频矩阵")
+
+    keep = unseen_mask(keys)
+    by_month, total = count_by_month(articles, preprocess, token_cache=token_cache, workers=workers,
+                                     keep=None if keep.all() else keep, desc=desc)
+    token_cache.save()
+    token_cache.report()
+    frequencies = MonthTermMatrix.from_month_counters(
+        by_month, total, files, (key for key, selected in zip(keys, keep) if selected and key is not None))
+    if files is not None:
+        frequencies.save(path)
+    return frequencies
+
+
+def benchmark(vocab_size=200000, n_months=120, terms_per_month=50000, k=50, seed=0):
+    """在随机生成的大词表（Zipf 分布词频）上对比各种取前 k 个词的方法，并校验结果一致"""
+    import heapq
+    import time
+
+    rng = np.random.default_rng(seed)
+    by_month = {}
+    for m in range(n_months):
+        term_ids = rng.choice(vocab_size, size=min(terms_per_month, vocab_size), replace=False)
+        counts = rng.zipf(1.5, size=len(term_ids)).clip(max=10 ** 6)
+        by_month[f"{2000 + m // 12:04d}-{m % 12 + 1:02d}"] = dict(
+            zip((f"w{i}" for i in term_ids.tolist()), counts.tolist()))
+    frequencies = MonthTermMatrix.from_month_counters(by_month)
+    months = frequencies.months
+    n_entries = frequencies.counts.nnz
+
+    def run(name, top):
+        start = time.perf_counter()
+        result = {month: top(month) for month in months}
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<28} {elapsed:7.3f}s  {n_entries / max(elapsed, 1e-9) / 1e6:7.1f} M项/秒")
+        return result, elapsed
+
+    print(f"{n_months} 个月, 词表 {len(frequencies.vocab)} 个词, {n_entries} 个非零项, k = {k}")
+    expected, sort_seconds = run("sorted(dict.items())",
+                                 lambda month: sorted(by_month[month].items(), key=lambda x: x[1],
+                                                      reverse=True)[:k])
+    heap, _ = run("heapq.nlargest",
+                  lambda month: heapq.nlargest(k, by_month[month].items(), key=lambda x: x[1]))
+    actual, top_seconds = run("MonthTermMatrix.top_k", lambda month: frequencies.top_k(month, k))
+    same = actual == expected and heap == expected
+    print(f"  加速比 (相对 sorted): {sort_seconds / max(top_seconds, 1e-9):.2f}x, "
+          f"结果{'一致' if same else '不一致'}")
+    return same
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="词频矩阵前 k 个词的基准测试")
+    parser.add_argument("--vocab-size", type=int, default=200000, help="词表大小 (默认: 200000)")
+    parser.add_argument("--months", type=int, default=120, help="月份数 (默认: 120)")
+    parser.add_argument("--terms-per-month", type=int, default=50000, help="每个月出现的词数 (默认: 50000)")
+    parser.add_argument("--k", type=int, default=50, help="每个月取前k个词 (默认: 50)")
+    args = parser.parse_args()
+
+    benchmark(args.vocab_size, args.months, args.terms_per_month, args.k)
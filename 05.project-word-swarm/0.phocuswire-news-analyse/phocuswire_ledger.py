@@ -0,0 +1,172 @@
+"""
+PhocusWire 抓取器的断点续传记录（SQLite）
+
+在输出目录下的 .scrape_ledger.sqlite 中记录：
+    pages     已完成的列表页（页码、文章数、完成时间）
+    articles  抓取过的文章 URL（所在页、状态 ok / failed、正文的 sha1、抓取时间）
+
+每页的文章记录先暂存在内存中，在该页的 JSON 文件写入后与页面完成标记在同一个事务中提交；
+中断（包括 Ctrl-C）时未提交的记录直接丢弃，重新运行时这些文章会重新抓取。
+有文章失败的页不标记为完成，下次运行时重新访问该页，只请求失败的（和新出现的）URL，
+已成功抓取的 URL（包括之前页面文件中已保存的）不再请求。
+第一次使用时从输出目录中已有的 phocuswire_page_*.json 导入记录。
+
+用法:
+    ledger = ScrapeLedger.for_output_dir(output_dir)
+    if not ledger.page_done(page_num): ...
+    ledger.record_article(url, page_num, content)
+    ledger.finish_page(page_num, n_articles)
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+LEDGER_NAME = ".scrape_ledger.sqlite"
+
+_PAGE_PATTERN = re.compile(r"phocuswire_page_(\d+)\.json$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page INTEGER PRIMARY KEY,
+    articles INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    page INTEGER,
+    status TEXT NOT NULL,
+    sha1 TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def content_sha1(content):
+    return hashlib.sha1(content.encode("utf-8")).hexdigest() if content else None
+
+
+class ScrapeLedger:
+    """
+    抓取记录（可在多个线程中使用）
+
+    Args:
+        path: SQLite 文件路径
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.staged = {}  # 页码 -> [(url, 状态, sha1, 抓取时间)]，随 finish_page 一起提交
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(_SCHEMA)
+        self.connection.commit()
+
+    @classmethod
+    def for_output_dir(cls, output_dir):
+        """打开输出目录中的记录；新建时导入已有的页面文件"""
+        ledger = cls(os.path.join(output_dir, LEDGER_NAME))
+        if ledger.is_empty():
+            ledger.import_page_files(output_dir)
+        return ledger
+
+    def is_empty(self):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT (SELECT COUNT(*) FROM pages) + (SELECT COUNT(*) FROM articles)").fetchone()
+        return row[0] == 0
+
+    def import_page_files(self, output_dir):
+        """把输出目录中已有的 phocuswire_page_N.json 记为已完成的页和已抓取的文章"""
+        imported = 0
+        for path in glob.glob(os.path.join(output_dir, "phocuswire_page_*.json")):
+            match = _PAGE_PATTERN.search(os.path.basename(path))
+            if not match:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    articles = json.load(f)
+            except (OSError, ValueError):
+                continue
+            page = int(match.group(1))
+            finished_at = os.path.getmtime(path)
+            for article in articles:
+                if isinstance(article, dict) and article.get("url"):
+                    self.record_article(article["url"], page, article.get("content"), fetched_at=finished_at)
+            self.finish_page(page, len(articles), finished_at=finished_at)
+            imported += 1
+        return imported
+
+    def page_done(self, page):
+        """页面是否已完成（有完成标记且该页没有失败的文章）"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM pages WHERE page = ? AND NOT EXISTS "
+                "(SELECT 1 FROM articles WHERE articles.page = pages.page AND status = 'failed')",
+                (page,)).fetchone()
+        return row is not None
+
+    def is_known(self, url):
+        """URL 是否已成功抓取过"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM articles WHERE url = ? AND status = 'ok'", (url,)).fetchone()
+        return row is not None
+
+    def record_article(self, url, page, content, fetched_at=None):
+        """暂存一篇文章的抓取结果（content 为空时记为 failed），该页的文件写入后由 finish_page 提交"""
+        status = "ok" if content else "failed"
+        with self.lock:
+            self.staged.setdefault(page, []).append(
+                (url, page, status, content_sha1(content), fetched_at or time.time()))
+
+    def discard_page(self, page):
+        """丢弃一页暂存的记录（该页的文件没有写入时调用）"""
+        with self.lock:
+            self.staged.pop(page, None)
+
+    def finish_page(self, page, n_articles, finished_at=None):
+        """
+        在一个事务中提交该页暂存的文章记录，没有失败的文章时同时标记该页已完成
+
+        Returns:
+            该页是否标记为完成
+        """
+        with self.lock:
+            rows = self.staged.pop(page, [])
+            failed = any(row[2] == "failed" for row in rows)
+            # 之前失败、这次已不在该页列表中的 URL 不再阻止该页完成
+            staged_urls = {row[0] for row in rows}
+            stale = [(url,) for (url,) in self.connection.execute(
+                "SELECT url FROM articles WHERE page = ? AND status = 'failed'", (page,)) if url not in staged_urls]
+            with self.connection:
+                self.connection.executemany("DELETE FROM articles WHERE url = ?", stale)
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO articles (url, page, status, sha1, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                if not failed:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO pages (page, articles, finished_at) VALUES (?, ?, ?)",
+                        (page, n_articles, finished_at or time.time())
+                    )
+        return not failed
+
+    def summary(self):
+        """(已完成页数, 成功的文章数, 失败的文章数)"""
+        with self.lock:
+            pages = self.connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            counts = dict(self.connection.execute(
+                "SELECT status, COUNT(*) FROM articles GROUP BY status").fetchall())
+        return pages, counts.get("ok", 0), counts.get("failed", 0)
+
+    def close(self):
+        """关闭记录；未完成页面的暂存记录不会写入"""
+        with self.lock:
+            self.staged.clear()
+            self.connection.rollback()
+            self.connection.close()
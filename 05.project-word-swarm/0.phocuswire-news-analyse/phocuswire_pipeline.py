@@ -0,0 +1,222 @@
+"""
+文章预处理的多进程流水线：分词 + 按月统计词频
+
+按源页面文件（语料的 source 列）把文章切分为连续的分片，每个工作进程对自己的分片
+分词并生成按月的 Counter，主进程再把各分片的结果两两归并（树形归并）。
+分片保持原有顺序、归并时左侧在前，因此结果（包括 Counter 中各词的先后顺序、
+most_common 的并列顺序）与单进程逐篇处理完全相同。
+
+用法:
+    by_month, total = count_by_month(articles, self.preprocess_text, token_cache=token_cache, workers=4)
+"""
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from tqdm import tqdm
+
+from phocuswire_tokens import TokenCache
+
+# 没有 source 列（未安装 pyarrow 时的 list[dict]）时每个分片的文章数
+DEFAULT_SHARD_SIZE = 500
+
+# 工作进程的全局状态，由 _init_worker 在每个进程启动时设置一次
+_worker = {}
+
+
+def shard_ranges(articles, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    按源页面文件把文章切分为连续的 [start, end) 区间
+
+    语料中同一文件的文章是连续存放的，每段相同 source 即为一个分片；
+    没有 source 信息时按 shard_size 等长切分。
+    """
+    n = len(articles)
+    sources = None
+    if hasattr(articles, "table") and "source" in articles.table.column_names:
+        sources = articles.column("source").to_pylist()
+    elif n and isinstance(articles, list) and "source" in articles[0]:
+        sources = [article.get("source") for article in articles]
+
+    if sources is None:
+        return [(start, min(start + shard_size, n)) for start in range(0, n, shard_size)]
+
+    ranges = []
+    start = 0
+    for i in range(1, n + 1):
+        if i == n or sources[i] != sources[start]:
+            ranges.append((start, i))
+            start = i
+    return ranges
+
+
+def select_rows(articles, keep):
+    """按布尔掩码选出部分文章（keep 为 None 时原样返回）"""
+    if keep is None:
+        return articles
+    if hasattr(articles, "table"):
+        return type(articles)(articles.table.filter(keep), articles.batch_size)
+    return [article for article, selected in zip(articles, keep) if selected]
+
+
+def count_shard(articles, tokenize):
+    """
+    对一个分片分词并按月统计词频（单进程路径和工作进程共用）
+
+    月份取自语料编译时解析好的 month 列，日期缺失或无法解析的文章跳过。
+
+    Args:
+        articles: 可迭代的文章字典
+        tokenize: (url, content) -> 词列表，通常为 TokenCache.tokenize
+
+    Returns:
+        (by_month, total, 文章数)，by_month 为 {"YYYY-MM": Counter}
+    """
+    by_month = {}
+    total = Counter()
+    n_articles = 0
+    for article in articles:
+        n_articles += 1
+        try:
+            year_month = article.get('month')
+            if not year_month:
+                continue
+
+            words = tokenize(article.get('url'), article.get('content', ''))
+
+            month_counts = by_month.get(year_month)
+            if month_counts is None:
+                month_counts = by_month[year_month] = Counter()
+            month_counts.update(words)
+            total.update(words)
+        except Exception as e:
+            print(f"处理文章时出错: {e}")
+    return by_month, total, n_articles
+
+
+def merge_counts(left, right):
+    """把 right 的 (by_month, total, 文章数) 合并进 left（right 的文章在 left 之后）"""
+    by_month, total, n_articles = left
+    for year_month, counts in right[0].items():
+        if year_month in by_month:
+            by_month[year_month].update(counts)
+        else:
+            by_month[year_month] = counts
+    total.update(right[1])
+    return by_month, total, n_articles + right[2]
+
+
+def tree_reduce(parts, merge):
+    """相邻两两归并直到只剩一个结果，保持从左到右的顺序"""
+    parts = list(parts)
+    if not parts:
+        return None
+    while len(parts) > 1:
+        merged = [merge(parts[i], parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
+    return parts[0]
+
+
+class _Uncached:
+    """不使用分词缓存时的 tokenize(url, content)"""
+
+    def __init__(self, preprocess):
+        self.preprocess = preprocess
+
+    def tokenize(self, url, content):
+        return self.preprocess(content)
+
+
+def _init_worker(preprocess, cache_spec):
+    if cache_spec is None:
+        _worker["cache"] = None
+        _worker["tokenize"] = _Uncached(preprocess).tokenize
+    else:
+        cache_dir, fingerprint = cache_spec
+        cache = TokenCache(cache_dir, preprocess, fingerprint=fingerprint)
+        _worker["cache"] = cache
+        _worker["tokenize"] = cache.tokenize
+
+
+def _count_shard_task(task):
+    shard, keep = task
+    counts = count_shard(select_rows(shard, keep), _worker["tokenize"])
+    cache = _worker["cache"]
+    if cache is None:
+        return counts, None, None
+    # 每个分片只回传本分片新分词的结果和命中统计
+    exported, stats = cache.export_pending(), dict(cache.stats)
+    cache.pending = {}
+    cache.stats = {name: 0 for name in cache.stats}
+    return counts, exported, stats
+
+
+def count_by_month(articles, preprocess, token_cache=None, workers=1, keep=None, desc="处理文章"):
+    """
+    分词并按月统计词频
+
+    workers > 1 时使用进程池（spawn），preprocess 必须可以被 pickle
+    （模块级函数、静态方法，或实例本身可 pickle 的绑定方法）。
+
+    Args:
+        articles: ArticleTable 或 list[dict]
+        preprocess: 预处理函数 text -> 词列表
+        token_cache: 可选的 TokenCache；各进程新分词的结果会合并回这个缓存（需调用方 save）
+        workers: 进程数，<= 1 时在当前进程中逐篇处理
+        keep: 可选的布尔数组（与 articles 等长），只统计为 True 的文章（增量更新时使用）
+        desc: 进度条描述
+
+    Returns:
+        (by_month, total)：{"YYYY-MM": Counter} 与全部文章的 Counter
+    """
+    start_time = time.perf_counter()
+    ranges = shard_ranges(articles)
+    if keep is not None:
+        # 跳过没有需要统计的文章的分片；全部需要统计的分片不再筛选
+        keep = np.asarray(keep, dtype=bool)
+        tasks = [(start, end, None if keep[start:end].all() else keep[start:end])
+                 for start, end in ranges if keep[start:end].any()]
+        n_selected = int(keep.sum())
+    else:
+        tasks = [(start, end, None) for start, end in ranges]
+        n_selected = len(articles)
+    workers = min(workers, len(tasks))
+
+    if workers <= 1:
+        tokenize = (token_cache or _Uncached(preprocess)).tokenize
+        if keep is None:
+            selected = articles
+        else:
+            selected = (article for start, end, mask in tasks
+                        for article in select_rows(articles[start:end], mask))
+        by_month, total, n_articles = count_shard(tqdm(selected, total=n_selected, desc=desc), tokenize)
+        workers = 1
+    else:
+        cache_spec = None
+        if token_cache is not None:
+            cache_spec = (token_cache.cache_dir, token_cache.fingerprint)
+        shards = [(articles[start:end], mask) for start, end, mask in tasks]
+        chunksize = max(1, len(shards) // (workers * 4))
+        context = multiprocessing.get_context("spawn")
+        parts = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(preprocess, cache_spec)) as executor:
+            with tqdm(total=n_selected, desc=desc) as progress:
+                for counts, exported, stats in executor.map(_count_shard_task, shards, chunksize=chunksize):
+                    parts.append(counts)
+                    if exported is not None:
+                        token_cache.merge_pending(exported)
+                        for name, value in stats.items():
+                            token_cache.stats[name] += value
+                    progress.update(counts[2])
+        by_month, total, n_articles = tree_reduce(parts, merge_counts) or ({}, Counter(), 0)
+
+    elapsed = time.perf_counter() - start_time
+    rate = n_articles / elapsed if elapsed > 0 else 0.0
+    print(f"预处理完成: {n_articles} 篇文章, 用时 {elapsed:.2f}s ({rate:.0f} 篇/秒), "
+          f"{workers} 个进程, {len(tasks)} 个分片")
+    return by_month, total
@@ -0,0 +1,303 @@
+"""
+文章预处理结果（分词、停用词过滤、双词短语提取）的持久化缓存
+
+以文章 URL 为键，保存 preprocess_text 的输出；缓存文件名中带有预处理配置的指纹
+（预处理函数源码 + 停用词 / FILTERED_WORDS / IMPORTANT_BIGRAMS 等集合），
+任何一项变化都会使用新的缓存，相同配置重新运行可视化时完全跳过分词。
+
+存储格式（位于数据目录的 .corpus_cache/ 下）:
+    tokens_<指纹>.npy   所有文章的词 ID 依次拼接的 int32 数组（内存映射读取）
+    tokens_<指纹>.json  词表、URL、每篇文章在数组中的偏移和正文的 sha1
+
+TokenDocuments 是一组文档的轻量引用（每篇文章只记录它在词 ID 数组中的区间），可以重复迭代，
+每次迭代时才从内存映射的数组还原分词结果，gensim 可以直接流式读取而不需要把全部分词列表放在内存中。
+
+用法:
+    token_cache = TokenCache.for_data_dir(data_dir, self.preprocess_text, stop_words=self.stop_words)
+    for article in articles:
+        words = token_cache.tokenize(article.get('url'), article.get('content', ''))
+        references.append(token_cache.reference(article.get('url'), words))
+    token_cache.save()
+    documents = token_cache.documents(references)   # 可重复迭代的分词结果
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+
+from phocuswire_corpus import CACHE_DIR_NAME
+
+TOKEN_CACHE_VERSION = 2
+
+
+def preprocess_fingerprint(preprocess, **config):
+    """
+    预处理配置的指纹
+
+    Args:
+        preprocess: 预处理函数（其源码参与哈希，修改分词逻辑后旧缓存自动失效）
+        config: 预处理依赖的集合或参数，例如 stop_words=..., important_bigrams=...
+    """
+    while isinstance(preprocess, functools.partial):
+        preprocess = preprocess.func
+    try:
+        source = inspect.getsource(preprocess)
+    except (OSError, TypeError):
+        source = getattr(preprocess, "__qualname__", repr(preprocess))
+    parts = {"version": TOKEN_CACHE_VERSION, "source": source}
+    for name, value in config.items():
+        parts[name] = sorted(value) if isinstance(value, (set, frozenset, list, tuple)) else value
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def content_digest(content):
+    """正文的 sha1（判断缓存的分词结果是否仍对应当前正文）"""
+    return hashlib.sha1((content or "").encode("utf-8")).hexdigest()
+
+
+class TokenDocuments:
+    """
+    按需从 TokenCache 的词 ID 数组还原的一组文档
+
+    迭代时依次产生每篇文档的分词列表（与 tokenize 的返回值相同），可以重复迭代，
+    也可以直接传给 gensim 的 Dictionary、CoherenceModel 等。传给子进程时只序列化文件路径、词表和区间，
+    子进程重新内存映射同一个数组文件。
+
+    Args:
+        ids_path: TokenCache 的词 ID 数组文件
+        vocab: 词表（词 ID -> 词）
+        spans: 每篇文档在数组中的 [起点, 终点)，形状为 (文档数, 2)；起点为 -1 的文档保存在 inline 中
+        inline: {文档序号: int32 词 ID 数组}，没有 URL 的文章（不在缓存中）
+    """
+
+    def __init__(self, ids_path, vocab, spans, inline=None):
+        self.ids_path = ids_path
+        self.vocab = vocab
+        self.spans = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+        self.inline = inline or {}
+        self._ids = None
+        self._vocab_array = None
+
+    @classmethod
+    def concat(cls, parts):
+        """按顺序拼接多组文档（须来自同一个 TokenCache）"""
+        parts = list(parts)
+        if not parts:
+            return cls(None, [], np.zeros((0, 2), dtype=np.int64))
+        inline, offset = {}, 0
+        for part in parts:
+            inline.update((offset + index, ids) for index, ids in part.inline.items())
+            offset += len(part)
+        vocab = max((part.vocab for part in parts), key=len)
+        return cls(parts[0].ids_path, vocab, np.concatenate([part.spans for part in parts]), inline)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_ids"] = state["_vocab_array"] = None
+        return state
+
+    def token_array(self):
+        """内存映射的词 ID 数组（只有 inline 文档时不打开文件）"""
+        if self._ids is None and (self.spans[:, 0] >= 0).any():
+            self._ids = np.load(self.ids_path, mmap_mode='r')
+        return self._ids
+
+    def iter_ids(self):
+        """依次产生每篇文档的词 ID 数组（TokenCache 词表中的 ID）"""
+        ids = self.token_array()
+        for index, (start, end) in enumerate(self.spans.tolist()):
+            yield self.inline[index] if start < 0 else ids[start:end]
+
+    def __iter__(self):
+        if self._vocab_array is None or len(self._vocab_array) != len(self.vocab):
+            self._vocab_array = np.array(self.vocab, dtype=object)
+        vocab_array = self._vocab_array
+        for ids in self.iter_ids():
+            yield vocab_array[ids].tolist()
+
+
+class TokenCache:
+    """
+    按 URL 缓存文章的预处理结果，词以 int32 ID 紧凑保存
+
+    正文与缓存时不同的文章（例如重新抓取后内容有变化，按正文的 sha1 判断）会重新分词。
+    没有 URL 的文章不缓存，每次都直接调用 preprocess。
+
+    Args:
+        cache_dir: 缓存目录
+        preprocess: 预处理函数 text -> list[str]
+        fingerprint: 直接指定指纹（子进程打开主进程的同一份缓存时使用）
+        config: 参与指纹计算的预处理配置，见 preprocess_fingerprint
+    """
+
+    def __init__(self, cache_dir, preprocess, fingerprint=None, **config):
+        self.cache_dir = cache_dir
+        self.preprocess = preprocess
+        self.fingerprint = fingerprint or preprocess_fingerprint(preprocess, **config)
+        self.ids_path = os.path.join(cache_dir, f"tokens_{self.fingerprint}.npy")
+        self.meta_path = os.path.join(cache_dir, f"tokens_{self.fingerprint}.json")
+
+        self.vocab = []
+        self.loaded_vocab_size = 0  # 从磁盘读取的词表长度，之后新增的词追加在其后
+        self.token_ids = {}
+        self.vocab_array = np.array([], dtype=object)
+        self.ids = np.zeros(0, dtype=np.int32)
+        self.entries = {}   # url -> (start, end, 正文的 sha1)，指向 self.ids
+        self.pending = {}   # url -> (词 ID 列表, 正文的 sha1)，尚未写入磁盘
+        self.stats = {"hits": 0, "misses": 0}
+        self.load()
+
+    @classmethod
+    def for_data_dir(cls, data_dir, preprocess, **config):
+        """使用与语料缓存相同的 data_dir/.corpus_cache 目录"""
+        return cls(os.path.join(data_dir, CACHE_DIR_NAME), preprocess, **config)
+
+    def load(self):
+        """读取已有缓存；文件缺失、损坏或与数组长度不一致时从空缓存开始"""
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            ids = np.load(self.ids_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return
+        if meta.get("version") != TOKEN_CACHE_VERSION or len(ids) != meta["n_ids"]:
+            return
+
+        self.vocab = meta["vocab"]
+        self.loaded_vocab_size = len(self.vocab)
+        self.token_ids = {token: i for i, token in enumerate(self.vocab)}
+        self.vocab_array = np.array(self.vocab, dtype=object)
+        self.ids = ids
+        offsets = meta["offsets"]
+        self.entries = {
+            url: (offsets[i], offsets[i + 1], digest)
+            for i, (url, digest) in enumerate(zip(meta["urls"], meta["digests"]))
+        }
+
+    def encode(self, tokens):
+        token_ids = self.token_ids
+        ids = []
+        for token in tokens:
+            token_id = token_ids.get(token)
+            if token_id is None:
+                token_id = len(self.vocab)
+                token_ids[token] = token_id
+                self.vocab.append(token)
+            ids.append(token_id)
+        return ids
+
+    def tokenize(self, url, content):
+        """返回 content 的预处理结果，命中缓存时直接由词 ID 还原"""
+        digest = content_digest(content)
+        entry = self.entries.get(url) if url else None
+        if entry is not None and entry[2] == digest:
+            self.stats["hits"] += 1
+            start, end, _ = entry
+            return self.vocab_array[self.ids[start:end]].tolist()
+
+        self.stats["misses"] += 1
+        tokens = self.preprocess(content)
+        if url:
+            self.pending[url] = (self.encode(tokens), digest)
+        return tokens
+
+    def reference(self, url, tokens):
+        """
+        文档引用，用于 save 之后由 documents 转换为 TokenDocuments
+
+        有 URL 的文章引用其缓存条目（同一 URL 按缓存中的分词结果还原），
+        没有 URL 的文章编码为 int32 词 ID 数组。
+        """
+        if url:
+            return url
+        return np.asarray(self.encode(tokens), dtype=np.int32)
+
+    def documents(self, references):
+        """把 reference 返回的引用转换为 TokenDocuments（应在 save 之后调用，文档才指向磁盘上的数组）"""
+        spans = np.full((len(references), 2), -1, dtype=np.int64)
+        inline = {}
+        for index, reference in enumerate(references):
+            if isinstance(reference, str):
+                entry = self.entries.get(reference)
+                if entry is not None and reference not in self.pending:
+                    spans[index] = entry[:2]
+                    continue
+                reference = np.asarray(self.pending[reference][0], dtype=np.int32)
+            inline[index] = reference
+        return TokenDocuments(self.ids_path, self.vocab, spans, inline)
+
+    def export_pending(self):
+        """
+        导出尚未保存的分词结果，用于从子进程传回主进程
+
+        Returns:
+            (磁盘词表长度, 新增的词, {url: (词 ID 数组, 正文的 sha1)})
+        """
+        entries = {url: (np.asarray(ids, dtype=np.int32), digest)
+                   for url, (ids, digest) in self.pending.items()}
+        return self.loaded_vocab_size, self.vocab[self.loaded_vocab_size:], entries
+
+    def merge_pending(self, exported):
+        """合并子进程 export_pending 的结果，把子进程的词 ID 映射到本进程的词表"""
+        base, new_words, entries = exported
+        remap = np.concatenate([
+            np.arange(base, dtype=np.int32),
+            np.asarray(self.encode(new_words), dtype=np.int32),
+        ])
+        for url, (ids, digest) in entries.items():
+            self.pending[url] = (remap[ids], digest)
+
+    def save(self):
+        """把本次新分词的文章合并写入磁盘（先写数组再写元数据，均为原子替换）"""
+        if not self.pending:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        urls, digests, chunks = [], [], []
+        for url, (start, end, digest) in self.entries.items():
+            if url not in self.pending:
+                urls.append(url)
+                digests.append(digest)
+                chunks.append(np.asarray(self.ids[start:end], dtype=np.int32))
+        for url, (ids, digest) in self.pending.items():
+            urls.append(url)
+            digests.append(digest)
+            chunks.append(np.asarray(ids, dtype=np.int32))
+
+        offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+        ids = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32)
+        # 释放对旧数组文件的内存映射，再替换文件
+        del chunks
+        self.ids = ids
+
+        tmp_ids = self.ids_path + ".tmp.npy"
+        np.save(tmp_ids, ids)
+        os.replace(tmp_ids, self.ids_path)
+        tmp_meta = self.meta_path + ".tmp"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": TOKEN_CACHE_VERSION,
+                "n_ids": int(len(ids)),
+                "vocab": self.vocab,
+                "urls": urls,
+                "digests": digests,
+                "offsets": offsets.tolist(),
+            }, f, ensure_ascii=False)
+        os.replace(tmp_meta, self.meta_path)
+
+        self.pending = {}
+        self.load()
+
+    def report(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / total * 100 if total else 0.0
+        print(f"分词缓存({self.fingerprint}): 命中 {self.stats['hits']} / 未命中 {self.stats['misses']} "
+              f"({hit_rate:.1f}%), 词表 {len(self.vocab)} 个词")
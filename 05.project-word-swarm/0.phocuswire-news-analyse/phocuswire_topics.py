@@ -0,0 +1,503 @@
+"""
+ThemeRiverViz 的 LDA 主题数搜索、批量推断和缓存
+
+各候选主题数的 LdaModel 在进程池中并行训练（alpha='auto' 的 LdaModel 无法换成 LdaMulticore，
+因此按候选主题数划分进程）。每个进程训练完后把模型保存到临时目录，只回传主题的前 topn 个词 ID，
+主进程不会同时持有多个模型。
+
+c_v 相干性需要在全部文本上做滑动窗口统计（词和词对的共现次数）。各候选模型的前 topn 个词
+合并后只统计一次（CoherenceModel.for_topics），再逐个模型复用同一份统计计算相干性；
+窗口中无关词的计数互不影响，因此得分与逐个模型单独计算时完全相同。
+最后只从临时目录加载相干性最高的模型。
+
+StreamingBowCorpus 从分词缓存（TokenDocuments）流式产生词袋向量：把缓存词表的 ID 一次性映射为词典 ID，
+每篇文档用 np.unique 计数，结果与 dictionary.doc2bow 相同，训练时不需要在内存中保存全部分词结果和词袋语料。
+
+month_topic_distributions 用训练时的词袋语料按块批量推断（每块调用一次 LdaModel.inference），
+再按文档所属月份的 ID 数组做分段求和，得到 月份 x 主题 的平均分布，不再逐个文档调用 get_document_topics，
+也不再对各月文本重新 doc2bow。推断使用的随机数与逐个文档推断时按相同顺序抽取，结果一致。
+
+LdaCache 把词典、词袋语料（MmCorpus）和训练好的模型（连同各时间点的主题分布）按内容缓存在
+数据目录的 .corpus_cache/lda_<输入指纹>/ 下：输入指纹由各时间点的分词结果、预处理配置和词典过滤参数
+决定，模型再按主题数 / 训练遍数 / 随机种子区分。只修改绘图参数重新运行时直接读取，不再重新训练。
+
+增量模式（OnlineLdaState）：最近一次训练的模型、词典和各月主题分布保存在 .corpus_cache/lda_online_<配置>/ 下，
+新增月份时只用该月的文档调用 LdaModel.update 在线更新。LdaModel 的词表在训练后是固定的，
+extend_dictionary 只把新月份中文档频率足够的新词追加到词典末尾（已有词的 ID 不变），
+grow_lda_vocabulary 再为新词补上主题-词统计量和先验。topic_stability 把更新后的主题与完整重新训练的主题
+按 Hellinger 相似度一一匹配，用于判断增量结果是否仍然可靠。
+
+用法:
+    model, best_num_topics, scores = coherence_sweep(corpus, dictionary, texts, range(7, 14), workers=4)
+    corpus = StreamingBowCorpus(documents, dictionary)
+    distributions = month_topic_distributions(model, corpus, doc_months, len(dates))
+
+    lda_cache = LdaCache.for_data_dir(data_dir, dates, texts_by_date, preprocess=fingerprint, no_below=2)
+    inputs = lda_cache.load_inputs()          # (dictionary, MmCorpus) 或 None
+
+    added = extend_dictionary(dictionary, new_texts, max_new_terms=500)
+    grow_lda_vocabulary(model, dictionary)
+    model.update([dictionary.doc2bow(text) for text in new_texts])
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from gensim import corpora
+from gensim.models import CoherenceModel, LdaModel
+from scipy.optimize import linear_sum_assignment
+
+from phocuswire_corpus import CACHE_DIR_NAME
+
+LDA_CACHE_VERSION = 1
+
+# 与原 build_lda_model 中的训练参数一致
+SWEEP_PASSES = 13
+RANDOM_STATE = 42
+
+# 工作进程的全局状态，由 _init_sweep_worker 在每个进程启动时设置一次
+_sweep = {}
+
+
+def train_lda(corpus, dictionary, num_topics, passes, random_state=RANDOM_STATE):
+    """按 ThemeRiverViz 的参数训练 LdaModel"""
+    return LdaModel(
+        corpus=corpus,
+        id2word=dictionary,
+        num_topics=num_topics,
+        passes=passes,
+        alpha='auto',
+        eta='auto',
+        random_state=random_state  # 设置随机种子以获得可重复的结果
+    )
+
+
+def _init_sweep_worker(corpus, dictionary, passes, topn, model_dir):
+    _sweep.update(corpus=corpus, dictionary=dictionary, passes=passes, topn=topn, model_dir=model_dir)
+
+
+def _train_candidate(num_topics):
+    """训练一个候选模型并保存到临时目录，返回 (主题数, 各主题前 topn 个词 ID, 模型路径, 用时)"""
+    start = time.perf_counter()
+    model = train_lda(_sweep["corpus"], _sweep["dictionary"], num_topics, _sweep["passes"])
+    topics = [ids.tolist() for ids in CoherenceModel._get_topics_from_model(model, _sweep["topn"])]
+    path = os.path.join(_sweep["model_dir"], f"lda_{num_topics}")
+    model.save(path)
+    return num_topics, topics, path, time.perf_counter() - start
+
+
+def coherence_sweep(corpus, dictionary, texts, topic_counts, passes=SWEEP_PASSES, workers=1, topn=20):
+    """
+    训练各候选主题数的模型，返回相干性（c_v）最高的一个
+
+    Args:
+        corpus: 词袋语料（list of doc2bow 结果、MmCorpus 或 StreamingBowCorpus）
+        dictionary: gensim Dictionary
+        texts: 分词后的文本（计算 c_v 的滑动窗口统计，可以是可重复迭代的 TokenDocuments）
+        topic_counts: 候选主题数
+        passes: 训练遍数
+        workers: 并行训练的进程数，<= 1 时在当前进程中依次训练
+        topn: 每个主题参与相干性计算的词数（CoherenceModel 的默认值）
+
+    Returns:
+        (最佳模型, 最佳主题数, {主题数: 相干性})；得分并列时取较小的主题数（与原来的 index(max) 一致）
+    """
+    topic_counts = list(topic_counts)
+    workers = max(1, min(workers, len(topic_counts)))
+    model_dir = tempfile.mkdtemp(prefix="lda_sweep_")
+    try:
+        start = time.perf_counter()
+        if workers <= 1:
+            _init_sweep_worker(corpus, dictionary, passes, topn, model_dir)
+            candidates = [_train_candidate(num_topics) for num_topics in topic_counts]
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_sweep_worker,
+                                     initargs=(corpus, dictionary, passes, topn, model_dir)) as executor:
+                candidates = list(executor.map(_train_candidate, topic_counts))
+        for num_topics, _, _, seconds in candidates:
+            print(f"  训练 {num_topics} 个主题用时 {seconds:.1f}s")
+        print(f"训练 {len(candidates)} 个候选模型用时 {time.perf_counter() - start:.1f}s ({workers} 个进程)")
+
+        # 所有候选模型的前 topn 个词合并后只做一次滑动窗口统计
+        start = time.perf_counter()
+        coherence_model = CoherenceModel.for_topics(
+            [topics for _, topics, _, _ in candidates],
+            texts=texts, dictionary=dictionary, coherence='c_v', topn=topn
+        )
+        scores = {}
+        for num_topics, topics, _, _ in candidates:
+            coherence_model.topics = topics
+            scores[num_topics] = coherence_model.get_coherence()
+            print(f"主题数量 {num_topics} 的相干性得分: {scores[num_topics]:.4f}")
+        print(f"相干性计算用时 {time.perf_counter() - start:.1f}s")
+
+        best_num_topics = max(topic_counts, key=lambda n: (scores[n], -topic_counts.index(n)))
+        best_path = next(path for num_topics, _, path, _ in candidates if num_topics == best_num_topics)
+        return LdaModel.load(best_path), best_num_topics, scores
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+class StreamingBowCorpus:
+    """
+    从 TokenDocuments 流式产生词袋向量的语料（可重复迭代，gensim 的 LdaModel / MmCorpus.serialize 可以直接使用）
+
+    Args:
+        documents: TokenDocuments
+        dictionary: gensim Dictionary（只读取 token2id，之后修改词典需要重新创建语料）
+    """
+
+    def __init__(self, documents, dictionary):
+        self.documents = documents
+        self.dictionary = dictionary
+        self._remap = None
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_remap"] = None
+        return state
+
+    def remap(self):
+        """分词缓存的词 ID -> 词典 ID 的数组（不在词典中的词为 -1）"""
+        vocab = self.documents.vocab
+        if self._remap is None or len(self._remap) != len(vocab):
+            token2id = self.dictionary.token2id
+            self._remap = np.fromiter((token2id.get(token, -1) for token in vocab),
+                                      dtype=np.int64, count=len(vocab))
+        return self._remap
+
+    def __iter__(self):
+        remap = self.remap()
+        for ids in self.documents.iter_ids():
+            term_ids = remap[ids]
+            term_ids, counts = np.unique(term_ids[term_ids >= 0], return_counts=True)
+            yield list(zip(term_ids.tolist(), counts.tolist()))
+
+
+def month_topic_distributions(model, corpus, doc_months, n_months, chunksize=2000):
+    """
+    各月文档的平均主题分布
+
+    与逐个文档累加 model[bow] 的结果相同：跳过空文档，低于 model.minimum_probability 的主题概率记为 0。
+
+    Args:
+        model: 训练好的 LdaModel
+        corpus: 词袋语料（训练时的 list、MmCorpus 或 StreamingBowCorpus），按月份顺序排列
+        doc_months: 每篇文档所属月份的序号（与 corpus 一一对应）
+        n_months: 月份数
+        chunksize: 每次推断的文档数
+
+    Returns:
+        np.ndarray，形状为 (月份数, 主题数)；没有非空文档的月份为全 0
+    """
+    minimum_probability = max(model.minimum_probability, 1e-8)
+    sums = np.zeros((n_months, model.num_topics))
+    doc_counts = np.zeros(n_months, dtype=np.int64)
+
+    def accumulate(chunk, chunk_months):
+        gamma, _ = model.inference(chunk)
+        topic_dist = gamma / gamma.sum(axis=1, keepdims=True)
+        topic_dist[topic_dist < minimum_probability] = 0
+        chunk_months = np.asarray(chunk_months, dtype=np.int64)
+        np.add.at(sums, chunk_months, topic_dist)
+        doc_counts[:] += np.bincount(chunk_months, minlength=n_months)
+
+    chunk, chunk_months = [], []
+    for doc_bow, month in zip(corpus, doc_months):
+        if not doc_bow:  # 跳过空文档
+            continue
+        chunk.append(doc_bow)
+        chunk_months.append(month)
+        if len(chunk) >= chunksize:
+            accumulate(chunk, chunk_months)
+            chunk, chunk_months = [], []
+    if chunk:
+        accumulate(chunk, chunk_months)
+
+    return sums / np.maximum(doc_counts, 1)[:, None]
+
+
+def texts_fingerprint(dates, texts_by_date):
+    """各时间点分词结果的内容哈希（时间点、文档顺序或任何一个词变化时都会改变）"""
+    digest = hashlib.sha1()
+    for date in dates:
+        digest.update(f"\x1d{date}".encode("utf-8"))
+        for text in texts_by_date[date]:
+            digest.update(("\x1e" + "\x1f".join(text)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _config_key(config):
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class LdaCache:
+    """
+    LDA 的词典、词袋语料和模型缓存
+
+    Args:
+        cache_dir: 本组输入（分词结果 + 预处理配置 + 词典参数）对应的缓存目录
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.dictionary_path = os.path.join(cache_dir, "dictionary.dict")
+        self.corpus_path = os.path.join(cache_dir, "corpus.mm")
+
+    @classmethod
+    def for_data_dir(cls, data_dir, dates, texts_by_date, **config):
+        """
+        数据目录中某组输入的缓存
+
+        Args:
+            data_dir: 数据目录（缓存位于其下的 .corpus_cache/）
+            dates: 时间点（决定文档顺序）
+            texts_by_date: {时间点: [分词结果, ...]}
+            config: 预处理指纹、词典过滤参数等，任何一项变化都使用新的缓存
+        """
+        key = _config_key(dict(config, version=LDA_CACHE_VERSION,
+                               texts=texts_fingerprint(dates, texts_by_date)))
+        return cls(os.path.join(data_dir, CACHE_DIR_NAME, f"lda_{key}"))
+
+    def load_inputs(self):
+        """已缓存的 (Dictionary, MmCorpus)，不存在时返回 None"""
+        if not (os.path.exists(self.dictionary_path) and os.path.exists(self.corpus_path)):
+            return None
+        try:
+            return corpora.Dictionary.load(self.dictionary_path), corpora.MmCorpus(self.corpus_path)
+        except Exception as e:
+            print(f"读取LDA语料缓存失败，重新构建: {e}")
+            return None
+
+    def save_inputs(self, dictionary, corpus):
+        """保存词典和词袋语料，返回从磁盘流式读取的 MmCorpus"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        corpora.MmCorpus.serialize(self.corpus_path, corpus, id2word=dictionary)
+        dictionary.save(self.dictionary_path)
+        return corpora.MmCorpus(self.corpus_path)
+
+    def model_paths(self, config):
+        key = _config_key(dict(config, version=LDA_CACHE_VERSION))
+        return os.path.join(self.cache_dir, f"model_{key}"), os.path.join(self.cache_dir, f"model_{key}.json")
+
+    def load_model(self, config):
+        """
+        已缓存的模型
+
+        Args:
+            config: 训练参数（主题数、训练遍数、随机种子等）
+
+        Returns:
+            (LdaModel, 元数据) 或 None；元数据中 topic_distributions 为 {时间点: np.ndarray}
+        """
+        model_path, meta_path = self.model_paths(config)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            model = LdaModel.load(model_path)
+        except Exception as e:
+            print(f"读取LDA模型缓存失败，重新训练: {e}")
+            return None
+        meta["topic_distributions"] = {date: np.array(values)
+                                       for date, values in meta["topic_distributions"].items()}
+        return model, meta
+
+    def save_model(self, config, model, num_topics, topic_distributions, coherence_scores=None):
+        """保存模型和各时间点的主题分布（元数据最后写入，作为缓存完整的标志）"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        model_path, meta_path = self.model_paths(config)
+        model.save(model_path)
+        meta = {
+            "config": config,
+            "num_topics": num_topics,
+            "coherence": {str(n): score for n, score in (coherence_scores or {}).items()},
+            "topic_distributions": {date: dist.tolist() for date, dist in topic_distributions.items()},
+        }
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+
+def month_fingerprints(dates, texts_by_date):
+    """{时间点: 该时间点分词结果的内容哈希}"""
+    return {date: texts_fingerprint([date], texts_by_date) for date in dates}
+
+
+def extend_dictionary(dictionary, texts, no_below=2, no_above=0.85, max_new_terms=500):
+    """
+    把新文本中的新词追加到词典末尾，已有词的 ID 不变（训练好的模型仍然可用）
+
+    与 filter_extremes 的规则一致，只加入在新文本中至少出现在 no_below 篇、且不超过 no_above 比例文档中的新词，
+    按文档频率取前 max_new_terms 个。已有词的文档频率等统计同时更新。
+
+    Args:
+        dictionary: 训练模型时使用的 gensim Dictionary（原地修改）
+        texts: 新增的分词文本
+        no_below: 新词至少出现的文档数
+        no_above: 新词最多出现的文档比例
+        max_new_terms: 最多新增的词数
+
+    Returns:
+        新增的词（按加入顺序）
+    """
+    month_dictionary = corpora.Dictionary(texts)
+    if not month_dictionary.num_docs:
+        return []
+    max_docs = no_above * month_dictionary.num_docs
+    candidates = sorted(
+        (-month_dictionary.dfs[token_id], token)
+        for token, token_id in month_dictionary.token2id.items()
+        if token not in dictionary.token2id and no_below <= month_dictionary.dfs[token_id] <= max_docs
+    )
+    added = [token for _, token in candidates[:max_new_terms]]
+    for token in added:
+        dictionary.token2id[token] = len(dictionary.token2id)
+    dictionary.id2token = {}  # 反向映射在下次使用时重建
+
+    for token, month_id in month_dictionary.token2id.items():
+        token_id = dictionary.token2id.get(token)
+        if token_id is None:
+            continue
+        dictionary.dfs[token_id] = dictionary.dfs.get(token_id, 0) + month_dictionary.dfs[month_id]
+        dictionary.cfs[token_id] = dictionary.cfs.get(token_id, 0) + month_dictionary.cfs[month_id]
+        dictionary.num_nnz += month_dictionary.dfs[month_id]
+    dictionary.num_docs += month_dictionary.num_docs
+    dictionary.num_pos += month_dictionary.num_pos
+    return added
+
+
+def grow_lda_vocabulary(model, dictionary):
+    """
+    把 LdaModel 的词表扩展到与词典相同的大小
+
+    新词的主题-词统计量为 0，先验取已有词先验的平均值，之后由 update() 学习。
+    """
+    extra = len(dictionary) - model.num_terms
+    model.id2word = dictionary
+    if extra <= 0:
+        return
+    eta = np.asarray(model.eta)
+    if eta.ndim == 1:
+        eta = np.concatenate([eta, np.full(extra, eta.mean(), dtype=eta.dtype)])
+    elif eta.ndim == 2:
+        eta = np.hstack([eta, np.repeat(eta.mean(axis=1, keepdims=True), extra, axis=1)])
+    model.eta = eta
+    model.state.eta = eta
+    model.state.sstats = np.hstack([
+        model.state.sstats, np.zeros((model.num_topics, extra), dtype=model.state.sstats.dtype)
+    ])
+    model.num_terms = len(dictionary)
+    model.sync_state()
+
+
+def topic_stability(model, reference, topn=10):
+    """
+    把 model 的主题与 reference 的主题一一匹配（两个模型须使用同一个词典）
+
+    相似度为 1 - Hellinger 距离（主题-词分布完全相同时为 1），用匈牙利算法使匹配的相似度之和最大。
+
+    Returns:
+        按 model 的主题顺序排列的 [{"topic", "reference_topic", "similarity", "top_word_overlap"}, ...]，
+        top_word_overlap 为两个主题前 topn 个词的 Jaccard 系数
+    """
+    topics, reference_topics = model.get_topics(), reference.get_topics()
+    if topics.shape != reference_topics.shape:
+        raise ValueError(f"两个模型的主题-词矩阵形状不同: {topics.shape} vs {reference_topics.shape}")
+    bhattacharyya = np.sqrt(topics) @ np.sqrt(reference_topics).T
+    similarity = 1 - np.sqrt(np.clip(1 - bhattacharyya, 0, None))
+    rows, columns = linear_sum_assignment(-similarity)
+
+    matches = []
+    for topic, reference_topic in zip(rows.tolist(), columns.tolist()):
+        top_words = set(np.argsort(-topics[topic])[:topn].tolist())
+        reference_words = set(np.argsort(-reference_topics[reference_topic])[:topn].tolist())
+        matches.append({
+            "topic": topic,
+            "reference_topic": reference_topic,
+            "similarity": float(similarity[topic, reference_topic]),
+            "top_word_overlap": len(top_words & reference_words) / len(top_words | reference_words),
+        })
+    return matches
+
+
+class OnlineLdaState:
+    """
+    增量模式的模型状态：最近一次训练 / 更新后的模型、词典、已覆盖的月份和各月主题分布
+
+    Args:
+        state_dir: 状态目录
+    """
+
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        self.model_path = os.path.join(state_dir, "model")
+        self.dictionary_path = os.path.join(state_dir, "dictionary.dict")
+        self.meta_path = os.path.join(state_dir, "state.json")
+
+    @classmethod
+    def for_data_dir(cls, data_dir, **config):
+        """数据目录中某组配置（预处理指纹、词典参数、主题数等）的增量状态"""
+        key = _config_key(dict(config, version=LDA_CACHE_VERSION))
+        return cls(os.path.join(data_dir, CACHE_DIR_NAME, f"lda_online_{key}"))
+
+    def exists(self):
+        return os.path.exists(self.meta_path)
+
+    def load(self):
+        """
+        Returns:
+            (LdaModel, Dictionary, 元数据) 或 None；元数据包含 month_fingerprints 和
+            topic_distributions（{时间点: np.ndarray}）
+        """
+        if not self.exists():
+            return None
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            dictionary = corpora.Dictionary.load(self.dictionary_path)
+            model = LdaModel.load(self.model_path)
+        except Exception as e:
+            print(f"读取增量LDA状态失败: {e}")
+            return None
+        model.id2word = dictionary
+        meta["topic_distributions"] = {date: np.array(values)
+                                       for date, values in meta["topic_distributions"].items()}
+        return model, dictionary, meta
+
+    def save(self, model, dictionary, month_fingerprints, topic_distributions, updates=()):
+        """
+        保存模型状态（元数据最后写入）
+
+        Args:
+            month_fingerprints: 模型已覆盖的 {时间点: 内容哈希}
+            topic_distributions: {时间点: 主题分布}
+            updates: 自上次完整训练以来增量加入的月份
+        """
+        os.makedirs(self.state_dir, exist_ok=True)
+        model.save(self.model_path)
+        dictionary.save(self.dictionary_path)
+        meta = {
+            "num_topics": model.num_topics,
+            "num_terms": model.num_terms,
+            "month_fingerprints": month_fingerprints,
+            "topic_distributions": {date: np.asarray(dist).tolist() for date, dist in topic_distributions.items()},
+            "updates": list(updates),
+        }
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
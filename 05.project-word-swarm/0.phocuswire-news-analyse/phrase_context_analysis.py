@@ -9,6 +9,9 @@ from pathlib import Path
 from tqdm import tqdm
 import seaborn as sns
 
+from phocuswire_corpus import load_articles
+from phocuswire_tokens import TokenCache
+
 class PhraseContextAnalyzer:
     def __init__(self, data_dir="output", window_size=2):
         """
@@ -35,23 +38,9 @@ class PhraseContextAnalyzer:
         }
     
     def load_data(self):
-        """从JSON文件加载文章数据"""
-        json_files = glob.glob(os.path.join(self.data_dir, "phocuswire_page_*.json"))
-        all_articles = []
-        
-        print(f"找到 {len(json_files)} 个JSON文件")
-        
-        for json_file in tqdm(json_files, desc="加载文章数据"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    articles = json.load(f)
-                    all_articles.extend(articles)
-            except Exception as e:
-                print(f"读取文件 {json_file} 时出错: {e}")
-        
-        print(f"总共加载了 {len(all_articles)} 篇文章")
-        self.articles = all_articles
-        return all_articles
+        """从JSON文件加载文章数据（经由共享的语料缓存，源文件未变化时直接内存映射读取）"""
+        self.articles = load_articles(self.data_dir)
+        return self.articles
 
     def preprocess_text(self, text):
         """预处理文本，返回词列表"""
@@ -79,11 +68,13 @@ class PhraseContextAnalyzer:
         phrases = []             # 完整短语存储
         
         print(f"开始分析词语 '{target_word}' 的上下文...")
+        # 分析不同目标词时复用同一份分词结果
+        token_cache = TokenCache.for_data_dir(self.data_dir, self.preprocess_text)
         
         for article in tqdm(self.articles, desc="处理文章"):
             try:
                 content = article.get('content', '')
-                words = self.preprocess_text(content)
+                words = token_cache.tokenize(article.get('url'), content)
                 
                 # 查找目标词的所有位置
                 for i, word in enumerate(words):
@@ -105,6 +96,8 @@ class PhraseContextAnalyzer:
             except Exception as e:
                 print(f"处理文章时出错: {e}")
         
+        token_cache.save()
+        
         # 过滤低频词
         before_words = Counter({k: v for k, v in before_words.items() if v >= min_freq})
         after_words = Counter({k: v for k, v in after_words.items() if v >= min_freq})
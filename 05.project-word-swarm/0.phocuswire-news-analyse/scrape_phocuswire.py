@@ -1,5 +1,6 @@
 import requests
 from bs4 import BeautifulSoup
+import asyncio
 import json
 import time
 import os
@@ -11,6 +12,9 @@ from tqdm import tqdm
 import logging
 import re
 
+from phocuswire_fetch import AsyncFetcher
+from phocuswire_ledger import ScrapeLedger
+
 # 设置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -20,15 +24,34 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class PhocusWireScraper:
-    def __init__(self, start_page=1, end_page=300, output_dir="output", max_workers=5, delay_min=0.5, delay_max=1.5):
-        self.base_url = "https://www.phocuswire.com"
-        self.list_url_template = "https://www.phocuswire.com/Latest-News?pg={}"
+    def __init__(self, start_page=1, end_page=300, output_dir="output", max_workers=5, delay_min=0.5, delay_max=1.5,
+                 base_url="https://www.phocuswire.com", engine="async", rate=5.0, page_concurrency=2,
+                 page_delay=(1, 2), resume=True):
+        """
+        Args:
+            max_workers: 线程引擎每页的线程数；异步引擎中为每个主机同时进行的请求数
+            delay_min, delay_max: 线程引擎每篇文章前的随机等待（秒）
+            base_url: 站点地址（测试时指向本地替身站点，见 phocuswire_fetch.FixtureSite）
+            engine: "async"（共享连接池 + 全局令牌桶限速）或 "threads"（原来的逐页线程池）
+            rate: 异步引擎的全局请求速率（次/秒）
+            page_concurrency: 异步引擎同时处理的列表页数，下一页的列表和上一页的文章并行抓取
+            page_delay: 线程引擎相邻两页之间的随机等待（秒）
+            resume: 跳过抓取记录中已完成的页（已抓取过的文章 URL 总是跳过，见 phocuswire_ledger）
+        """
+        self.base_url = base_url
+        self.list_url_template = base_url + "/Latest-News?pg={}"
         self.start_page = start_page
         self.end_page = end_page
         self.output_dir = output_dir
         self.max_workers = max_workers  
         self.delay_min = delay_min      
         self.delay_max = delay_max     
+        self.engine = engine
+        self.rate = rate
+        self.page_concurrency = page_concurrency
+        self.page_delay = page_delay
+        self.resume = resume
+        self.ledger = None
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
@@ -97,7 +120,10 @@ class PhocusWireScraper:
         soup = self.get_soup(article_url)
         if not soup:
             return None
-        
+        return self.parse_article_content(soup, article_url)
+    
+    def parse_article_content(self, soup, article_url):
+        """Extract content from a parsed article page."""
         try:
             # Find the article body based on the screenshot (div with articleBody itemprop)
             article_body = soup.select_one('div[itemprop="articleBody"]')
@@ -125,76 +151,145 @@ class PhocusWireScraper:
             logger.error(f"Error extracting content from {article_url}: {e}")
             return None
     
+    def parse_list_item(self, article, page_num):
+        """Extract title, URL and date of an article from the list view (without fetching it)."""
+        # Extract article link
+        link_element = article.select_one('a[href]')
+        if not link_element:
+            return None
+        
+        article_href = link_element.get('href')
+        if not article_href:
+            return None
+        
+        # Create full URL
+        article_url = urljoin(self.base_url, article_href)
+        
+        # Extract date
+        date = self.extract_date(article)
+        
+        # Extract title
+        title_element = article.select_one('.title')
+        title = title_element.text.strip() if title_element else None
+        
+        logger.debug(f"Found article: {title}")
+        logger.debug(f"URL: {article_url}")
+        logger.debug(f"Date: {date}")
+        
+        return {
+            "title": title,
+            "url": article_url,
+            "date": date,
+            "page": page_num
+        }
+    
+    def parse_list_page(self, soup, page_num):
+        """Return the list items of a listing page, or [] when the page has no list view."""
+        list_view = soup.select_one('.list-view')
+        if not list_view:
+            logger.warning(f"No list-view found on page {page_num}")
+            return []
+        return list_view.select('.item')
+    
+    def is_known(self, item):
+        """Whether the article was already scraped in this or an earlier run."""
+        return self.ledger is not None and self.ledger.is_known(item["url"])
+    
+    def build_article(self, item, content):
+        """Combine list-view metadata and article content (same key order as before)."""
+        if self.ledger is not None:
+            self.ledger.record_article(item["url"], item["page"], content)
+        if not content:
+            logger.warning(f"Failed to extract content from {item['url']}")
+            return None
+        logger.debug(f"Successfully scraped article: {item['title']}")
+        return {
+            "title": item["title"],
+            "url": item["url"],
+            "date": item["date"],
+            "content": content,
+            "page": item["page"]
+        }
+    
+    def record_failure(self, item):
+        """Record an article whose processing raised as failed, so its page is retried on the next run."""
+        if item is not None and self.ledger is not None:
+            self.ledger.record_article(item["url"], item["page"], None)
+    
     def process_article(self, article, page_num):
         """Process a single article - for parallel execution"""
+        item = None
         try:
-            # Extract article link
-            link_element = article.select_one('a[href]')
-            if not link_element:
-                return None
-            
-            article_href = link_element.get('href')
-            if not article_href:
+            item = self.parse_list_item(article, page_num)
+            if item is None or self.is_known(item):
                 return None
             
-            # Create full URL
-            article_url = urljoin(self.base_url, article_href)
-            
-            # Extract date
-            date = self.extract_date(article)
-            
-            # Extract title
-            title_element = article.select_one('.title')
-            title = title_element.text.strip() if title_element else None
-            
-            logger.debug(f"Found article: {title}")
-            logger.debug(f"URL: {article_url}")
-            logger.debug(f"Date: {date}")
-            
             # Add short delay to avoid overloading the server
             time.sleep(random.uniform(self.delay_min, self.delay_max))
             
             # Extract content
-            content = self.extract_article_content(article_url)
-            
-            if content:
-                article_data = {
-                    "title": title,
-                    "url": article_url,
-                    "date": date,
-                    "content": content,
-                    "page": page_num
-                }
-                logger.debug(f"Successfully scraped article: {title}")
-                return article_data
-            else:
-                logger.warning(f"Failed to extract content from {article_url}")
-                return None
+            content = self.extract_article_content(item["url"])
+            return self.build_article(item, content)
                 
         except Exception as e:
             logger.error(f"Error processing article: {e}")
+            self.record_failure(item)
+            return None
+    
+    async def fetch_article_async(self, fetcher, item):
+        """Fetch and parse one article with the shared async client."""
+        html = await fetcher.fetch_text(item["url"])
+        if html is None:
+            return self.build_article(item, None)
+        try:
+            content = self.parse_article_content(BeautifulSoup(html, 'html.parser'), item["url"])
+            return self.build_article(item, content)
+        except Exception as e:
+            logger.error(f"Error processing article: {e}")
+            self.record_failure(item)
+            return None
+    
+    async def scrape_page_async(self, fetcher, page_num):
+        """Scrape one listing page and all of its articles concurrently (async engine; None on failure)."""
+        url = self.list_url_template.format(page_num)
+        logger.info(f"Scraping page {page_num}: {url}")
+        
+        html = await fetcher.fetch_text(url)
+        if html is None:
+            return None
+        
+        try:
+            items = []
+            for article in self.parse_list_page(BeautifulSoup(html, 'html.parser'), page_num):
+                try:
+                    item = self.parse_list_item(article, page_num)
+                except Exception as e:
+                    logger.error(f"Error processing article: {e}")
+                    continue
+                if item is not None and not self.is_known(item):
+                    items.append(item)
+            
+            # 所有文章请求同时发出，实际并发由全局令牌桶和每个主机的并发上限控制；结果保持列表页中的顺序
+            results = await asyncio.gather(*(self.fetch_article_async(fetcher, item) for item in items))
+        except Exception as e:
+            logger.error(f"Error processing page {page_num}: {e}")
             return None
+        return [article_data for article_data in results if article_data]
     
     def scrape_page(self, page_num):
-        """Scrape a single page of article listings."""
+        """Scrape a single page of article listings (None when the listing could not be fetched)."""
         url = self.list_url_template.format(page_num)
         logger.info(f"Scraping page {page_num}: {url}")
         
         soup = self.get_soup(url)
         if not soup:
-            return []
+            return None
         
         articles_data = []
         
         try:
-            # Find list-view section based on the first screenshot
-            list_view = soup.select_one('.list-view')
-            if not list_view:
-                logger.warning(f"No list-view found on page {page_num}")
-                return []
-            
-            # Find all articles in the list
-            articles = list_view.select('.item')
+            # Find all articles in the list-view section
+            articles = self.parse_list_page(soup, page_num)
             
             # 使用并行处理来处理页面上的所有文章
             with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
@@ -212,6 +307,7 @@ class PhocusWireScraper:
                 
         except Exception as e:
             logger.error(f"Error processing page {page_num}: {e}")
+            return None
         
         return articles_data
     
@@ -222,33 +318,141 @@ class PhocusWireScraper:
             json.dump(data, f, ensure_ascii=False, indent=2)
         logger.info(f"Saved data to {filepath}")
     
+    def save_page(self, articles_data, page_num):
+        """
+        Save one page file, then commit its ledger records (the page is marked finished
+        only when none of its articles failed).
+        
+        已抓取过的文章不会重新请求，重新抓取已有文件的页时把新文章追加到原文件的文章之后，
+        不会用缺少这些文章的结果覆盖原文件。
+        """
+        filename = f"phocuswire_page_{page_num}.json"
+        filepath = os.path.join(self.output_dir, filename)
+        if os.path.exists(filepath):
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    existing = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading {filepath}: {e}")
+            else:
+                saved_urls = {article.get("url") for article in existing}
+                articles_data = existing + [article for article in articles_data
+                                            if article["url"] not in saved_urls]
+        self.save_to_json(articles_data, filename)
+        if self.ledger is not None and not self.ledger.finish_page(page_num, len(articles_data)):
+            logger.warning(f"Page {page_num} has failed articles; it will be retried on the next run")
+    
+    def skip_page(self, page_num):
+        """Leave a page whose listing failed unfinished so the next run retries it."""
+        logger.warning(f"Page {page_num} could not be scraped; it will be retried on the next run")
+        if self.ledger is not None:
+            self.ledger.discard_page(page_num)
+    
+    def write_combined(self, pages, filename):
+        """
+        Stream the page files into one JSON array without holding all articles in memory.
+        
+        输出与 json.dump(all_articles, f, ensure_ascii=False, indent=2) 逐字节相同。
+        """
+        filepath = os.path.join(self.output_dir, filename)
+        total = 0
+        with open(filepath, 'w', encoding='utf-8') as out:
+            out.write("[")
+            for page_num in pages:
+                page_path = os.path.join(self.output_dir, f"phocuswire_page_{page_num}.json")
+                try:
+                    with open(page_path, 'r', encoding='utf-8') as f:
+                        articles_data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error reading {page_path}: {e}")
+                    continue
+                for article in articles_data:
+                    out.write(",\n  " if total else "\n  ")
+                    out.write(json.dumps(article, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+                    total += 1
+            out.write("\n]" if total else "]")
+        logger.info(f"Saved data to {filepath}")
+        return total
+    
     def run(self):
-        """Run the scraper for all pages."""
-        all_articles = []
+        """Run the scraper for all pages and return the number of articles in the combined file."""
         start_time = time.time()
         
+        self.ledger = ScrapeLedger.for_output_dir(self.output_dir)
+        all_pages = range(self.start_page, self.end_page + 1)
+        pages = [page_num for page_num in all_pages if not (self.resume and self.ledger.page_done(page_num))]
+        if len(pages) < len(all_pages):
+            logger.info(f"Resuming: skipping {len(all_pages) - len(pages)} finished pages")
+        
+        try:
+            if self.engine == "async":
+                asyncio.run(self.run_async(pages))
+            else:
+                self.run_threads(pages)
+            n_pages, n_ok, n_failed = self.ledger.summary()
+            logger.info(f"Ledger: {n_pages} pages finished, {n_ok} articles scraped, {n_failed} failed")
+        finally:
+            self.ledger.close()
+            self.ledger = None
+        
+        # Save all articles to a single file (streamed from the page files)
+        total = self.write_combined(all_pages, "phocuswire_all_articles.json")
+        
+        end_time = time.time()
+        elapsed_time = end_time - start_time
+        logger.info(f"Scraping completed in {elapsed_time:.2f} seconds. Total articles: {total}")
+        return total
+    
+    def run_threads(self, pages):
+        """Scrape pages one after another, each with its own thread pool."""
         # 使用tqdm创建进度条
-        for page_num in tqdm(range(self.start_page, self.end_page + 1), desc="Scraping pages"):
+        for page_num in tqdm(pages, desc="Scraping pages"):
             try:
                 articles_data = self.scrape_page(page_num)
-                all_articles.extend(articles_data)
+                
+                # 列表页抓取失败时不保存，该页保持未完成，下次运行时重试
+                if articles_data is None:
+                    self.skip_page(page_num)
+                    continue
                 
                 # Save progress after each page
-                self.save_to_json(articles_data, f"phocuswire_page_{page_num}.json")
+                self.save_page(articles_data, page_num)
                 
                 # 减少页面之间的延迟
-                time.sleep(random.uniform(1, 2))
+                time.sleep(random.uniform(*self.page_delay))
                 
             except Exception as e:
                 logger.error(f"Error processing page {page_num}: {e}")
                 continue
+    
+    async def run_async(self, pages):
+        """
+        Scrape pages with one pooled async client.
         
-        # Save all articles to a single file
-        self.save_to_json(all_articles, "phocuswire_all_articles.json")
+        最多 page_concurrency 个列表页同时处理，下一页的列表请求与上一页的文章请求流水线并行；
+        每页完成后立即保存。
+        """
+        page_slots = asyncio.Semaphore(self.page_concurrency)
         
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-        logger.info(f"Scraping completed in {elapsed_time:.2f} seconds. Total articles: {len(all_articles)}")
+        async with AsyncFetcher(self.headers, rate=self.rate, burst=self.max_workers,
+                                per_host=self.max_workers, max_connections=self.max_workers * 2) as fetcher:
+            async def scrape(page_num):
+                async with page_slots:
+                    articles_data = await self.scrape_page_async(fetcher, page_num)
+                # 列表页抓取失败时不保存，该页保持未完成，下次运行时重试
+                if articles_data is None:
+                    self.skip_page(page_num)
+                    return
+                # Save progress after each page
+                self.save_page(articles_data, page_num)
+            
+            tasks = [asyncio.create_task(scrape(page_num)) for page_num in pages]
+            for future in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Scraping pages"):
+                try:
+                    await future
+                except Exception as e:
+                    logger.error(f"Error processing page: {e}")
+            fetcher.report()
 
 if __name__ == "__main__":
     # Create output directory within the current script directory
@@ -261,6 +465,7 @@ if __name__ == "__main__":
         output_dir=output_dir,
         max_workers=8,        # 增加并行数量
         delay_min=0.3,        # 减少最小延迟
-        delay_max=1.0         # 减少最大延迟
+        delay_max=1.0,        # 减少最大延迟（仅线程引擎）
+        rate=8.0              # 异步引擎的全局请求速率上限（次/秒）
     )
     scraper.run() 
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+WordSwarm 性能基准测试（不依赖文章数据，使用合成的词和尺寸序列）
+
+用法:
+    python swarm_benchmark.py fixtures --words 200 --frames 600
+    python swarm_benchmark.py repulsion --words 100 500 1000
+    python swarm_benchmark.py layout --words 100 300 --frames 600
+"""
+import argparse
+import math
+import random
+import time
+
+from Box2D import b2World, b2PolygonShape, b2FixtureDef, b2Vec2
+
+from swarm_physics import (PHYSICS_BACKENDS, FixtureResizer, apply_repulsion, count_overlaps,
+                           make_physics_backend)
+
+
+def make_synthetic_words(n_words, seed=42):
+    """生成 n 个合成词的 (半宽, 半高, 尺寸相位)"""
+    rng = random.Random(seed)
+    return [(rng.uniform(1.0, 4.0), rng.uniform(0.6, 0.9), rng.uniform(0, 2 * math.pi))
+            for _ in range(n_words)]
+
+
+def synthetic_size(phase, frame, transition_frames=144):
+    """模拟两个月份之间的平滑尺寸插值，每个过渡周期内尺寸缓慢变化"""
+    return 0.5 + 1.25 * (1 + math.sin(phase + 2 * math.pi * frame / (transition_frames * 4)))
+
+
+def build_world(words, seed=42):
+    """按 WordSwarm.create_animation 的方式搭建物理世界：动态体 + 到中心的弹簧"""
+    rng = random.Random(seed)
+    world = b2World(gravity=(0, 0))
+    center = world.CreateStaticBody(position=(0, 0))
+    bodies = []
+    for half_w, half_h, _ in words:
+        angle = rng.uniform(0, 2 * math.pi)
+        radius = rng.uniform(1.0, 30.0)
+        x, y = radius * math.cos(angle), radius * math.sin(angle)
+        body = world.CreateDynamicBody(
+            position=(x, y),
+            linearDamping=0.8,
+            angularDamping=0.9,
+            fixtures=b2FixtureDef(
+                shape=b2PolygonShape(box=(half_w, half_h)),
+                density=1.0,
+                friction=0.3,
+                restitution=0.1
+            )
+        )
+        body.linearVelocity = b2Vec2(rng.uniform(-1.5, 1.5), rng.uniform(-1.5, 1.5))
+        world.CreateDistanceJoint(
+            bodyA=center,
+            bodyB=body,
+            anchorA=center.position,
+            anchorB=body.position,
+            frequencyHz=0.5,
+            dampingRatio=1.0,
+            length=math.sqrt(x * x + y * y)
+        )
+        bodies.append(body)
+    return world, bodies
+
+
+def bench_fixtures(n_words, n_frames, threshold):
+    """比较不同碰撞体更新策略下每帧的物理耗时（Step + 尺寸更新）"""
+    words = make_synthetic_words(n_words)
+    configs = [
+        ("rebuild", 0.0),        # 原始行为：每帧销毁重建
+        ("rebuild", threshold),
+        ("inplace", threshold),
+    ]
+    print(f"碰撞体更新基准: {n_words} 个词, {n_frames} 帧")
+    baseline = None
+    for mode, thr in configs:
+        world, bodies = build_world(words)
+        resizer = FixtureResizer(mode=mode, threshold=thr)
+        start = time.perf_counter()
+        for frame in range(n_frames):
+            world.Step(1.0/60.0, 8, 3)
+            for i, (body, (half_w, half_h, phase)) in enumerate(zip(bodies, words)):
+                size = synthetic_size(phase, frame)
+                resizer.resize(i, body, half_w * size, half_h * size)
+        elapsed = time.perf_counter() - start
+        per_frame = elapsed / n_frames * 1000
+        if baseline is None:
+            baseline = per_frame
+        print(f"  mode={mode:<8} threshold={thr:<5} 每帧 {per_frame:7.3f}ms  "
+              f"(x{baseline / per_frame:.2f})  更新 {resizer.stats['updated']} / 跳过 {resizer.stats['skipped']}")
+
+
+def apply_repulsion_naive(bodies, min_distance=1.5, strength=2.0):
+    """原始的 O(n²) 双重循环实现，作为基准对照"""
+    applied = 0
+    for i, body_a in enumerate(bodies):
+        for j, body_b in enumerate(bodies):
+            if i >= j:
+                continue
+            delta = body_b.position - body_a.position
+            distance = delta.length
+            if distance < min_distance and distance > 0.01:
+                delta.Normalize()
+                force = strength * (min_distance - distance)
+                body_a.ApplyForce(-delta * force, body_a.worldCenter, True)
+                body_b.ApplyForce(delta * force, body_b.worldCenter, True)
+                applied += 1
+    return applied
+
+
+def bench_repulsion(word_counts, repeats):
+    """比较 O(n²) 双重循环和空间哈希两种排斥力实现的单步耗时"""
+    print(f"词间排斥基准: 每种规模重复 {repeats} 次")
+    for n_words in word_counts:
+        # 需要持有 world 引用，否则 world 被回收后 bodies 会成为悬空指针
+        world, bodies = build_world(make_synthetic_words(n_words))
+        results = {}
+        for name, func in (("naive", apply_repulsion_naive), ("grid", apply_repulsion)):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                pairs = func(bodies)
+            results[name] = ((time.perf_counter() - start) / repeats * 1000, pairs)
+        (naive_ms, naive_pairs), (grid_ms, grid_pairs) = results["naive"], results["grid"]
+        status = "一致" if naive_pairs == grid_pairs else "不一致!"
+        print(f"  {n_words:>5} 个词: naive {naive_ms:8.2f}ms  grid {grid_ms:7.2f}ms  "
+              f"(x{naive_ms / grid_ms:.1f})  作用点对 {grid_pairs} ({status})")
+
+
+def build_backend(name, words, seed=42):
+    """用与 build_world 相同的初始位置和速度搭建指定的布局后端"""
+    rng = random.Random(seed)
+    backend = make_physics_backend(name)
+    for half_w, half_h, _ in words:
+        angle = rng.uniform(0, 2 * math.pi)
+        radius = rng.uniform(1.0, 30.0)
+        position = (radius * math.cos(angle), radius * math.sin(angle))
+        velocity = (rng.uniform(-1.5, 1.5), rng.uniform(-1.5, 1.5))
+        backend.add_body(position, velocity, (half_w, half_h))
+    return backend
+
+
+def bench_layout(word_counts, n_frames, sample_every):
+    """比较 Box2D 和 NumPy 布局后端的物理帧率，以及模拟过程中包围盒重叠的词对数量"""
+    print(f"布局后端基准: {n_frames} 帧, 每 {sample_every} 帧统计一次重叠")
+    for n_words in word_counts:
+        words = make_synthetic_words(n_words)
+        for name in PHYSICS_BACKENDS:
+            backend = build_backend(name, words)
+            overlaps = []
+            elapsed = 0.0
+            for frame in range(n_frames):
+                half_sizes = [(half_w * synthetic_size(phase, frame), half_h * synthetic_size(phase, frame))
+                              for half_w, half_h, phase in words]
+                start = time.perf_counter()
+                backend.step(half_sizes)
+                elapsed += time.perf_counter() - start
+                if frame % sample_every == 0 or frame == n_frames - 1:
+                    overlaps.append(count_overlaps(backend.positions(), half_sizes))
+            print(f"  {n_words:>5} 个词  {name:<6} {n_frames / elapsed:8.1f} 帧/秒  "
+                  f"重叠词对 平均 {sum(overlaps) / len(overlaps):7.1f}  最终 {overlaps[-1]}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="WordSwarm 性能基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fixtures = subparsers.add_parser("fixtures", help="碰撞体尺寸更新策略")
+    fixtures.add_argument("--words", type=int, default=200, help="词数量 (默认: 200)")
+    fixtures.add_argument("--frames", type=int, default=600, help="帧数 (默认: 600)")
+    fixtures.add_argument("--threshold", type=float, default=0.01,
+                          help="尺寸相对变化阈值 (默认: 0.01)")
+
+    repulsion = subparsers.add_parser("repulsion", help="词间排斥力邻域搜索")
+    repulsion.add_argument("--words", type=int, nargs="+", default=[100, 500, 1000],
+                           help="要测试的词数量 (默认: 100 500 1000)")
+    repulsion.add_argument("--repeats", type=int, default=5, help="每种规模的重复次数 (默认: 5)")
+
+    layout = subparsers.add_parser("layout", help="Box2D 与 NumPy 布局后端对比")
+    layout.add_argument("--words", type=int, nargs="+", default=[100, 300],
+                        help="要测试的词数量 (默认: 100 300)")
+    layout.add_argument("--frames", type=int, default=600, help="帧数 (默认: 600)")
+    layout.add_argument("--sample-every", type=int, default=30,
+                        help="每隔多少帧统计一次重叠 (默认: 30)")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    if args.command == "fixtures":
+        bench_fixtures(args.words, args.frames, args.threshold)
+    elif args.command == "repulsion":
+        bench_repulsion(args.words, args.repeats)
+    elif args.command == "layout":
+        bench_layout(args.words, args.frames, args.sample_every)
@@ -0,0 +1,157 @@
+import math
+import os
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pygame
+
+# pygame 2.1.3 起提供 tobytes，旧版本只有 tostring
+_surface_to_bytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+
+
+class StageTimer:
+    """按阶段累计耗时（physics / render / encode），用于定位渲染瓶颈"""
+
+    def __init__(self):
+        self.totals = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def report(self, frame_count):
+        """打印每个阶段的总耗时和每帧平均耗时"""
+        if not self.totals:
+            return
+        frame_count = max(frame_count, 1)
+        total = sum(self.totals.values())
+        print("各阶段耗时统计:")
+        for name, seconds in self.totals.items():
+            share = seconds / total * 100 if total > 0 else 0.0
+            print(f"  {name:<8} 总计 {seconds:8.2f}s  每帧 {seconds / frame_count * 1000:7.2f}ms  ({share:5.1f}%)")
+        print(f"  {'total':<8} 总计 {total:8.2f}s  每帧 {total / frame_count * 1000:7.2f}ms")
+
+
+class FrameEncoder:
+    """
+    把 pygame Surface 的原始 RGB 数据直接写入常驻 ffmpeg 进程的 stdin，
+    不再为每一帧编码/解码 PNG，也不占用临时磁盘空间。
+
+    Args:
+        output_path: 输出视频路径
+        size: 帧尺寸 (width, height)
+        fps: 帧率
+        crf: libx264 质量参数
+        dump_frames_dir: 调试用，若指定则同时把每一帧保存为 PNG
+        start_index: 调试 PNG 的起始编号（分段渲染时为片段在整条时间轴上的起始帧）
+    """
+
+    def __init__(self, output_path, size, fps=30, crf=18, dump_frames_dir=None, ffmpeg_bin="ffmpeg",
+                 start_index=0):
+        self.output_path = output_path
+        self.width, self.height = size
+        self.fps = fps
+        self.crf = crf
+        self.dump_frames_dir = dump_frames_dir
+        self.ffmpeg_bin = ffmpeg_bin
+        self.start_index = start_index
+        self.frame_count = 0
+        self.process = None
+
+    def build_command(self):
+        return [
+            self.ffmpeg_bin, "-y", "-loglevel", "error",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{self.width}x{self.height}",
+            "-framerate", str(self.fps),
+            "-i", "-",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", str(self.crf),
+            self.output_path,
+        ]
+
+    def open(self):
+        if self.dump_frames_dir:
+            Path(self.dump_frames_dir).mkdir(parents=True, exist_ok=True)
+        self.process = subprocess.Popen(self.build_command(), stdin=subprocess.PIPE)
+        return self
+
+    def write(self, surface):
+        """写入一帧"""
+        if self.process is None:
+            raise RuntimeError("FrameEncoder 尚未打开，请先调用 open()")
+        if surface.get_size() != (self.width, self.height):
+            raise ValueError(f"帧尺寸 {surface.get_size()} 与编码器尺寸 {(self.width, self.height)} 不一致")
+        self.process.stdin.write(_surface_to_bytes(surface, "RGB"))
+        if self.dump_frames_dir:
+            frame_name = f"frame_{self.start_index + self.frame_count:04d}.png"
+            pygame.image.save(surface, os.path.join(self.dump_frames_dir, frame_name))
+        self.frame_count += 1
+
+    def close(self):
+        """关闭管道并等待 ffmpeg 完成编码"""
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        return_code = self.process.wait()
+        self.process = None
+        if return_code != 0:
+            raise RuntimeError(f"ffmpeg 编码失败，返回码 {return_code}")
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.process is not None:
+            # 出错时不等待编码完成，直接终止 ffmpeg
+            self.process.stdin.close()
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+            return False
+        self.close()
+        return False
+
+
+def plan_segments(total_frames, transition_frames, n_segments):
+    """
+    把 [0, total_frames) 切分为最多 n_segments 个连续片段，片段边界对齐到日期过渡的起点
+
+    Returns:
+        [(start_frame, end_frame), ...]
+    """
+    n_transitions = math.ceil(total_frames / transition_frames)
+    per_segment = max(1, math.ceil(n_transitions / max(1, n_segments)))
+    segments = []
+    for t in range(0, n_transitions, per_segment):
+        start = t * transition_frames
+        end = min((t + per_segment) * transition_frames, total_frames)
+        segments.append((start, end))
+    return segments
+
+
+def concat_segments(segment_paths, output_path, ffmpeg_bin="ffmpeg"):
+    """用 ffmpeg concat demuxer 无损拼接（-c copy，不重新编码）各片段"""
+    list_path = output_path + ".segments.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        subprocess.run(
+            [ffmpeg_bin, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", list_path, "-c", "copy", output_path],
+            check=True
+        )
+    finally:
+        os.remove(list_path)
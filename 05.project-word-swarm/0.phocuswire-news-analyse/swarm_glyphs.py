@@ -0,0 +1,116 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class GlyphCache:
+    """
+    WordObj 的字体 / 文字表面缓存，避免每帧为每个词重新构造字体和栅格化文字。
+
+    - 字体按字号缓存（LRU）
+    - 渲染结果按 (text, color, 量化后的 size) 缓存（LRU）
+    - 每个 (text, color) 先以 master_size 渲染一张高分辨率母版，
+      较小的尺寸通过 pygame.transform.smoothscale 从母版缩放得到
+
+    Args:
+        size_step: size 的量化步长，越大命中率越高、尺寸过渡越不平滑
+        master_size: 母版字形对应的 size（一般取 WordSwarm.max_size）
+        base_font_size: size=1.0 时的字号，与 WordObj 原实现保持一致
+        max_fonts: 字体缓存上限
+        max_surfaces: 文字表面缓存上限
+    """
+
+    def __init__(self, size_step=0.05, master_size=3.0, base_font_size=32,
+                 max_fonts=32, max_surfaces=4096):
+        self.size_step = size_step
+        self.master_size = master_size
+        self.base_font_size = base_font_size
+        self.max_fonts = max_fonts
+        self.max_surfaces = max_surfaces
+        self.fonts = OrderedDict()
+        self.masters = OrderedDict()
+        self.surfaces = OrderedDict()
+        self.stats = {
+            "font_hits": 0, "font_misses": 0,
+            "surface_hits": 0, "surface_misses": 0,
+            "scaled": 0, "rendered": 0,
+        }
+
+    def quantize(self, size):
+        """把 size 对齐到 size_step 的整数倍"""
+        steps = max(1, int(round(size / self.size_step)))
+        return round(steps * self.size_step, 6)
+
+    def get_font(self, point_size):
+        """按字号获取（并缓存）字体"""
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = self.fonts.get(point_size)
+        if font is not None:
+            self.fonts.move_to_end(point_size)
+            self.stats["font_hits"] += 1
+            return font
+        self.stats["font_misses"] += 1
+        font = pygame.font.Font(None, point_size)
+        self.fonts[point_size] = font
+        if len(self.fonts) > self.max_fonts:
+            self.fonts.popitem(last=False)
+        return font
+
+    def _render_direct(self, text, color, size):
+        self.stats["rendered"] += 1
+        font = self.get_font(max(1, int(self.base_font_size * size)))
+        return font.render(text, True, color)
+
+    def _get_master(self, text, color):
+        key = (text, color)
+        master = self.masters.get(key)
+        if master is not None:
+            self.masters.move_to_end(key)
+            return master
+        master = self._render_direct(text, color, self.master_size)
+        self.masters[key] = master
+        if len(self.masters) > self.max_surfaces:
+            self.masters.popitem(last=False)
+        return master
+
+    def render(self, text, color, size):
+        """返回指定尺寸的文字表面（调用方不应修改返回的 Surface）"""
+        q_size = self.quantize(size)
+        key = (text, color, q_size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.stats["surface_hits"] += 1
+            return surface
+
+        self.stats["surface_misses"] += 1
+        if q_size < self.master_size:
+            # 从高分辨率母版缩放，不再重新栅格化
+            master = self._get_master(text, color)
+            scale = q_size / self.master_size
+            target = (max(1, int(round(master.get_width() * scale))),
+                      max(1, int(round(master.get_height() * scale))))
+            surface = pygame.transform.smoothscale(master, target)
+            self.stats["scaled"] += 1
+        else:
+            surface = self._render_direct(text, color, q_size)
+
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def hit_rate(self):
+        lookups = self.stats["surface_hits"] + self.stats["surface_misses"]
+        return self.stats["surface_hits"] / lookups if lookups else 0.0
+
+    def report(self):
+        """打印缓存命中统计，用于调节 size_step"""
+        s = self.stats
+        print(f"字形缓存: 表面命中 {s['surface_hits']} / 未命中 {s['surface_misses']} "
+              f"(命中率 {self.hit_rate() * 100:.1f}%), "
+              f"缩放生成 {s['scaled']}, 直接渲染 {s['rendered']}, "
+              f"字体命中 {s['font_hits']} / 未命中 {s['font_misses']} "
+              f"(size_step={self.size_step})")
+
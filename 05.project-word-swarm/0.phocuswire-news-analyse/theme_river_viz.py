@@ -1,10 +1,9 @@
 import sys
 import os
 import json
-import glob
 import argparse
+import time
 from datetime import datetime
-import re
 from pathlib import Path
 from tqdm import tqdm
 import numpy as np
@@ -13,13 +12,25 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from matplotlib.colors import LinearSegmentedColormap
 from sklearn.feature_extraction.text import CountVectorizer
-from gensim import corpora, models
+from gensim import corpora
 from gensim.models import LdaModel
 from gensim.utils import simple_preprocess
 from collections import defaultdict
 import matplotlib.dates as mdates
 from scipy.interpolate import make_interp_spline
 
+from phocuswire_corpus import CorpusStore
+from phocuswire_phrases import PhraseMatcher
+from phocuswire_topics import (RANDOM_STATE, SWEEP_PASSES, LdaCache, OnlineLdaState, StreamingBowCorpus,
+                               coherence_sweep, extend_dictionary, grow_lda_vocabulary, month_fingerprints,
+                               month_topic_distributions, topic_stability, train_lda)
+from phocuswire_tokens import TokenCache, TokenDocuments
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 # 英文停用词列表 (从原文件复制)
 ENGLISH_STOP_WORDS = {
     # 人称代词
@@ -137,6 +148,25 @@ FILTERED_BIGRAMS = {
     'full story', 'full article', 'more information',
 }
 
+# 编译后的短语匹配器：单遍扫描同时提取重要双词短语和单词
+PHRASE_MATCHER = PhraseMatcher(IMPORTANT_BIGRAMS, blocked=FILTERED_BIGRAMS,
+                               stop_words=ENGLISH_STOP_WORDS | FILTERED_WORDS)
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB），平台不支持时返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def report_peak_rss(stage):
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"{stage}后峰值内存: {peak:.0f} MB")
+
+
 class ThemeRiverViz:
     def __init__(self, data_dir="output", output_dir="theme_river_results"):
         self.data_dir = data_dir
@@ -150,29 +180,21 @@ class ThemeRiverViz:
         self.topic_distributions = {}
         self.topic_keywords = {}
         self.num_topics = 8  # 默认主题数量
+        self.preprocess_fingerprint = None
         
         # 创建输出目录
         Path(output_dir).mkdir(parents=True, exist_ok=True)
     
     def load_data(self):
-        """从JSON文件加载文章数据"""
+        """从JSON文件加载文章数据（经由共享的语料缓存）"""
         # 支持多种文件模式，包括直接的JSON文件和嵌套目录
-        patterns = [
-            os.path.join(self.data_dir, "phocuswire_page_*.json"),
-            os.path.join(self.data_dir, "*.json"),
-            os.path.join(self.data_dir, "**", "*.json")
-        ]
-        
-        json_files = []
-        for pattern in patterns:
-            json_files.extend(glob.glob(pattern, recursive=True))
-        
-        # 去重
-        json_files = list(set(json_files))
-        
-        print(f"找到 {len(json_files)} 个JSON文件")
+        store = CorpusStore(self.data_dir, patterns=(
+            "phocuswire_page_*.json",
+            "*.json",
+            os.path.join("**", "*.json")
+        ))
         
-        if not json_files:
+        if not store.source_files():
             print(f"警告: 在目录 '{self.data_dir}' 中未找到JSON文件")
             print("请检查数据目录路径是否正确。可用的目录内容:")
             
@@ -195,137 +217,83 @@ class ThemeRiverViz:
                 print(f"列出目录内容时出错: {e}")
             
             return []
-            
-        all_articles = []
-        
-        for json_file in tqdm(json_files, desc="加载文章数据"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # 处理不同的JSON格式
-                    if isinstance(data, list):
-                        articles = data
-                    elif isinstance(data, dict) and 'articles' in data:
-                        articles = data['articles']
-                    else:
-                        articles = [data]  # 单篇文章
-                        
-                    all_articles.extend(articles)
-            except Exception as e:
-                print(f"读取文件 {json_file} 时出错: {e}")
         
-        print(f"总共加载了 {len(all_articles)} 篇文章")
-        self.articles = all_articles
-        return all_articles
+        self.articles = store.load()
+        return self.articles
         
-    def parse_date(self, date_str):
-        """解析日期字符串为日期对象"""
-        try:
-            date_formats = [
-                "%B %d, %Y",
-                "%d %B %Y",
-                "%B %Y",
-                "%Y-%m-%d",
-            ]
-            
-            for date_format in date_formats:
-                try:
-                    return datetime.strptime(date_str.strip(), date_format)
-                except ValueError:
-                    continue
-                    
-            return None
-        except:
-            return None
-    
     def preprocess_text(self, text):
         """预处理文本，返回单词列表"""
-        if not text:
-            return []
-            
-        # 移除非字母字符，但保留空格
-        text = re.sub(r'[^a-zA-Z\s]', ' ', text.lower())
-        
-        # 分词
-        words = [word.strip() for word in text.split() if word.strip()]
-        
-        # 提取单词和双词短语
-        processed_terms = []
-        
-        # 处理双词短语
-        for i in range(len(words) - 1):
-            bigram = f"{words[i]} {words[i+1]}"
-            # 如果是重要的双词短语，添加到结果中
-            if bigram in IMPORTANT_BIGRAMS and bigram not in FILTERED_BIGRAMS:
-                processed_terms.append(bigram)
-        
-        # 处理单个词
-        for i, word in enumerate(words):
-            # 检查这个词是否是任何重要双词短语的一部分
-            is_part_of_bigram = False
-            if i < len(words) - 1:
-                current_bigram = f"{word} {words[i+1]}"
-                if current_bigram in IMPORTANT_BIGRAMS:
-                    is_part_of_bigram = True
-            if i > 0:
-                previous_bigram = f"{words[i-1]} {word}"
-                if previous_bigram in IMPORTANT_BIGRAMS:
-                    is_part_of_bigram = True
-            
-            # 如果不是双词短语的一部分，且符合其他条件，则添加这个单词
-            if not is_part_of_bigram and word not in ENGLISH_STOP_WORDS and word not in FILTERED_WORDS and len(word) > 2:
-                processed_terms.append(word)
-        
-        return processed_terms
+        return PHRASE_MATCHER.preprocess(text)
     
     def process_articles(self):
-        """处理文章数据，按日期分组并提取文本"""
-        articles_by_date = {}
-        texts_by_date = {}
+        """
+        处理文章数据，按日期分组并提取文本
+
+        每个时间点的文本保存为 TokenDocuments（只记录文章在分词缓存中的位置），
+        之后按需从磁盘还原分词结果，不在内存中保留文章和分词列表。
+
+        Returns:
+            {时间点: TokenDocuments}
+        """
+        references_by_date = {}
         dates = set()
         
+        # 分词结果按 URL + 预处理配置缓存，相同配置重新运行时跳过分词
+        token_cache = TokenCache.for_data_dir(
+            self.data_dir, self.preprocess_text,
+            phrase_matcher=PHRASE_MATCHER.fingerprint
+        )
+        
         for article in tqdm(self.articles, desc="处理文章"):
             try:
-                date_str = article.get('date')
-                if not date_str:
-                    continue
-                    
-                date_obj = self.parse_date(date_str)
-                if not date_obj:
+                # 月份在语料编译时已统一解析（日期缺失或无法解析时为空）
+                year_month = article.get('month')
+                if not year_month:
                     continue
-                
-                # 将日期转换为年月格式
-                year_month = date_obj.strftime("%Y-%m")
                 dates.add(year_month)
                 
                 # 预处理文章内容
                 content = article.get('content', '')
-                processed_words = self.preprocess_text(content)
+                processed_words = token_cache.tokenize(article.get('url'), content)
                 
                 # 至少需要10个词才有意义
                 if len(processed_words) < 10:
                     continue
                 
-                # 按日期分组文章
-                if year_month not in articles_by_date:
-                    articles_by_date[year_month] = []
-                    texts_by_date[year_month] = []
+                # 按日期分组文章（只保留文档引用）
+                if year_month not in references_by_date:
+                    references_by_date[year_month] = []
                 
-                articles_by_date[year_month].append(article)
-                texts_by_date[year_month].append(processed_words)
+                references_by_date[year_month].append(token_cache.reference(article.get('url'), processed_words))
                     
             except Exception as e:
                 print(f"处理文章时出错: {e}")
         
+        token_cache.save()
+        token_cache.report()
+        self.preprocess_fingerprint = token_cache.fingerprint
         self.dates = sorted(list(dates))
-        self.article_texts_by_date = texts_by_date
+        self.article_texts_by_date = {
+            date: token_cache.documents(references) for date, references in references_by_date.items()
+        }
         
         print(f"按日期分组后，共有 {len(self.dates)} 个时间点")
-        return articles_by_date
+        report_peak_rss("处理文章")
+        return self.article_texts_by_date
     
-    def build_lda_model(self, num_topics=8):
-        """构建LDA主题模型"""
+    def all_documents(self):
+        """按时间点顺序拼接的全部文档（可重复迭代，流式读取）"""
+        return TokenDocuments.concat(self.article_texts_by_date[date] for date in self.dates)
+    
+    def build_lda_model(self, num_topics=8, workers=1, use_cache=True):
+        """
+        构建LDA主题模型
+
+        Args:
+            num_topics: 主题数量（文档数超过100时在其附近搜索相干性最高的主题数）
+            workers: 搜索主题数时并行训练候选模型的进程数
+            use_cache: 是否读写数据目录中的词典 / 语料 / 模型缓存（分词结果和参数不变时跳过训练）
+        """
         self.num_topics = num_topics
         
         print("构建LDA主题模型...")
@@ -336,77 +304,76 @@ class ThemeRiverViz:
             print("请确保数据目录包含有效的文章数据")
             return None
             
-        # 合并所有文档，创建字典和语料库
-        all_texts = []
-        for date in self.dates:
-            all_texts.extend(self.article_texts_by_date[date])
+        # 合并所有文档，创建字典和语料库（流式读取分词缓存，不在内存中展开）
+        all_texts = self.all_documents()
             
-        if not all_texts:
+        if not len(all_texts):
             print("错误：处理后的文本为空，无法构建LDA模型")
             return None
             
         print(f"使用 {len(all_texts)} 篇文档构建LDA模型")
         
-        # 创建字典
-        self.dictionary = corpora.Dictionary(all_texts)
-        
-        # 过滤极端频率的词 - 调整参数以获得更好的主题区分
-        self.dictionary.filter_extremes(no_below=2, no_above=0.85)
+        # 词典、语料和模型按分词结果 + 预处理配置 + 训练参数缓存
+        lda_cache = None
+        if use_cache:
+            lda_cache = LdaCache.for_data_dir(
+                self.data_dir, self.dates, self.article_texts_by_date,
+                preprocess=self.preprocess_fingerprint, no_below=2, no_above=0.85
+            )
+        cached_inputs = lda_cache.load_inputs() if lda_cache else None
         
-        if len(self.dictionary) == 0:
-            print("错误：过滤后的词典为空，请调整过滤参数")
-            return None
+        if cached_inputs:
+            self.dictionary, self.corpus = cached_inputs
+            print(f"从缓存加载词典（{len(self.dictionary)} 个独特词条）和语料库")
+        else:
+            # 创建字典
+            self.dictionary = corpora.Dictionary(all_texts)
             
-        print(f"词典中包含 {len(self.dictionary)} 个独特词条")
-        
-        # 创建语料库
-        self.corpus = [self.dictionary.doc2bow(text) for text in all_texts]
-        
-        # 检查语料库是否为空
-        if not any(self.corpus):
-            print("错误：语料库为空，无法构建LDA模型")
-            return None
+            # 过滤极端频率的词 - 调整参数以获得更好的主题区分
+            self.dictionary.filter_extremes(no_below=2, no_above=0.85)
+            
+            if len(self.dictionary) == 0:
+                print("错误：过滤后的词典为空，请调整过滤参数")
+                return None
+                
+            print(f"词典中包含 {len(self.dictionary)} 个独特词条")
+            
+            # 创建语料库（迭代时才从分词缓存生成词袋向量）
+            self.corpus = StreamingBowCorpus(all_texts, self.dictionary)
+            
+            # 检查语料库是否为空
+            if not any(self.corpus):
+                print("错误：语料库为空，无法构建LDA模型")
+                return None
+            
+            if lda_cache:
+                self.corpus = lda_cache.save_inputs(self.dictionary, self.corpus)
         
         # 尝试不同数量的主题，寻找最优主题数量
-        if len(all_texts) > 100 and num_topics > 5:
+        sweep = len(all_texts) > 100 and num_topics > 5
+        model_config = dict(num_topics=num_topics, sweep=sweep,
+                            passes=SWEEP_PASSES if sweep else 15, random_state=RANDOM_STATE)
+        cached_model = lda_cache.load_model(model_config) if lda_cache else None
+        
+        coherence_scores = None
+        if cached_model:
+            self.topic_model, meta = cached_model
+            self.num_topics = meta["num_topics"]
+            print(f"从缓存加载LDA模型（{self.num_topics} 个主题）")
+        elif sweep:
             print("尝试确定最佳主题数量...")
-            coherence_scores = []
-            tested_models = []
             
             # 测试范围内的主题数量
             min_topics = max(2, num_topics - 3)
             max_topics = min(num_topics + 3, 15)
             
-            for n_topics in range(min_topics, max_topics + 1):
-                print(f"测试 {n_topics} 个主题...")
-                temp_model = LdaModel(
-                    corpus=self.corpus,
-                    id2word=self.dictionary,
-                    num_topics=n_topics,
-                    passes=13,
-                    alpha='auto',
-                    eta='auto',
-                    random_state=42  # 设置随机种子以获得可重复的结果
-                )
-                
-                # 计算主题相干性
-                cm = models.CoherenceModel(
-                    model=temp_model, 
-                    texts=all_texts, 
-                    dictionary=self.dictionary, 
-                    coherence='c_v'
-                )
-                coherence = cm.get_coherence()
-                coherence_scores.append(coherence)
-                tested_models.append(temp_model)
-                print(f"主题数量 {n_topics} 的相干性得分: {coherence:.4f}")
-            
-            # 选择相干性最高的模型
-            best_index = coherence_scores.index(max(coherence_scores))
-            best_num_topics = min_topics + best_index
-            self.topic_model = tested_models[best_index]
+            # 候选模型并行训练，相干性共用一份滑动窗口统计，只保留得分最高的模型
+            self.topic_model, best_num_topics, coherence_scores = coherence_sweep(
+                self.corpus, self.dictionary, all_texts, range(min_topics, max_topics + 1),
+                passes=SWEEP_PASSES, workers=workers
+            )
             self.num_topics = best_num_topics
-            print(f"选择最佳主题数量: {best_num_topics}，相干性得分: {coherence_scores[best_index]:.4f}")
+            print(f"选择最佳主题数量: {best_num_topics}，相干性得分: {coherence_scores[best_num_topics]:.4f}")
         else:
             # 直接使用指定的主题数量
             self.topic_model = LdaModel(
@@ -416,47 +383,173 @@ class ThemeRiverViz:
                 passes=15,  # 增加传递次数以获得更好的收敛
                 alpha='auto',
                 eta='auto',
-                random_state=42  # 设置随机种子以获得可重复的结果
+                random_state=RANDOM_STATE  # 设置随机种子以获得可重复的结果
             )
             
         # 检测并合并相似主题
         self.detect_similar_topics()
             
         # 获取每个主题的关键词
+        self.extract_topic_keywords()
+        
+        # 缓存中已有各时间点的主题分布（推断结果与模型的随机状态有关，直接复用保存时的结果）
+        if cached_model:
+            self.topic_distributions = meta["topic_distributions"]
+            self.save_online_state(num_topics, force=False)
+            return self.topic_model
+        
+        # 按日期计算主题分布：复用训练时的词袋语料批量推断，再按月份分段求和
+        doc_months = np.repeat(np.arange(len(self.dates)),
+                               [len(self.article_texts_by_date[date]) for date in self.dates])
+        month_topics = month_topic_distributions(self.topic_model, self.corpus, doc_months, len(self.dates))
+        self.topic_distributions = dict(zip(self.dates, month_topics))
+        
+        if lda_cache:
+            lda_cache.save_model(model_config, self.topic_model, self.num_topics,
+                                 self.topic_distributions, coherence_scores)
+            self.save_online_state(num_topics)
+        
+        report_peak_rss("构建LDA模型")
+        return self.topic_model
+    
+    def extract_topic_keywords(self, topn=10):
+        """提取每个主题的前 topn 个关键词"""
         self.topic_keywords = {}
         for i in range(self.num_topics):
-            # 提取前10个关键词
-            topic_words = [word for word, _ in self.topic_model.show_topic(i, topn=10)]
+            topic_words = [word for word, _ in self.topic_model.show_topic(i, topn=topn)]
             self.topic_keywords[i] = topic_words
-        
-        # 按日期计算主题分布
-        self.topic_distributions = {}
-        
-        for date in tqdm(self.dates, desc="计算各时间点主题分布"):
-            date_texts = self.article_texts_by_date[date]
-            date_corpus = [self.dictionary.doc2bow(text) for text in date_texts]
+        return self.topic_keywords
+    
+    def online_state(self, num_topics):
+        """增量模式的模型状态（按预处理配置、词典参数和请求的主题数区分）"""
+        return OnlineLdaState.for_data_dir(
+            self.data_dir, preprocess=self.preprocess_fingerprint, no_below=2, no_above=0.85,
+            num_topics=num_topics, random_state=RANDOM_STATE
+        )
+    
+    def save_online_state(self, num_topics, force=True):
+        """把当前（完整训练的）模型保存为增量模式的起点；force=False 时只在还没有状态时保存"""
+        state = self.online_state(num_topics)
+        if not force and state.exists():
+            return
+        state.save(self.topic_model, self.dictionary,
+                   month_fingerprints(self.dates, self.article_texts_by_date), self.topic_distributions)
+    
+    def update_lda_model(self, num_topics=8, workers=1, max_new_terms=500):
+        """
+        增量更新LDA模型：只用新增月份的文档在线更新（LdaModel.update），已有月份的主题分布保持不变
+
+        没有可用的增量状态时退回 build_lda_model 完整训练。
+
+        Args:
+            num_topics: 主题数量（与完整训练时的参数一致才能找到对应的状态）
+            workers: 退回完整训练时搜索主题数的进程数
+            max_new_terms: 每个新增月份最多追加到词典中的新词数
+        """
+        state = self.online_state(num_topics)
+        loaded = state.load()
+        if loaded is None:
+            print("没有可增量更新的LDA模型，完整训练...")
+            return self.build_lda_model(num_topics=num_topics, workers=workers)
+        
+        model, dictionary, meta = loaded
+        fingerprints = dict(meta["month_fingerprints"])
+        topic_distributions = meta["topic_distributions"]
+        current = month_fingerprints(self.dates, self.article_texts_by_date)
+        
+        changed = [date for date in self.dates if date in fingerprints and fingerprints[date] != current[date]]
+        if changed:
+            print(f"警告: {len(changed)} 个已训练月份的文章有变化（{', '.join(changed[:5])}），"
+                  f"增量模式只加入新月份，建议完整重新训练")
+        
+        new_dates = [date for date in self.dates if date not in fingerprints]
+        print(f"增量更新LDA模型（{model.num_topics} 个主题，{model.num_terms} 个词条）：新增 {len(new_dates)} 个月份")
+        
+        for date in new_dates:
+            start = time.perf_counter()
+            texts = self.article_texts_by_date[date]
             
-            # 初始化主题分布
-            topic_dist = np.zeros(self.num_topics)
+            # 词典只在末尾追加新词，模型的主题-词矩阵随之扩展
+            added = extend_dictionary(dictionary, texts, no_below=2, no_above=0.85, max_new_terms=max_new_terms)
+            grow_lda_vocabulary(model, dictionary)
             
-            # 计算所有文档的平均主题分布
-            doc_count = 0
-            for doc_bow in date_corpus:
-                if not doc_bow:  # 跳过空文档
-                    continue
-                    
-                doc_topics = self.topic_model[doc_bow]
-                for topic_id, prob in doc_topics:
-                    topic_dist[topic_id] += prob
-                doc_count += 1
+            month_corpus = [dictionary.doc2bow(text) for text in texts]
+            if any(month_corpus):
+                model.update(month_corpus)
             
-            # 计算平均值
-            if doc_count > 0:
-                topic_dist /= doc_count
-                
-            self.topic_distributions[date] = topic_dist
+            topic_distributions[date] = month_topic_distributions(
+                model, month_corpus, np.zeros(len(month_corpus), dtype=np.int64), 1
+            )[0]
+            fingerprints[date] = current[date]
+            print(f"  {date}: {len(texts)} 篇文档，新增 {len(added)} 个词条，用时 {time.perf_counter() - start:.2f}s")
+        
+        if new_dates:
+            state.save(model, dictionary, fingerprints, topic_distributions, meta.get("updates", []) + new_dates)
         
+        self.topic_model = model
+        self.dictionary = dictionary
+        self.corpus = None
+        self.num_topics = model.num_topics
+        self.detect_similar_topics()
+        self.extract_topic_keywords()
+        self.topic_distributions = {date: topic_distributions[date] for date in self.dates}
         return self.topic_model
+    
+    def stability_report(self, passes=None):
+        """
+        比较当前（增量更新后的）模型与在全部文档上完整重新训练的模型
+
+        两个模型使用同一个词典和相同的主题数，主题按相似度一一匹配后，
+        输出每个主题的相似度、前10个关键词的重合度，以及各月主题分布的平均差异。
+
+        Args:
+            passes: 完整训练的遍数（默认与当前模型相同）
+
+        Returns:
+            报告字典，同时保存为输出目录中的 lda_stability_report.json
+        """
+        if not self.topic_model:
+            print("没有可比较的LDA模型")
+            return None
+        
+        corpus = StreamingBowCorpus(self.all_documents(), self.dictionary)
+        doc_months = np.repeat(np.arange(len(self.dates)),
+                               [len(self.article_texts_by_date[date]) for date in self.dates])
+        
+        start = time.perf_counter()
+        reference = train_lda(corpus, self.dictionary, self.num_topics, passes or self.topic_model.passes)
+        retrain_seconds = time.perf_counter() - start
+        
+        matches = topic_stability(self.topic_model, reference)
+        
+        # 按匹配关系重排完整训练模型的主题，再比较各月的主题分布
+        reference_topics = [match["reference_topic"] for match in matches]
+        reference_distributions = month_topic_distributions(reference, corpus, doc_months, len(self.dates))
+        distributions = np.array([self.topic_distributions[date] for date in self.dates])
+        distribution_gap = np.abs(distributions - reference_distributions[:, reference_topics]).sum(axis=1) / 2
+        
+        print(f"\n主题稳定性（增量模型 vs 完整重新训练，重新训练用时 {retrain_seconds:.1f}s）:")
+        for match in matches:
+            words = ', '.join(self.topic_keywords[match['topic']][:5])
+            print(f"  主题 {match['topic'] + 1} <-> 主题 {match['reference_topic'] + 1}: "
+                  f"相似度 {match['similarity']:.3f}，前10词重合 {match['top_word_overlap']:.2f}  ({words})")
+        mean_similarity = float(np.mean([match["similarity"] for match in matches]))
+        print(f"平均相似度 {mean_similarity:.3f}，各月主题分布的平均差异（总变差距离）{distribution_gap.mean():.3f}，"
+              f"最大 {distribution_gap.max():.3f}（{self.dates[int(distribution_gap.argmax())]}）")
+        
+        report = {
+            "num_topics": self.num_topics,
+            "num_terms": len(self.dictionary),
+            "retrain_seconds": retrain_seconds,
+            "mean_similarity": mean_similarity,
+            "topics": matches,
+            "month_distribution_gap": dict(zip(self.dates, distribution_gap.tolist())),
+        }
+        output_path = os.path.join(self.output_dir, "lda_stability_report.json")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"稳定性报告已保存到: {output_path}")
+        return report
         
     def detect_similar_topics(self, similarity_threshold=0.7):
         """检测并处理相似主题"""
@@ -799,6 +892,7 @@ class ThemeRiverViz:
                 article = {
                     "title": f"Sample Article about {main_topic}",
                     "date": current_date.strftime("%B %d, %Y"),
+                    "month": month_str,  # 与语料缓存中的 month 列一致
                     "content": " ".join(content)
                 }
                 
@@ -824,6 +918,16 @@ def parse_arguments():
                         help="保存可视化结果的输出目录")
     parser.add_argument("--topics", type=int, default=10,
                         help="设置LDA主题数量 (默认: 10)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="搜索主题数时并行训练的进程数 (默认: CPU核心数)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="只用新增月份的文章在线更新上次训练的LDA模型")
+    parser.add_argument("--max-new-terms", type=int, default=500,
+                        help="增量更新时每个月最多追加的新词数 (默认: 500)")
+    parser.add_argument("--stability-report", action="store_true",
+                        help="与完整重新训练的模型比较主题稳定性")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不读写LDA词典 / 语料 / 模型缓存，重新训练")
     parser.add_argument("--sample", action="store_true",
                         help="使用示例数据而不是尝试加载实际数据")
     
@@ -851,7 +955,15 @@ if __name__ == "__main__":
     visualizer.process_articles()
     
     # 构建LDA模型
-    model = visualizer.build_lda_model(num_topics=args.topics)
+    if args.incremental:
+        model = visualizer.update_lda_model(num_topics=args.topics, workers=args.workers,
+                                            max_new_terms=args.max_new_terms)
+    else:
+        model = visualizer.build_lda_model(num_topics=args.topics, workers=args.workers,
+                                            use_cache=not args.no_cache)
+    
+    if model and args.stability_report:
+        visualizer.stability_report()
     
     if model:
         # 创建主题河流可视化
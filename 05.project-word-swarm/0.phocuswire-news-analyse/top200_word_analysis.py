@@ -1,6 +1,4 @@
-import json
 import os
-import glob
 from collections import Counter
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -12,6 +10,9 @@ from wordcloud import WordCloud
 import numpy as np
 from pathlib import Path
 
+from phocuswire_corpus import load_articles
+from phocuswire_tokens import TokenCache
+
 # 英文停用词列表(内置)
 ENGLISH_STOP_WORDS = {
     'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', "you're", 
@@ -83,23 +84,9 @@ class Top200WordAnalyzer:
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
     # TODO: use different data processing methods or
     def load_data(self):
-        """从JSON文件加载文章数据"""
-        json_files = glob.glob(os.path.join(self.data_dir, "phocuswire_page_*.json"))
-        all_articles = []
-        
-        print(f"找到 {len(json_files)} 个JSON文件")
-        
-        for json_file in tqdm(json_files, desc="加载文章数据"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    articles = json.load(f)
-                    all_articles.extend(articles)
-            except Exception as e:
-                print(f"读取文件 {json_file} 时出错: {e}")
-        
-        print(f"总共加载了 {len(all_articles)} 篇文章")
-        self.articles = all_articles
-        return all_articles
+        """从JSON文件加载文章数据（经由共享的语料缓存，源文件未变化时直接内存映射读取）"""
+        self.articles = load_articles(self.data_dir)
+        return self.articles
     # TODO: spliting：对于像marketing这样的词，我假设他通常是以marketing作为phrase当中的其中一个词，所以能不能对于某些特定的词作为输入（比如说marketing），然后根据这个词的前后词进行统计，
     # TODO: 是在一个一个时间段之内对关键词进行统计，而不是对于一个历史范围内的关键词进行统计（或者说用另外一个方法，现在统计的是总共的出现次数，可以是一段时间内的（速度？））
     def preprocess_text(self, text):
@@ -120,24 +107,28 @@ class Top200WordAnalyzer:
 
     def analyze_word_frequency(self):
         """分析词频并提取top 200词语"""
-        all_words = []
+        word_counts = Counter()
+        n_words = 0
+        token_cache = TokenCache.for_data_dir(self.data_dir, self.preprocess_text, stop_words=self.stop_words)
         
         print("开始分析文章内容...")
         for article in tqdm(self.articles, desc="处理文章"):
             try:
                 content = article.get('content', '')
-                words = self.preprocess_text(content)
-                all_words.extend(words)
+                words = token_cache.tokenize(article.get('url'), content)
+                # 边分词边计数，不再把全部单词收集到一个列表中
+                word_counts.update(words)
+                n_words += len(words)
             except Exception as e:
                 print(f"处理文章时出错: {e}")
         
-        # 统计词频
-        word_counts = Counter(all_words)
+        token_cache.save()
+        token_cache.report()
         
-        # 获取前200个高频词
+        # 获取前200个高频词（most_common(n) 内部使用堆，不对整个词表排序）
         self.top_200_words = word_counts.most_common(200)
         
-        print(f"\n分析完成！共处理了 {len(all_words)} 个单词")
+        print(f"\n分析完成！共处理了 {n_words} 个单词")
         print(f"识别出 {len(word_counts)} 个不同的单词")
         
         return self.top_200_words
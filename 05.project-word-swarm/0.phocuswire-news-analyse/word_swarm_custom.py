@@ -17,6 +17,13 @@ import Box2D
 from Box2D import *
 from Box2D.b2 import *
 
+from phocuswire_corpus import load_articles
+from phocuswire_phrases import PhraseMatcher
+from phocuswire_tokens import TokenCache
+from swarm_encoder import FrameEncoder, StageTimer
+from swarm_glyphs import GlyphCache
+from swarm_physics import FixtureResizer, apply_repulsion
+
 CUSTOM_WORDS = [
     "mobile", "american", "airbnb", "china", "pandemic", "google", "sustainability", 
     "artificial intelligence", "marketing", "distribution", "blockchain", "expedia"
@@ -7977,7 +7984,14 @@ FILTERED_BIGRAMS = {
     'full story', 'full article', 'more information',
 }
 
+# 编译后的短语匹配器：单遍扫描同时提取重要双词短语和单词
+PHRASE_MATCHER = PhraseMatcher(IMPORTANT_BIGRAMS, blocked=FILTERED_BIGRAMS,
+                               stop_words=ENGLISH_STOP_WORDS | FILTERED_WORDS)
+
 class WordObj:
+    # 所有单词共享的字形缓存，WordSwarm 初始化时会按 max_size 重新配置
+    glyph_cache = GlyphCache()
+
     def __init__(self, text, color=None):
         self.text = text
         # 生成深色以确保在白色背景上可见
@@ -8005,10 +8019,8 @@ class WordObj:
         self.update_surface()
         
     def update_surface(self):
-        if not pygame.font.get_init():
-            pygame.font.init()
-        self.font = pygame.font.Font(None, int(32 * self.size))
-        self.surface = self.font.render(self.text, True, self.color)
+        # 从缓存取文字表面，避免每帧重新构造字体和栅格化
+        self.surface = WordObj.glyph_cache.render(self.text, self.color, self.size)
         rect = self.surface.get_rect()
         self.width = rect.width / 20.0  # Scale down for Box2D
         self.height = rect.height / 20.0
@@ -8022,9 +8034,8 @@ class WordSwarm:
         self.word_frequencies = {}
         self.dates = []
         
-        # 创建输出目录
+        # 创建输出目录（frames 目录只在 dump_frames 调试模式下由编码器创建）
         Path(output_dir).mkdir(parents=True, exist_ok=True)
-        Path(os.path.join(output_dir, "frames")).mkdir(parents=True, exist_ok=True)
         
         # 初始化PyGame（使用离屏渲染）
         pygame.init()
@@ -8039,6 +8050,9 @@ class WordSwarm:
         self.damping = 1.0   # 减小阻尼使运动更流畅
         self.max_size = 3.0  # 调整最大尺寸
         self.min_size = 0.5  # 调整最小尺寸
+        self.glyph_size_step = 0.05  # 字形缓存的尺寸量化步长
+        self.fixture_mode = "inplace"  # 碰撞体更新方式: "inplace" 原地缩放 / "rebuild" 销毁重建
+        self.fixture_threshold = 0.01  # 碰撞体尺寸相对变化超过1%才更新，0 表示每帧更新
         self.transition_frames = 144  # 设置过渡帧数以实现5分钟视频（144帧/过渡 * 50时间点 ÷ 24fps ≈ 300秒）
         
         # 中心点坐标（屏幕中心）
@@ -8052,23 +8066,14 @@ class WordSwarm:
         self.center_body = None
         self.target_sizes = {}  # 存储目标大小
         
+        # 字形缓存以最大尺寸作为母版，较小尺寸由母版缩放得到
+        WordObj.glyph_cache = GlyphCache(size_step=self.glyph_size_step, master_size=self.max_size)
+        
         # 设置中心引力场
         self.setup_center_gravity()
     def apply_repulsion_between_words(self, min_distance=1.5, strength=2.0):
-        """让所有词之间互相排斥，防止集中在中心堆叠"""
-        for i, body_a in enumerate(self.bodies):
-            for j, body_b in enumerate(self.bodies):
-                if i >= j:
-                    continue
-                delta = body_b.position - body_a.position
-                distance = delta.length
-                if distance < min_distance and distance > 0.01:
-                    # 标准化方向
-                    delta.Normalize()
-                    # 距离越近，力越强
-                    force = strength * (min_distance - distance)
-                    body_a.ApplyForce(-delta * force, body_a.worldCenter, True)
-                    body_b.ApplyForce(delta * force, body_b.worldCenter, True)
+        """让所有词之间互相排斥，防止集中在中心堆叠（空间哈希邻域搜索，每步 O(n)）"""
+        return apply_repulsion(self.bodies, min_distance=min_distance, strength=strength)
 
     def setup_center_gravity(self):
         """设置中心引力场"""
@@ -8078,46 +8083,32 @@ class WordSwarm:
         )
 
     def load_data(self):
-        """从JSON文件加载文章数据"""
-        json_files = glob.glob(os.path.join(self.data_dir, "phocuswire_page_*.json"))
-        all_articles = []
-        
-        print(f"找到 {len(json_files)} 个JSON文件")
-        
-        for json_file in tqdm(json_files, desc="加载文章数据"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    articles = json.load(f)
-                    all_articles.extend(articles)
-            except Exception as e:
-                print(f"读取文件 {json_file} 时出错: {e}")
-        
-        print(f"总共加载了 {len(all_articles)} 篇文章")
-        self.articles = all_articles
-        return all_articles
+        """从JSON文件加载文章数据（经由共享的语料缓存，源文件未变化时直接内存映射读取）"""
+        self.articles = load_articles(self.data_dir)
+        return self.articles
 
     def process_articles(self):
         """处理文章数据，提取关键词频率"""
         word_freq_by_date = {}
         dates = set()
         
+        # 分词结果按 URL + 预处理配置缓存，相同配置重新运行时跳过分词
+        token_cache = TokenCache.for_data_dir(
+            self.data_dir, self.preprocess_text,
+            phrase_matcher=PHRASE_MATCHER.fingerprint
+        )
+        
         for article in tqdm(self.articles, desc="处理文章"):
             try:
-                date_str = article.get('date')
-                if not date_str:
-                    continue
-                    
-                date_obj = self.parse_date(date_str)
-                if not date_obj:
+                # 月份在语料编译时已统一解析（日期缺失或无法解析时为空）
+                year_month = article.get('month')
+                if not year_month:
                     continue
-                
-                # 将日期转换为年月格式
-                year_month = date_obj.strftime("%Y-%m")
                 dates.add(year_month)
                 
                 # 预处理文章内容
                 content = article.get('content', '')
-                words = self.preprocess_text(content)
+                words = token_cache.tokenize(article.get('url'), content)
                 
                 # 更新词频
                 if year_month not in word_freq_by_date:
@@ -8129,6 +8120,8 @@ class WordSwarm:
             except Exception as e:
                 print(f"处理文章时出错: {e}")
         
+        token_cache.save()
+        token_cache.report()
         self.word_frequencies = word_freq_by_date
         self.dates = sorted(list(dates))
         
@@ -8153,8 +8146,14 @@ class WordSwarm:
             
         return sizes
 
-    def create_animation(self, custom_words=None):
-        """创建基于物理引擎的词云动画，使用自定义关键词列表"""
+    def create_animation(self, custom_words=None, dump_frames=False):
+        """
+        创建基于物理引擎的词云动画，使用自定义关键词列表
+
+        Args:
+            custom_words: 要展示的关键词列表，默认使用 CUSTOM_WORDS
+            dump_frames: 调试模式，额外把每一帧保存为 PNG 到 frames/ 目录
+        """
         if not self.word_frequencies or not self.dates:
             print("请先运行 process_articles() 方法")
             return
@@ -8201,7 +8200,6 @@ class WordSwarm:
             initial_linear_velocity = b2Vec2(uniform(-1.5, 1.5), uniform(-1.5, 1.5))
             body.linearVelocity = initial_linear_velocity
             self.bodies.append(body)
-            self.apply_repulsion_between_words()
             dist_to_center = math.sqrt(init_x * init_x + init_y * init_y)
             joint = self.world.CreateDistanceJoint(
                 bodyA=self.center_body,
@@ -8213,118 +8211,66 @@ class WordSwarm:
                 length=dist_to_center * 1
             )
             self.joints.append(joint)
-        # 动画循环（只做整体动画，不分时间段）
-        frame_count = 0
+        # 动画循环（只做整体动画，不分时间段），帧数据直接写入 ffmpeg 管道
         total_frames = 300  # 固定帧数
-        print("正在生成动画帧...")
-        for frame in tqdm(range(total_frames)):
-            self.screen.fill((255, 255, 255))
-            self.world.Step(1.0/60.0, 8, 3)
-            for i, word_obj in enumerate(self.word_objects):
-                # 统计所有时间的最大频率
-                max_freq = 1
-                freq = 0
-                for date in self.dates:
-                    freq = builtins.max(freq, self.word_frequencies.get(date, {}).get(word_obj.text, 0))
-                    max_freq = builtins.max(max_freq, freq)
-                # 取最大频率决定大小
-                target_size = self.min_size + (self.max_size - self.min_size) * (freq / max_freq)
-                word_obj.size = target_size
-                word_obj.update_surface()
-                body = self.bodies[i]
-                fixture = body.fixtures[0]
-                body.DestroyFixture(fixture)
-                body.CreateFixture(
-                    shape=b2PolygonShape(box=(word_obj.width * target_size / 2, 
-                                            word_obj.height * target_size / 2)),
-                    density=1.0,
-                    friction=0.3,
-                    restitution=0.1
-                )
-                pos = body.position
-                screen_pos = (int(pos.x * 20 + self.screen.get_width()/2),
-                            int(-pos.y * 20 + self.screen.get_height()/2))
-                text_rect = word_obj.surface.get_rect()
-                screen_pos = (screen_pos[0] - text_rect.width//2,
-                            screen_pos[1] - text_rect.height//2)
-                self.screen.blit(word_obj.surface, screen_pos)
-            # 绘制关键词说明
-            font = pygame.font.Font(None, 48)
-            date_surface = font.render("Custom Word Swarm", True, (50, 50, 50))
-            date_rect = date_surface.get_rect()
-            date_rect.topright = (self.screen.get_width() - 50, 50)
-            self.screen.blit(date_surface, date_rect)
-            pygame.image.save(self.screen, 
-                            os.path.join(self.output_dir, "frames", f"frame_{frame_count:04d}.png"))
-            frame_count += 1
         output_path = os.path.join(self.output_dir, 'word_swarm_custom.mp4')
-        cmd = (f"ffmpeg -y -framerate 30 -i {os.path.join(self.output_dir, 'frames', 'frame_%04d.png')} "
-               f"-vf 'pad=ceil(iw/2)*2:ceil(ih/2)*2' "
-               f"-c:v libx264 -pix_fmt yuv420p -crf 18 {output_path}")
-        os.system(cmd)
+        dump_dir = os.path.join(self.output_dir, "frames") if dump_frames else None
+        encoder = FrameEncoder(output_path, self.screen.get_size(), fps=30, crf=18,
+                               dump_frames_dir=dump_dir)
+        timer = StageTimer()
+        resizer = FixtureResizer(mode=self.fixture_mode, threshold=self.fixture_threshold)
+        title_font = pygame.font.Font(None, 48)
+        print("正在生成动画帧...")
+        with encoder:
+            for frame in tqdm(range(total_frames)):
+                with timer.stage("render"):
+                    target_sizes = []
+                    for word_obj in self.word_objects:
+                        # 统计所有时间的最大频率
+                        max_freq = 1
+                        freq = 0
+                        for date in self.dates:
+                            freq = builtins.max(freq, self.word_frequencies.get(date, {}).get(word_obj.text, 0))
+                            max_freq = builtins.max(max_freq, freq)
+                        # 取最大频率决定大小
+                        target_size = self.min_size + (self.max_size - self.min_size) * (freq / max_freq)
+                        word_obj.size = target_size
+                        word_obj.update_surface()
+                        target_sizes.append(target_size)
+                with timer.stage("physics"):
+                    self.apply_repulsion_between_words()
+                    self.world.Step(1.0/60.0, 8, 3)
+                    for i, (word_obj, body, target_size) in enumerate(
+                            zip(self.word_objects, self.bodies, target_sizes)):
+                        resizer.resize(i, body,
+                                       word_obj.width * target_size / 2,
+                                       word_obj.height * target_size / 2)
+                with timer.stage("render"):
+                    self.screen.fill((255, 255, 255))
+                    for word_obj, body in zip(self.word_objects, self.bodies):
+                        pos = body.position
+                        screen_pos = (int(pos.x * 20 + self.screen.get_width()/2),
+                                    int(-pos.y * 20 + self.screen.get_height()/2))
+                        text_rect = word_obj.surface.get_rect()
+                        screen_pos = (screen_pos[0] - text_rect.width//2,
+                                    screen_pos[1] - text_rect.height//2)
+                        self.screen.blit(word_obj.surface, screen_pos)
+                    # 绘制关键词说明
+                    date_surface = title_font.render("Custom Word Swarm", True, (50, 50, 50))
+                    date_rect = date_surface.get_rect()
+                    date_rect.topright = (self.screen.get_width() - 50, 50)
+                    self.screen.blit(date_surface, date_rect)
+                with timer.stage("encode"):
+                    encoder.write(self.screen)
+        timer.report(encoder.frame_count)
+        WordObj.glyph_cache.report()
+        resizer.report()
         print(f"动画已保存至: {output_path}")
         pygame.quit()
     
-    def parse_date(self, date_str):
-        """解析日期字符串为日期对象"""
-        try:
-            date_formats = [
-                "%B %d, %Y",
-                "%d %B %Y",
-                "%B %Y",
-                "%Y-%m-%d",
-            ]
-            
-            for date_format in date_formats:
-                try:
-                    return datetime.strptime(date_str.strip(), date_format)
-                except ValueError:
-                    continue
-                    
-            return None
-        except:
-            return None
-    
     def preprocess_text(self, text):
         """预处理文本，支持单词和双词短语"""
-        if not text:
-            return []
-            
-        # 移除非字母字符，但保留空格
-        text = re.sub(r'[^a-zA-Z\s]', ' ', text.lower())
-        
-        # 分词
-        words = [word.strip() for word in text.split() if word.strip()]
-        
-        # 提取单词和双词短语
-        processed_terms = []
-        
-        # 处理双词短语
-        for i in range(len(words) - 1):
-            bigram = f"{words[i]} {words[i+1]}"
-            # 如果是重要的双词短语，添加到结果中
-            if bigram in IMPORTANT_BIGRAMS and bigram not in FILTERED_BIGRAMS:
-                processed_terms.append(bigram)
-        
-        # 处理单个词
-        # 只处理那些不是双词短语一部分的单词
-        for i, word in enumerate(words):
-            # 检查这个词是否是任何重要双词短语的一部分
-            is_part_of_bigram = False
-            if i < len(words) - 1:
-                current_bigram = f"{word} {words[i+1]}"
-                if current_bigram in IMPORTANT_BIGRAMS:
-                    is_part_of_bigram = True
-            if i > 0:
-                previous_bigram = f"{words[i-1]} {word}"
-                if previous_bigram in IMPORTANT_BIGRAMS:
-                    is_part_of_bigram = True
-            
-            # 如果不是双词短语的一部分，且符合其他条件，则添加这个单词
-            if not is_part_of_bigram and word not in ENGLISH_STOP_WORDS and word not in FILTERED_WORDS and len(word) > 2:
-                processed_terms.append(word)
-        
-        return processed_terms
+        return PHRASE_MATCHER.preprocess(text)
 
 if __name__ == "__main__":
     # 创建WordSwarm实例
@@ -1,14 +1,16 @@
 import sys
 import os
-from random import randint, uniform
+from random import Random  # 注意: Box2D.b2 的 * 导入会覆盖名为 random 的模块
 import json
-import glob
-from datetime import datetime
-import re
+import hashlib
+import shutil
 from pathlib import Path
 from tqdm import tqdm
 import builtins
-import math
+import argparse
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np  # 添加用于平滑插值
 
 import pygame
@@ -17,6 +19,15 @@ import Box2D
 from Box2D import *
 from Box2D.b2 import *
 
+from phocuswire_corpus import load_articles
+from phocuswire_aliases import AliasTable
+from phocuswire_freq import month_term_counts
+from phocuswire_phrases import PhraseMatcher
+from phocuswire_tokens import TokenCache
+from swarm_encoder import FrameEncoder, StageTimer, concat_segments, plan_segments
+from swarm_glyphs import GlyphCache
+from swarm_physics import PHYSICS_BACKENDS, make_physics_backend, radial_packing
+
 group_mapping = {
   "2010-06": {
     "Travel": [
@@ -7972,25 +7983,36 @@ FILTERED_BIGRAMS = {
     'full story', 'full article', 'more information',
 }
 
+# group_mapping 编译后的别名表（模块加载时展开一次，编译出的数组按词表缓存）
+ALIAS_TABLE = AliasTable(group_mapping)
+
+# 编译后的短语匹配器：单遍扫描同时提取重要双词短语和单词
+PHRASE_MATCHER = PhraseMatcher(IMPORTANT_BIGRAMS, blocked=FILTERED_BIGRAMS,
+                               stop_words=ENGLISH_STOP_WORDS | FILTERED_WORDS)
+
 class WordObj:
-    def __init__(self, text, color=None):
+    # 所有单词共享的字形缓存，WordSwarm 初始化时会按 max_size 重新配置
+    glyph_cache = GlyphCache()
+
+    def __init__(self, text, color=None, rng=None):
         self.text = text
-        # 生成深色以确保在白色背景上可见
+        # 生成深色以确保在白色背景上可见（传入 rng 时颜色可复现）
         if color is None:
+            rng = rng if rng is not None else Random()
             # 确保RGB值不会太高（避免太浅的颜色）
-            r = randint(0, 180)
-            g = randint(0, 180)
-            b = randint(0, 180)
+            r = rng.randint(0, 180)
+            g = rng.randint(0, 180)
+            b = rng.randint(0, 180)
             # 确保至少有一个通道的颜色足够深
             min_darkness = 50
             if builtins.max(r, g, b) > min_darkness:
-                darkest_channel = randint(0, 2)
+                darkest_channel = rng.randint(0, 2)
                 if darkest_channel == 0:
-                    r = randint(0, min_darkness)
+                    r = rng.randint(0, min_darkness)
                 elif darkest_channel == 1:
-                    g = randint(0, min_darkness)
+                    g = rng.randint(0, min_darkness)
                 else:
-                    b = randint(0, min_darkness)
+                    b = rng.randint(0, min_darkness)
             self.color = (r, g, b)
         else:
             self.color = color
@@ -8000,10 +8022,8 @@ class WordObj:
         self.update_surface()
         
     def update_surface(self):
-        if not pygame.font.get_init():
-            pygame.font.init()
-        self.font = pygame.font.Font(None, int(32 * self.size))
-        self.surface = self.font.render(self.text, True, self.color)
+        # 从缓存取文字表面，避免每帧重新构造字体和栅格化
+        self.surface = WordObj.glyph_cache.render(self.text, self.color, self.size)
         rect = self.surface.get_rect()
         self.width = rect.width / 20.0  # Scale down for Box2D
         self.height = rect.height / 20.0
@@ -8014,27 +8034,32 @@ class WordSwarm:
         self.data_dir = data_dir
         self.output_dir = output_dir
         self.articles = []
+        self.frequencies = None   # 月份 × 词 的稀疏词频矩阵（MonthTermMatrix）
         self.word_frequencies = {}
         self.dates = []
+        self.month_maxima = None  # 每个月的最高词频，按 self.dates 排列
+        self.size_matrix = None   # 月份 × 展示词 的尺寸矩阵，列顺序与 self.word_objects 一致
         
-        # 创建输出目录
+        # 创建输出目录（frames 目录只在 dump_frames 调试模式下由编码器创建）
         Path(output_dir).mkdir(parents=True, exist_ok=True)
-        Path(os.path.join(output_dir, "frames")).mkdir(parents=True, exist_ok=True)
         
         # 初始化PyGame（使用离屏渲染）
         pygame.init()
         os.environ['SDL_VIDEODRIVER'] = 'dummy'  # 使用虚拟显示
         self.screen = pygame.Surface((1920, 1080))
         
-        # 创建Box2D世界 - 调整重力为向中心
-        self.world = b2World(gravity=(0, 0))
-        
         # 动画相关参数 - 调整以获得更好的效果
         self.frequency = 0.5  # 增加频率使运动更快
         self.damping = 1.0   # 减小阻尼使运动更流畅
         self.max_size = 3.0  # 调整最大尺寸
         self.min_size = 0.5  # 调整最小尺寸
+        self.glyph_size_step = 0.05  # 字形缓存的尺寸量化步长
+        self.fixture_mode = "inplace"  # 碰撞体更新方式: "inplace" 原地缩放 / "rebuild" 销毁重建
+        self.fixture_threshold = 0.01  # 碰撞体尺寸相对变化超过1%才更新，0 表示每帧更新
+        self.physics_backend = "box2d"  # 布局后端: "box2d" 物理引擎 / "numpy" 向量化力导向布局
         self.transition_frames = 144  # 设置过渡帧数以实现5分钟视频（144帧/过渡 * 50时间点 ÷ 24fps ≈ 300秒）
+        self.seed = 42  # 布局随机种子，固定后同样的数据会生成完全相同的动画
+        self.checkpoint_interval = 720  # 每渲染多少帧保存一次检查点（同时编码为一个视频片段）
         
         # 中心点坐标（屏幕中心）
         self.center_x = 0
@@ -8042,380 +8067,444 @@ class WordSwarm:
         
         # 存储单词对象和它们的目标状态
         self.word_objects = []
-        self.bodies = []
-        self.joints = []
-        self.center_body = None
+        self.physics = None  # 布局后端，在 build_scene 中按 physics_backend 创建
         self.target_sizes = {}  # 存储目标大小
         
-        # 设置中心引力场
-        self.setup_center_gravity()
-    def apply_repulsion_between_words(self, min_distance=1.5, strength=2.0):
-        """让所有词之间互相排斥，防止集中在中心堆叠"""
-        for i, body_a in enumerate(self.bodies):
-            for j, body_b in enumerate(self.bodies):
-                if i >= j:
-                    continue
-                delta = body_b.position - body_a.position
-                distance = delta.length
-                if distance < min_distance and distance > 0.01:
-                    # 标准化方向
-                    delta.Normalize()
-                    # 距离越近，力越强
-                    force = strength * (min_distance - distance)
-                    body_a.ApplyForce(-delta * force, body_a.worldCenter, True)
-                    body_b.ApplyForce(delta * force, body_b.worldCenter, True)
-
-    def setup_center_gravity(self):
-        """设置中心引力场"""
-        # 创建中心锚点
-        self.center_body = self.world.CreateStaticBody(
-            position=(self.center_x, self.center_y)
-        )
+        # 字形缓存以最大尺寸作为母版，较小尺寸由母版缩放得到
+        WordObj.glyph_cache = GlyphCache(size_step=self.glyph_size_step, master_size=self.max_size)
 
     def load_data(self):
-        """从JSON文件加载文章数据"""
-        json_files = glob.glob(os.path.join(self.data_dir, "phocuswire_page_*.json"))
-        all_articles = []
-        
-        print(f"找到 {len(json_files)} 个JSON文件")
-        
-        for json_file in tqdm(json_files, desc="加载文章数据"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    articles = json.load(f)
-                    all_articles.extend(articles)
-            except Exception as e:
-                print(f"读取文件 {json_file} 时出错: {e}")
-        
-        print(f"总共加载了 {len(all_articles)} 篇文章")
-        self.articles = all_articles
-        return all_articles
+        """从JSON文件加载文章数据（经由共享的语料缓存，源文件未变化时直接内存映射读取）"""
+        self.articles = load_articles(self.data_dir)
+        return self.articles
 
-    def process_articles(self):
-        """处理文章数据，提取关键词频率"""
-        word_freq_by_date = {}
-        dates = set()
-        
-        for article in tqdm(self.articles, desc="处理文章"):
-            try:
-                date_str = article.get('date')
-                if not date_str:
-                    continue
-                    
-                date_obj = self.parse_date(date_str)
-                if not date_obj:
-                    continue
-                
-                # 将日期转换为年月格式
-                year_month = date_obj.strftime("%Y-%m")
-                dates.add(year_month)
-                
-                # 预处理文章内容
-                content = article.get('content', '')
-                words = self.preprocess_text(content)
-                
-                # 更新词频
-                if year_month not in word_freq_by_date:
-                    word_freq_by_date[year_month] = {}
-                
-                for word in words:
-                    word_freq_by_date[year_month][word] = word_freq_by_date[year_month].get(word, 0) + 1
-                    
-            except Exception as e:
-                print(f"处理文章时出错: {e}")
+    def process_articles(self, workers=1):
+        """
+        处理文章数据，提取关键词频率
+
+        Args:
+            workers: 预处理进程数，大于1时按源页面文件分片并行分词，结果与单进程相同
+        """
+        # 分词结果按 URL + 预处理配置缓存，相同配置重新运行时跳过分词
+        token_cache = TokenCache.for_data_dir(
+            self.data_dir, self.preprocess_text,
+            phrase_matcher=PHRASE_MATCHER.fingerprint
+        )
         
-        self.word_frequencies = word_freq_by_date
-        self.dates = sorted(list(dates))
+        # 语料和预处理配置都未变化时直接读取缓存的词频矩阵；别名在这里按月合并为组，
+        # 之后的选词、尺寸矩阵都直接使用组的词频
+        self.frequencies = month_term_counts(self.articles, self.preprocess_text, token_cache,
+                                             workers=workers, aliases=ALIAS_TABLE)
+        self.word_frequencies = self.frequencies.to_dict()
+        self.dates = self.frequencies.months
         
-    def interpolate_sizes(self, current_freqs, next_freqs, progress):
-        """在两个时间点之间平滑插值词频"""
-        sizes = {}
-        max_current = builtins.max(current_freqs.values()) if current_freqs else 1
-        max_next = builtins.max(next_freqs.values()) if next_freqs else 1
+        # 预先计算每个月的最高词频，用于尺寸归一化
+        self.month_maxima = self.frequencies.month_maxima()
         
-        for word in set(current_freqs.keys()) | set(next_freqs.keys()):
-            current_freq = current_freqs.get(word, 0)
-            next_freq = next_freqs.get(word, 0)
-            
-            # 使用平滑插值
-            current_size = self.min_size + (self.max_size - self.min_size) * (current_freq / max_current)
-            next_size = self.min_size + (self.max_size - self.min_size) * (next_freq / max_next)
-            
-            # 使用三次方插值使过渡更平滑
-            t = progress
-            t = t * t * (3 - 2 * t)  # 平滑插值函数
-            sizes[word] = current_size * (1 - t) + next_size * t
-            
-        return sizes
+    def build_size_matrix(self, words):
+        """
+        把词频压缩为 月份 × 展示词 的稠密尺寸矩阵（只包含要绘制的词）
 
-    def create_animation(self, top_n=50):
-        """创建基于物理引擎的词云动画"""
-        if not self.word_frequencies or not self.dates:
-            print("请先运行 process_articles() 方法")
-            return
-            
-        # 获取所有时间点的前N个关键词
-        all_words = set()
-        
+        矩阵元素为该词在该月的目标尺寸，每帧只需对相邻两行做一次向量化插值。
+        """
+        freq_matrix = self.frequencies.series(words).astype(np.float64)
         
-          
-        reverse_mapping = {}
-        for date_map in group_mapping.values():
-            for group, aliases in date_map.items():
-                for alias in aliases:
-                    reverse_mapping[alias] = group
-        
-        for date in self.dates:
-            words = sorted(self.word_frequencies[date].items(), 
-                         key=lambda x: x[1], 
-                         reverse=True)[:top_n]
-            
-            for word, _ in words:
-                mapped_word = reverse_mapping.get(word,word)
-                all_words.add(mapped_word)
-        # 创建单词对象（使用螺旋布局）
-        word_count = len(all_words)
+        # 与逐词计算的公式和运算顺序保持一致，结果逐位相同
+        self.size_matrix = self.min_size + (self.max_size - self.min_size) * (freq_matrix / self.month_maxima[:, None])
+        return self.size_matrix
         
-        # 螺旋参数 - 调整以适应更长的词组
-        a = 1.2  # 增加螺旋间距
-        b = 1.2  # 增加螺旋展开速度
-        positions = []  # 记录已经使用的位置，避免初始重叠
+    def interpolate_sizes(self, date_idx, next_date_idx, progress):
+        """在两个时间点之间平滑插值所有展示词的尺寸，返回与 self.word_objects 对齐的数组"""
+        # 使用三次方插值使过渡更平滑
+        t = progress
+        t = t * t * (3 - 2 * t)  # 平滑插值函数
+        return self.size_matrix[date_idx] * (1 - t) + self.size_matrix[next_date_idx] * t
 
-        for i, word in enumerate(all_words):
-            word_obj = WordObj(word)
-            max_r = 30.0
-            # 生成不重叠的初始位置
-            max_attempts = 50
-            for attempt in range(max_attempts):
-                angle = uniform(0, 2 * math.pi)
-                radius = uniform(1.0, max_r)  # 增加最小半径，避免中心扎堆
-                init_x = radius * math.cos(angle) + uniform(-0.5, 0.5)
-                init_y = radius * math.sin(angle) + uniform(-0.5, 0.5)
+    def select_words(self, top_n=50):
+        """获取所有时间点的前N个关键词（词频已按 group_mapping 合并别名）"""
+        # 每个月在稀疏行上用 partition 选出前N个词，不再对整个词表排序
+        all_words = self.frequencies.top_terms(top_n, months=self.dates)
+        # 排序保证不同进程/不同运行之间词的顺序一致（set 的迭代顺序受哈希随机化影响）
+        return sorted(all_words)
 
-                # 检查是否与已有词重叠
-                min_dist = 2.5
-                too_close = False
-                for px, py in positions:
-                    dist = math.sqrt((init_x - px) ** 2 + (init_y - py) ** 2)
-                    if dist < min_dist:
-                        too_close = True
-                        break
-                if not too_close:
-                    break
+    def collision_half_size(self, word_obj):
+        """单词在当前尺寸下的碰撞盒半宽/半高（Box2D 世界坐标）"""
+        return (word_obj.width * word_obj.size / 2, word_obj.height * word_obj.size / 2)
 
-            positions.append((init_x, init_y))
-            self.word_objects.append(word_obj)
-        # for i, word in enumerate(all_words):
-        #    # 随机极坐标分布：距离中心 0 到 max_r，角度 0 到 2π
-        #     max_r = 30.0  # 控制散布半径（单位为 Box2D 的世界坐标）
-        #     angle = uniform(0, 2 * math.pi)
-        #     radius = uniform(0, max_r)
-        #     init_x = radius * math.cos(angle)
-        #     init_y = radius * math.sin(angle)
-            
-        #     # 随机扰动，避免完美对称
-        #     init_x += uniform(-0.5, 0.5)
-        #     init_y += uniform(-0.5, 0.5)
-            
-        #     word_obj = WordObj(word)
-        #     self.word_objects.append(word_obj)
-            
-            # 创建物理体
-            body = self.world.CreateDynamicBody(
-                position=(init_x, init_y),
-                linearDamping=0.8,
-                angularDamping=0.9,
-                fixtures=b2FixtureDef(
-                    shape=b2PolygonShape(box=(word_obj.width/2, word_obj.height/2)),
-                    density=1.0,
-                    friction=0.3,
-                    restitution=0.1
-                )
-            )
+    def generate_layout(self, words):
+        """
+        为每个词生成颜色、初始位置和初始速度（不创建物理体）
+
+        布局是普通的可序列化数据，分段并行渲染时子进程据此重建完全相同的场景。
+        所有随机数都来自以 self.seed 初始化的独立随机数生成器，保证布局可复现。
+        初始位置按第一帧的实际尺寸径向紧密排布，第0帧时所有词互不重叠
+        （需要先调用 build_size_matrix）。
+        """
+        rng = Random(self.seed)
+        word_objs = [WordObj(word, rng=rng) for word in words]
+
+        half_sizes = []
+        placement_sizes = []
+        for k, word_obj in enumerate(word_objs):
+            word_obj.size = float(self.size_matrix[0, k])
+            word_obj.update_surface()
+            half_w, half_h = self.collision_half_size(word_obj)
+            half_sizes.append((half_w, half_h))
+            # 碰撞盒和绘制出的文字取较大者，保证物理上和画面上都不重叠
+            placement_sizes.append((builtins.max(half_w, word_obj.width / 2),
+                                    builtins.max(half_h, word_obj.height / 2)))
+        positions = radial_packing(placement_sizes, rng)
+
+        layout = []
+        for word_obj, position, half_size in zip(word_objs, positions, half_sizes):
             # 给每个 body 初始速度，避免静止状态被弹簧迅速拉向中心
-            initial_linear_velocity = b2Vec2(uniform(-1.5, 1.5), uniform(-1.5, 1.5))
-            body.linearVelocity = initial_linear_velocity
+            layout.append({
+                "text": word_obj.text,
+                "color": word_obj.color,
+                "position": position,
+                "half_size": half_size,
+                "velocity": (rng.uniform(-1.5, 1.5), rng.uniform(-1.5, 1.5)),
+            })
+        return layout
 
-            self.bodies.append(body)
-            self.apply_repulsion_between_words()
+    def build_scene(self, layout):
+        """按布局创建单词对象，并在布局后端中添加物理体和到中心点的弹簧"""
+        self.physics = make_physics_backend(
+            self.physics_backend,
+            frequency=self.frequency,
+            damping=self.damping,
+            fixture_mode=self.fixture_mode,
+            fixture_threshold=self.fixture_threshold
+        )
+        for item in layout:
+            word_obj = WordObj(item["text"], color=tuple(item["color"]))
+            self.word_objects.append(word_obj)
+            # 弹簧原长取初始位置到中心的距离，碰撞盒直接使用第一帧的尺寸
+            self.physics.add_body(item["position"], item["velocity"], item["half_size"])
 
-            # 创建到中心点的弹簧关节，根据位置调整长度
-            dist_to_center = math.sqrt(init_x * init_x + init_y * init_y)
-            joint = self.world.CreateDistanceJoint(
-                bodyA=self.center_body,
-                bodyB=body,
-                anchorA=self.center_body.position,
-                anchorB=body.position,
-                frequencyHz=self.frequency,
-                dampingRatio=self.damping,
-                length=dist_to_center * 1  # 稍微收缩一点，让词语更集中
-            )
-            self.joints.append(joint)
+    def step_frame(self, frame, timer):
+        """推进一帧：更新单词尺寸和物理世界，返回 (current_date, next_date, progress)"""
+        # 计算当前日期索引和过渡进度
+        date_idx = frame // self.transition_frames
+        next_date_idx = builtins.min(date_idx + 1, len(self.dates) - 1)
+        progress = (frame % self.transition_frames) / self.transition_frames
         
-        # 动画循环
-        frame_count = 0
-        total_frames = (len(self.dates) - 1) * self.transition_frames
+        current_date = self.dates[date_idx]
+        next_date = self.dates[next_date_idx]
         
-        print("正在生成动画帧...")
-        for frame in tqdm(range(total_frames)):
-            # 计算当前日期索引和过渡进度
-            date_idx = frame // self.transition_frames
-            next_date_idx = builtins.min(date_idx + 1, len(self.dates) - 1)
-            progress = (frame % self.transition_frames) / self.transition_frames
-            
-            current_date = self.dates[date_idx]
-            next_date = self.dates[next_date_idx]
+        with timer.stage("render"):
+            # 计算插值后的大小（一次向量化插值得到所有词的尺寸）
+            target_sizes = self.interpolate_sizes(date_idx, next_date_idx, progress).tolist()
             
-            # 获取当前和下一个时间点的频率
-            current_freqs = self.word_frequencies[current_date]
-            next_freqs = self.word_frequencies[next_date]
-            
-            # 计算插值后的大小
-            interpolated_sizes = self.interpolate_sizes(current_freqs, next_freqs, progress)
-            
-            # 清屏（改为白色背景）
-            self.screen.fill((255, 255, 255))
-            
-            # 更新物理世界
-            self.world.Step(1.0/60.0, 8, 3)
-            
-            # 更新和绘制每个单词
-            for i, word_obj in enumerate(self.word_objects):
-                # 获取插值后的大小
-                target_size = interpolated_sizes.get(word_obj.text, self.min_size)
+            # 更新每个单词的渲染尺寸
+            for word_obj, target_size in zip(self.word_objects, target_sizes):
                 word_obj.size = target_size
                 word_obj.update_surface()
-                
-                # 更新物理体
-                body = self.bodies[i]
-                # 添加向中心的力
-                center_force = b2Vec2(
-                    self.center_x - body.position.x,
-                    self.center_y - body.position.y
-                )
-                force_mag = target_size * 1.0  # 根据大小调整力度
-                center_force.Normalize()
-                center_force *= force_mag
-                # body.ApplyForceToCenter(center_force, True)
-                
-                # 更新碰撞体大小
-                fixture = body.fixtures[0]
-                body.DestroyFixture(fixture)
-                body.CreateFixture(
-                    shape=b2PolygonShape(box=(word_obj.width * target_size / 2, 
-                                            word_obj.height * target_size / 2)),
-                    density=1.0,
-                    friction=0.3,
-                    restitution=0.1
-                )
-                
-                # 绘制单词
-                pos = body.position
-                screen_pos = (int(pos.x * 20 + self.screen.get_width()/2),
-                            int(-pos.y * 20 + self.screen.get_height()/2))
-                
-                text_rect = word_obj.surface.get_rect()
-                screen_pos = (screen_pos[0] - text_rect.width//2,
-                            screen_pos[1] - text_rect.height//2)
-                
-                self.screen.blit(word_obj.surface, screen_pos)
-            
-            # 绘制日期（使用深色文字）
-            font = pygame.font.Font(None, 48)
-            date_text = current_date
-            if progress > 0:
-                date_text = f"{current_date} → {next_date}"
-            date_surface = font.render(date_text, True, (50, 50, 50))  # 深灰色文字
-            date_rect = date_surface.get_rect()
-            date_rect.topright = (self.screen.get_width() - 50, 50)
-            self.screen.blit(date_surface, date_rect)
-            
-            # 保存帧
-            pygame.image.save(self.screen, 
-                            os.path.join(self.output_dir, "frames", f"frame_{frame_count:04d}.png"))
-            frame_count += 1
         
-        # 使用ffmpeg合成视频
-        output_path = os.path.join(self.output_dir, 'word_swarm.mp4')
-        cmd = (f"ffmpeg -y -framerate 30 -i {os.path.join(self.output_dir, 'frames', 'frame_%04d.png')} "
-               f"-vf 'pad=ceil(iw/2)*2:ceil(ih/2)*2' "
-               f"-c:v libx264 -pix_fmt yuv420p -crf 18 {output_path}")
-        os.system(cmd)
+        with timer.stage("physics"):
+            # 施加词间排斥力、推进一个物理步，然后更新碰撞体大小
+            half_sizes = [self.collision_half_size(word_obj) for word_obj in self.word_objects]
+            self.physics.step(half_sizes, 1.0/60.0)
         
-        print(f"动画已保存至: {output_path}")
-        pygame.quit()
+        return current_date, next_date, progress
+
+    def draw_frame(self, current_date, next_date, progress, date_font):
+        """把当前物理状态绘制到 self.screen"""
+        # 清屏（改为白色背景）
+        self.screen.fill((255, 255, 255))
         
-    def parse_date(self, date_str):
-        """解析日期字符串为日期对象"""
-        try:
-            date_formats = [
-                "%B %d, %Y",
-                "%d %B %Y",
-                "%B %Y",
-                "%Y-%m-%d",
-            ]
+        # 绘制每个单词
+        for word_obj, (x, y) in zip(self.word_objects, self.physics.positions()):
+            screen_pos = (int(x * 20 + self.screen.get_width()/2),
+                        int(-y * 20 + self.screen.get_height()/2))
             
-            for date_format in date_formats:
-                try:
-                    return datetime.strptime(date_str.strip(), date_format)
-                except ValueError:
-                    continue
-                    
+            text_rect = word_obj.surface.get_rect()
+            screen_pos = (screen_pos[0] - text_rect.width//2,
+                        screen_pos[1] - text_rect.height//2)
+            
+            self.screen.blit(word_obj.surface, screen_pos)
+        
+        # 绘制日期（使用深色文字）
+        date_text = current_date
+        if progress > 0:
+            date_text = f"{current_date} → {next_date}"
+        date_surface = date_font.render(date_text, True, (50, 50, 50))  # 深灰色文字
+        date_rect = date_surface.get_rect()
+        date_rect.topright = (self.screen.get_width() - 50, 50)
+        self.screen.blit(date_surface, date_rect)
+
+    def render_frames(self, start, end, encoder, timer, desc=None, position=0):
+        """渲染 [start, end) 范围内的帧并写入编码器"""
+        date_font = pygame.font.Font(None, 48)
+        for frame in tqdm(range(start, end), desc=desc, position=position):
+            labels = self.step_frame(frame, timer)
+            with timer.stage("render"):
+                self.draw_frame(*labels, date_font)
+            with timer.stage("encode"):
+                encoder.write(self.screen)
+
+    def render_settings(self):
+        """分段渲染子进程需要复制的动画参数"""
+        names = ("frequency", "damping", "max_size", "min_size", "glyph_size_step",
+                 "fixture_mode", "fixture_threshold", "physics_backend", "transition_frames", "seed")
+        return {name: getattr(self, name) for name in names}
+
+    def run_fingerprint(self, layout, total_frames):
+        """当前渲染任务的指纹：数据、布局或参数变化后，旧检查点不能再用于续渲"""
+        payload = json.dumps({
+            "settings": self.render_settings(),
+            "checkpoint_interval": self.checkpoint_interval,
+            "total_frames": total_frames,
+            "dates": self.dates,
+            "layout": layout,
+            "size_matrix": self.size_matrix.tolist(),
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def load_checkpoint(self, checkpoint_path, fingerprint):
+        """读取检查点，不存在、损坏或与当前任务不匹配时返回 None"""
+        if not os.path.exists(checkpoint_path):
+            print("未找到检查点，从头开始渲染")
             return None
-        except:
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"读取检查点 {checkpoint_path} 时出错: {e}，从头开始渲染")
             return None
-    
-    def preprocess_text(self, text):
-        """预处理文本，支持单词和双词短语"""
-        if not text:
-            return []
+        if checkpoint.get("fingerprint") != fingerprint:
+            print("检查点与当前数据或参数不匹配，从头开始渲染")
+            return None
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint_path, checkpoint):
+        """先写临时文件再原子替换，避免崩溃时留下半个检查点"""
+        tmp_path = checkpoint_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def resume_from_checkpoint(self, checkpoint, timer):
+        """
+        把物理世界恢复到检查点对应的帧，返回该帧序号
+
+        Box2D 的接触和关节热启动缓存无法序列化，仅写回位置和速度得不到逐字节一致的后续帧。
+        因此先按相同的种子布局只跑物理（不绘制、不编码）重放到检查点帧，再与快照核对，
+        一致则后续帧与不中断的渲染完全相同；不一致时（例如换了 Box2D 版本）退回到直接写回快照。
+        """
+        frame = checkpoint["frame"]
+        for replay_frame in tqdm(range(frame), desc="重放物理状态"):
+            self.step_frame(replay_frame, timer)
+        
+        # 经过一次 JSON 往返，使元组/列表的表示与检查点文件一致
+        replayed = json.loads(json.dumps(self.physics.snapshot()))
+        if replayed == checkpoint["bodies"]:
+            print(f"已从第 {frame} 帧的检查点恢复（物理状态校验一致）")
+        else:
+            print(f"警告: 重放得到的物理状态与检查点不一致，直接写回第 {frame} 帧的快照，"
+                  f"后续帧可能与原渲染略有差异")
+            self.physics.restore(checkpoint["bodies"])
+        return frame
+
+    def render_with_checkpoints(self, layout, total_frames, output_path, dump_dir,
+                                timer, resume=False):
+        """
+        串行渲染：每 checkpoint_interval 帧编码为一个片段并保存检查点，最后无损拼接
+
+        渲染中途崩溃后，以 resume=True 重新运行即可跳过已完成的片段，从最后一个检查点继续。
+        """
+        checkpoint_dir = os.path.join(self.output_dir, "checkpoints")
+        Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
+        checkpoint_path = os.path.join(checkpoint_dir, "checkpoint.json")
+        fingerprint = self.run_fingerprint(layout, total_frames)
+        
+        start_frame = 0
+        segment_paths = []
+        checkpoint = self.load_checkpoint(checkpoint_path, fingerprint) if resume else None
+        if checkpoint is not None:
+            start_frame = self.resume_from_checkpoint(checkpoint, timer)
+            segment_paths = [os.path.join(checkpoint_dir, name) for name in checkpoint["segments"]]
+        
+        for start in range(start_frame, total_frames, self.checkpoint_interval):
+            end = builtins.min(start + self.checkpoint_interval, total_frames)
+            segment_path = os.path.join(checkpoint_dir, f"segment_{start:06d}.mp4")
+            encoder = FrameEncoder(segment_path, self.screen.get_size(), fps=30, crf=18,
+                                   dump_frames_dir=dump_dir, start_index=start)
+            with encoder:
+                self.render_frames(start, end, encoder, timer,
+                                   desc=f"帧 {start}-{end}/{total_frames}")
+            segment_paths.append(segment_path)
             
-        # 移除非字母字符，但保留空格
-        text = re.sub(r'[^a-zA-Z\s]', ' ', text.lower())
+            self.save_checkpoint(checkpoint_path, {
+                "fingerprint": fingerprint,
+                "frame": end,
+                "segments": [os.path.basename(path) for path in segment_paths],
+                "bodies": self.physics.snapshot(),
+            })
+        
+        concat_segments(segment_paths, output_path)
+        shutil.rmtree(checkpoint_dir)
+
+    def render_segments_parallel(self, layout, total_frames, output_path, workers,
+                                 dump_dir, timer):
+        """
+        把时间轴按日期切分成若干片段，由多个进程并行渲染，最后无损拼接
+
+        主进程先只跑物理模拟（不绘制、不编码），在每个片段起点保存物理体状态；
+        每个子进程按相同布局重建场景、恢复检查点后渲染并编码自己的片段。
+        子进程无法恢复 Box2D 内部的接触/关节热启动缓存，因此片段衔接处的运动
+        与串行渲染可能有极细微差别。
+        """
+        segments = plan_segments(total_frames, self.transition_frames, workers)
+        starts = {start for start, _ in segments}
+        checkpoints = {}
         
-        # 分词
-        words = [word.strip() for word in text.split() if word.strip()]
+        print(f"物理预演以生成 {len(segments)} 个片段的检查点...")
+        for frame in tqdm(range(total_frames), desc="物理预演"):
+            if frame in starts:
+                checkpoints[frame] = self.physics.snapshot()
+            self.step_frame(frame, timer)
         
-        # 提取单词和双词短语
-        processed_terms = []
+        segment_dir = os.path.join(self.output_dir, "segments")
+        Path(segment_dir).mkdir(parents=True, exist_ok=True)
+        settings = self.render_settings()
+        payloads = []
+        for index, (start, end) in enumerate(segments):
+            payloads.append({
+                "index": index,
+                "start": start,
+                "end": end,
+                "output_dir": self.output_dir,
+                "segment_path": os.path.join(segment_dir, f"segment_{index:03d}.mp4"),
+                "dump_dir": dump_dir,
+                "settings": settings,
+                "size_matrix": self.size_matrix,
+                "dates": self.dates,
+                "layout": layout,
+                "checkpoint": checkpoints[start],
+            })
         
-        # 处理双词短语
-        for i in range(len(words) - 1):
-            bigram = f"{words[i]} {words[i+1]}"
-            # 如果是重要的双词短语，添加到结果中
-            if bigram in IMPORTANT_BIGRAMS and bigram not in FILTERED_BIGRAMS:
-                processed_terms.append(bigram)
+        print(f"使用 {workers} 个进程并行渲染 {len(segments)} 个片段...")
+        wall_start = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = list(executor.map(_render_segment, payloads))
+        print(f"并行渲染墙钟时间: {time.perf_counter() - wall_start:.2f}s")
         
-        # 处理单个词
-        # 只处理那些不是双词短语一部分的单词
-        for i, word in enumerate(words):
-            # 检查这个词是否是任何重要双词短语的一部分
-            is_part_of_bigram = False
-            if i < len(words) - 1:
-                current_bigram = f"{word} {words[i+1]}"
-                if current_bigram in IMPORTANT_BIGRAMS:
-                    is_part_of_bigram = True
-            if i > 0:
-                previous_bigram = f"{words[i-1]} {word}"
-                if previous_bigram in IMPORTANT_BIGRAMS:
-                    is_part_of_bigram = True
+        for result in results:
+            for name, seconds in result["timings"].items():
+                timer.add(name, seconds)
+        
+        concat_segments([result["segment_path"] for result in results], output_path)
+        for result in results:
+            os.remove(result["segment_path"])
+        if not os.listdir(segment_dir):
+            os.rmdir(segment_dir)
+
+    def create_animation(self, top_n=50, dump_frames=False, workers=1, resume=False):
+        """
+        创建基于物理引擎的词云动画
+
+        Args:
+            top_n: 每个时间点选取的前N个关键词
+            dump_frames: 调试模式，额外把每一帧保存为 PNG 到 frames/ 目录
+            workers: 渲染进程数，大于1时按日期分段并行渲染后无损拼接
+            resume: 串行渲染时从 checkpoints/ 中最后一个检查点继续
+        """
+        if not self.word_frequencies or not self.dates:
+            print("请先运行 process_articles() 方法")
+            return
             
-            # 如果不是双词短语的一部分，且符合其他条件，则添加这个单词
-            if not is_part_of_bigram and word not in ENGLISH_STOP_WORDS and word not in FILTERED_WORDS and len(word) > 2:
-                processed_terms.append(word)
+        # 获取所有时间点的前N个关键词，生成初始布局并创建物理场景
+        all_words = self.select_words(top_n)
+        self.build_size_matrix(all_words)
+        layout = self.generate_layout(all_words)
+        self.build_scene(layout)
+        
+        # 动画循环：帧数据直接写入常驻 ffmpeg 进程，不再落盘 PNG
+        total_frames = (len(self.dates) - 1) * self.transition_frames
+        output_path = os.path.join(self.output_dir, 'word_swarm.mp4')
+        dump_dir = os.path.join(self.output_dir, "frames") if dump_frames else None
+        timer = StageTimer()
+        
+        print(f"正在生成动画帧（布局后端: {self.physics_backend}）...")
+        if workers > 1:
+            self.render_segments_parallel(layout, total_frames, output_path, workers,
+                                          dump_dir, timer)
+        else:
+            self.render_with_checkpoints(layout, total_frames, output_path, dump_dir,
+                                         timer, resume=resume)
         
-        return processed_terms
+        timer.report(total_frames)
+        WordObj.glyph_cache.report()
+        self.physics.report()
+        print(f"动画已保存至: {output_path}")
+        pygame.quit()
+        
+    @staticmethod
+    def preprocess_text(text):
+        """预处理文本，支持单词和双词短语"""
+        return PHRASE_MATCHER.preprocess(text)
+
+def _render_segment(payload):
+    """子进程入口：按布局重建场景，从检查点恢复物理状态后渲染并编码一个片段"""
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    swarm = WordSwarm(data_dir=None, output_dir=payload["output_dir"])
+    for name, value in payload["settings"].items():
+        setattr(swarm, name, value)
+    WordObj.glyph_cache = GlyphCache(size_step=swarm.glyph_size_step, master_size=swarm.max_size)
+    swarm.size_matrix = payload["size_matrix"]
+    swarm.dates = payload["dates"]
+    swarm.build_scene(payload["layout"])
+    
+    swarm.physics.restore(payload["checkpoint"])
+    
+    timer = StageTimer()
+    start, end = payload["start"], payload["end"]
+    encoder = FrameEncoder(payload["segment_path"], swarm.screen.get_size(), fps=30, crf=18,
+                           dump_frames_dir=payload["dump_dir"], start_index=start)
+    with encoder:
+        swarm.render_frames(start, end, encoder, timer,
+                            desc=f"片段 {payload['index']}", position=payload["index"])
+    pygame.quit()
+    return {"segment_path": payload["segment_path"], "timings": timer.totals}
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="基于物理引擎的词云动画")
+    
+    parser.add_argument("--top-n", type=int, default=50,
+                        help="每个时间点选取的前N个关键词 (默认: 50)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="并行渲染进程数，大于1时按日期分段渲染后无损拼接 (默认: 1)")
+    parser.add_argument("--dump-frames", action="store_true",
+                        help="调试模式：额外把每一帧保存为 PNG")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="布局随机种子 (默认: 42)")
+    parser.add_argument("--resume", action="store_true",
+                        help="从上次中断的检查点继续渲染")
+    parser.add_argument("--physics", choices=PHYSICS_BACKENDS, default="box2d",
+                        help="布局后端：box2d 物理引擎或 numpy 向量化力导向布局 (默认: box2d)")
+    parser.add_argument("--preprocess-workers", type=int, default=1,
+                        help="文章预处理（分词、按月统计词频）的进程数 (默认: 1)")
+    
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_arguments()
+    
     # 创建WordSwarm实例
     data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
     output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "animation_results")
     
     swarm = WordSwarm(data_dir=data_dir, output_dir=output_dir)
+    swarm.seed = args.seed
+    swarm.physics_backend = args.physics
     
     # 加载和处理数据
     swarm.load_data()
-    swarm.process_articles()
+    swarm.process_articles(workers=args.preprocess_workers)
     
     # 创建动画
-    swarm.create_animation(top_n=50) 
\ No newline at end of file
+    swarm.create_animation(top_n=args.top_n, dump_frames=args.dump_frames, workers=args.workers,
+                           resume=args.resume) 
\ No newline at end of file